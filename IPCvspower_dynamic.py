@@ -1,36 +1,15 @@
-import re
 import matplotlib.pyplot as plt
-from tabulate import tabulate
+from figure_render import show_figure
+from stats_cache import load_stats_cached
+from stats_regression import FIT_HEADERS, density_grid, fit_runs, fit_table, plot_density
+from table_export import show_table
 
-# Read the 'stats.txt' file
+# Read the 'stats.txt' file and extract relevant data in a single pass
 file_path = '/home/said/Desktop/stats.txt'
-with open(file_path, 'r') as file:
-    stats_data = file.readlines()
-
-# Extract relevant data
-dynamic_power_data = {}
-ipc_data = {}
-time_seconds = []
-
-for line in stats_data:
-    if line.startswith("simSeconds"):
-        time_seconds.append(float(re.search(r'\d+\.\d+', line).group()))
-    elif "power_model.dynamicPower" in line:
-        cpu_match = re.search(r'system\.cpu_cluster\.cpus(\d+)\.power_model\.dynamicPower', line)
-        if cpu_match:
-            cpu_id = cpu_match.group(1)
-            power = float(re.search(r'(\d+\.\d+)', line).group())
-            if cpu_id not in dynamic_power_data:
-                dynamic_power_data[cpu_id] = []
-            dynamic_power_data[cpu_id].append(power)
-    elif "system.cpu_cluster.cpus" in line and "ipc" in line:
-        cpu_match = re.search(r'system\.cpu_cluster\.cpus(\d+)\.ipc', line)
-        if cpu_match:
-            cpu_id = cpu_match.group(1)
-            ipc_value = float(re.search(r'(\d+\.\d+)', line).group())
-            if cpu_id not in ipc_data:
-                ipc_data[cpu_id] = []
-            ipc_data[cpu_id].append(ipc_value)
+series, cpu_series = load_stats_cached(file_path, cpu_stats=("power_model.dynamicPower", "ipc"))
+time_seconds = series["simSeconds"]
+dynamic_power_data = cpu_series["power_model.dynamicPower"]
+ipc_data = cpu_series["ipc"]
 
 # Ensure all lists have the same length
 min_length = min(len(time_seconds), *[len(powers) for powers in dynamic_power_data.values()],
@@ -42,19 +21,16 @@ for cpu_id in dynamic_power_data:
 for cpu_id in ipc_data:
     ipc_data[cpu_id] = ipc_data[cpu_id][:min_length]
 
-# Print table of power and IPC values per CPU
-table_data = []
+# Preview the table of power and IPC values per CPU (set STATS_TABLE_DIR to export all of it)
 headers = ["Time (s)"] + [f"CPU {cpu_id} Power (W)" for cpu_id in dynamic_power_data] + \
            [f"CPU {cpu_id} IPC" for cpu_id in ipc_data]
-for i in range(min_length):
-    row = [f"{time_seconds[i]:.6f}"]
-    for cpu_id in dynamic_power_data:
-        row.append(f"{dynamic_power_data[cpu_id][i]:.6f}")
-    for cpu_id in ipc_data:
-        row.append(f"{ipc_data[cpu_id][i]:.6f}")
-    table_data.append(row)
+columns = [time_seconds] + list(dynamic_power_data.values()) + list(ipc_data.values())
+show_table("IPCvspower_dynamic", headers, columns)
 
-print(tabulate(table_data, headers=headers, tablefmt="grid"))
+# Least-squares fit of dynamic power against IPC per CPU and over all CPUs
+runs, per_core_fit, pooled_fit, bounds = fit_runs([file_path])
+print("\nDynamic Power vs IPC least-squares fit:")
+show_table("IPCvspower_dynamic_fit", FIT_HEADERS, [list(column) for column in zip(*fit_table(runs, per_core_fit, pooled_fit))])
 
 # Plot Power vs IPC for each CPU with different colors
 plt.figure(figsize=(10, 6))
@@ -76,4 +52,10 @@ plt.legend(fontsize=12, title="CPU Cores")
 
 # Show the plot
 plt.tight_layout()
-plt.show()
+show_figure("IPCvspower_dynamic")
+
+# Density of all (IPC, power) samples with the fitted lines; a 2D histogram
+# draws as fast for millions of dumps as for a few
+plot_density(*density_grid([file_path], bounds), per_core_fit, pooled_fit)
+plt.tight_layout()
+show_figure("IPCvspower_dynamic_density")
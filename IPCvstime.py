@@ -1,32 +1,14 @@
-import re
 import matplotlib.pyplot as plt
 from mpl_toolkits.axes_grid1.inset_locator import inset_axes
-from tabulate import tabulate
+from figure_render import show_figure
+from stats_cache import load_stats_cached
+from table_export import show_table
 
-# Read the 'stats.txt' file
+# Read the 'stats.txt' file and extract simulation time and IPC values for each CPU
 file_path = '/home/said/GEM5/ARM/gem5/output/mibench/basicmathlarge-L3_dvfsdisable/stats.txt'
-with open(file_path, 'r') as file:
-    stats_data = file.readlines()
-
-# Extract relevant data
-ipc_data = {}
-time_seconds = []
-
-for line in stats_data:
-    # Extract simulation time
-    if line.startswith("simSeconds"):
-        time_seconds.append(float(re.search(r'\d+\.\d+', line).group()))
-    
-    # Extract IPC values for each CPU
-    elif "system.cpu_cluster.cpus" in line and "ipc" in line:
-        cpu_match = re.search(r'system\.cpu_cluster\.cpus(\d+)\.ipc', line)
-        if cpu_match:
-            cpu_id = cpu_match.group(1)
-            ipc_value = float(re.search(r'(\d+\.\d+)', line).group())
-            if cpu_id not in ipc_data:
-                ipc_data[cpu_id] = []
-                
-            ipc_data[cpu_id].append(ipc_value)
+series, cpu_series = load_stats_cached(file_path, cpu_stats=("ipc",))
+time_seconds = series["simSeconds"]
+ipc_data = cpu_series["ipc"]
 
 # Ensure all lists have the same length
 min_length = min(len(time_seconds), *[len(ipcs) for ipcs in ipc_data.values()])
@@ -34,16 +16,9 @@ time_seconds = time_seconds[:min_length]
 for cpu_id in ipc_data:
     ipc_data[cpu_id] = ipc_data[cpu_id][:min_length]
 
-# Print table of values
-table_data = []
+# Preview the table of values (set STATS_TABLE_DIR to export all of it)
 headers = ["Time (s)"] + [f"CPU {cpu_id} IPC" for cpu_id in ipc_data]
-for i in range(min_length):
-    row = [f"{time_seconds[i]:.6f}"]
-    for cpu_id in ipc_data:
-        row.append(f"{ipc_data[cpu_id][i]:.6f}")
-    table_data.append(row)
-
-print(tabulate(table_data, headers=headers, tablefmt="grid"))
+show_table("IPCvstime", headers, [time_seconds] + list(ipc_data.values()))
 
 # Plot IPC vs time for all CPUs
 fig, ax = plt.subplots(figsize=(10, 6))
@@ -79,4 +54,4 @@ ax_inset.legend(loc='lower center', bbox_to_anchor=(0.45, -0.75), fontsize=13, n
 
 # Show the plot
 plt.tight_layout()
-plt.show()
+show_figure("IPCvstime")
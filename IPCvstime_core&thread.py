@@ -1,6 +1,11 @@
 import os
-import re
 import matplotlib.pyplot as plt
+from figure_render import show_figure
+from stats_align import align_cpu_series
+from stats_cache import load_stats_cached
+from stats_changepoint import annotate_change_points, phase_segments, segment_table
+from stats_topology import load_topology_series
+from table_export import show_table
 
 # Define paths to data files for DVFS-enabled and DVFS-disabled scenarios
 # path_dvfs_enabled = "/home/said/GEM5/ARM/gem5/output/mibench/telecom_adpcm_rawdaudiosmall2_L3_dvfsenable/stats.txt"
@@ -9,100 +14,104 @@ import matplotlib.pyplot as plt
 
 path_dvfs_enabled = "/home/said/GEM5/ARM/gem5/output/mibench/basicmathlarge-L3_dvfsenable/stats.txt"
 path_dvfs_disabled = "/home/said/GEM5/ARM/gem5/output/mibench/basicmathlarge3-L3_dvfsenable/stats.txt"
-# Define CPU range
-cpu_ids = range(3)  # CPUs 0, 1, and 2
-
-# Regular expressions to capture IPC at core and thread levels
-core_level_ipc_pattern = re.compile(r"system\.cpu_cluster\.cpus(\d+)\.ipc\s+([\d.]+)")
-thread_level_ipc_pattern = re.compile(r"system\.cpu_cluster\.cpus(\d+)\.commitStats(\d+)\.ipc\s+([\d.]+)")
-
 # Function to extract IPC data from log file
 def extract_ipc_data(file_path):
-    core_ipc_data = {f'cpu{i}': [] for i in cpu_ids}
-    thread_ipc_data = {f'cpu{i}_thread{j}': [] for i in cpu_ids for j in range(2)}  # Assuming 2 threads per CPU
-
-    with open(file_path, 'r') as file:
-        for line in file:
-            core_match = core_level_ipc_pattern.search(line)
-            if core_match:
-                cpu_id, ipc_value = int(core_match.group(1)), float(core_match.group(2))
-                if f'cpu{cpu_id}' in core_ipc_data:
-                    core_ipc_data[f'cpu{cpu_id}'].append(ipc_value)
-            
-            thread_match = thread_level_ipc_pattern.search(line)
-            if thread_match:
-                cpu_id, thread_id, ipc_value = int(thread_match.group(1)), int(thread_match.group(2)), float(thread_match.group(3))
-                if f'cpu{cpu_id}_thread{thread_id}' in thread_ipc_data:
-                    thread_ipc_data[f'cpu{cpu_id}_thread{thread_id}'].append(ipc_value)
+    # Parse the log file once for both core and thread level IPC (commitStats<M>.ipc);
+    # the CPUs and the threads per CPU are discovered from its first dump
+    time_seconds, core_ipc, thread_ipc, cpu_ids, thread_ids = load_topology_series(
+        file_path, core_stat="ipc", thread_stat="ipc")
+    core_ipc_data = {f'cpu{cpu_id}': core_ipc[:, core] for core, cpu_id in enumerate(cpu_ids)}
+    thread_ipc_data = {f'cpu{cpu_id}_thread{thread_id}': thread_ipc[:, core, thread]
+                       for core, cpu_id in enumerate(cpu_ids) for thread, thread_id in enumerate(thread_ids)}
 
     print("Core-level IPC data extracted:")
-    for cpu_id in cpu_ids:
-        print(f"cpu{cpu_id}: {core_ipc_data[f'cpu{cpu_id}']}")
+    for key, ipc_values in core_ipc_data.items():
+        print(f"{key}: {ipc_values.tolist()}")
     
     print("Thread-level IPC data extracted:")
-    for cpu_id in cpu_ids:
-        for thread_id in range(2):
-            print(f"cpu{cpu_id}_thread{thread_id}: {thread_ipc_data[f'cpu{cpu_id}_thread{thread_id}']}")
+    for key, ipc_values in thread_ipc_data.items():
+        print(f"{key}: {ipc_values.tolist()}")
 
-    return core_ipc_data, thread_ipc_data
+    return time_seconds, core_ipc_data, thread_ipc_data
 
 # Load data for both DVFS-enabled and DVFS-disabled cases
-core_ipc_dvfs_enabled, thread_ipc_dvfs_enabled = extract_ipc_data(path_dvfs_enabled)
-core_ipc_dvfs_disabled, thread_ipc_dvfs_disabled = extract_ipc_data(path_dvfs_disabled)
-
-# Synchronize the lengths of IPC data and time steps
-def synchronize_data_lengths(data_enabled, data_disabled):
-    lengths = [len(data_enabled[key]) for key in data_enabled if data_enabled[key]] + \
-              [len(data_disabled[key]) for key in data_disabled if data_disabled[key]]
-    
-    if not lengths:
+time_dvfs_enabled, core_ipc_dvfs_enabled, thread_ipc_dvfs_enabled = extract_ipc_data(path_dvfs_enabled)
+time_dvfs_disabled, core_ipc_dvfs_disabled, thread_ipc_dvfs_disabled = extract_ipc_data(path_dvfs_disabled)
+
+# Find workload phase changes and DVFS transitions in one run: change points of
+# its per-core IPC and dynamic power (set STATS_TABLE_DIR to export every segment)
+def detect_phases(label, file_path, time_seconds, core_ipc_data):
+    series, cpu_series = load_stats_cached(file_path, cpu_stats=("power_model.dynamicPower",))
+    core_power_data = {f'cpu{cpu_id}': values for cpu_id, values in cpu_series["power_model.dynamicPower"].items()}
+    segments = {}
+    for stat, unit, times, data in (("ipc", "", time_seconds, core_ipc_data),
+                                    ("dynamic_power", "W", series["simSeconds"], core_power_data)):
+        stat_segments = phase_segments(times, data)
+        print(f"\n{label} {stat} segments: " + ", ".join(f"{key}: {len(per_cpu)}" for key, per_cpu in stat_segments.items()))
+        show_table(f"IPCvstime_phases_{label}_{stat}", *segment_table(stat_segments, unit))
+        segments.update({f"{key} {stat}": per_cpu for key, per_cpu in stat_segments.items()})
+    return segments
+
+phases_dvfs_enabled = detect_phases("dvfs_enabled", path_dvfs_enabled, time_dvfs_enabled, core_ipc_dvfs_enabled)
+phases_dvfs_disabled = detect_phases("dvfs_disabled", path_dvfs_disabled, time_dvfs_disabled, core_ipc_dvfs_disabled)
+
+# Put both runs on a common simulated-time grid instead of truncating to the shorter one
+def synchronize_data(time_enabled, data_enabled, time_disabled, data_disabled):
+    # Only entries with data in both runs can be compared; the others stay None
+    keys = [key for key in data_enabled if key in data_disabled]
+
+    if not keys:
         print("Error: No data available for synchronization.")
         return None, None, None
 
-    min_len = min(lengths)
-
-    for key in data_enabled:
-        if data_enabled[key]:
-            data_enabled[key] = data_enabled[key][:min_len]
-    for key in data_disabled:
-        if data_disabled[key]:
-            data_disabled[key] = data_disabled[key][:min_len]
-
-    time_steps = list(range(min_len))
-    return data_enabled, data_disabled, time_steps
-
-# Synchronize data lengths
-core_ipc_dvfs_enabled, core_ipc_dvfs_disabled, core_time_steps = synchronize_data_lengths(core_ipc_dvfs_enabled, core_ipc_dvfs_disabled)
-thread_ipc_dvfs_enabled, thread_ipc_dvfs_disabled, thread_time_steps = synchronize_data_lengths(thread_ipc_dvfs_enabled, thread_ipc_dvfs_disabled)
+    time_grid, (aligned_enabled, aligned_disabled) = align_cpu_series([
+        (time_enabled, {key: data_enabled[key] for key in keys}),
+        (time_disabled, {key: data_disabled[key] for key in keys}),
+    ])
+    all_keys = list(dict.fromkeys([*data_enabled, *data_disabled]))
+    aligned_enabled = {key: aligned_enabled.get(key) for key in all_keys}
+    aligned_disabled = {key: aligned_disabled.get(key) for key in all_keys}
+    return aligned_enabled, aligned_disabled, time_grid
+
+# Align both runs in simulated time
+core_ipc_dvfs_enabled, core_ipc_dvfs_disabled, core_time_steps = synchronize_data(
+    time_dvfs_enabled, core_ipc_dvfs_enabled, time_dvfs_disabled, core_ipc_dvfs_disabled)
+thread_ipc_dvfs_enabled, thread_ipc_dvfs_disabled, thread_time_steps = synchronize_data(
+    time_dvfs_enabled, thread_ipc_dvfs_enabled, time_dvfs_disabled, thread_ipc_dvfs_disabled)
 
 # Plot IPC data
-def plot_ipc(data_enabled, data_disabled, time_steps, title):
-    if not time_steps:
+def plot_ipc(data_enabled, data_disabled, time_steps, title, name, phases=()):
+    if len(time_steps) == 0:
         print(f"Error: time_steps is empty for {title}. No data to plot.")
         return
 
     plt.figure(figsize=(14, 8))
     for key in data_enabled:
-        if data_enabled[key] and data_disabled[key]:
+        if data_enabled[key] is not None and data_disabled[key] is not None:
             plt.plot(time_steps, data_enabled[key], label=f'{key} - DVFS Enabled', linestyle='-', marker='o')
             plt.plot(time_steps, data_disabled[key], label=f'{key} - DVFS Disabled', linestyle='--', marker='x')
         else:
             print(f"Warning: No data for {key}. Skipping this entry.")
     
-    plt.xlabel("Time Steps")
+    plt.xlabel("Time (s)")
     plt.ylabel("IPC")
     plt.title(title)
+    # Mark the phase boundaries found in each run
+    for segments, color in phases:
+        annotate_change_points(plt.gca(), segments, color=color)
     plt.legend()
     plt.grid()
-    plt.show()
+    show_figure(name)
 
 # Generate plots
-if core_time_steps:
-    plot_ipc(core_ipc_dvfs_enabled, core_ipc_dvfs_disabled, core_time_steps, "Core Level IPC over Time (DVFS Enabled vs Disabled)")
+if core_time_steps is not None and len(core_time_steps):
+    plot_ipc(core_ipc_dvfs_enabled, core_ipc_dvfs_disabled, core_time_steps, "Core Level IPC over Time (DVFS Enabled vs Disabled)",
+             "IPCvstime_core_level", [(phases_dvfs_enabled, "tab:green"), (phases_dvfs_disabled, "tab:red")])
 else:
     print("Error: Unable to generate core-level plot due to lack of data.")
 
-if thread_time_steps:
-    plot_ipc(thread_ipc_dvfs_enabled, thread_ipc_dvfs_disabled, thread_time_steps, "Thread Level IPC over Time (DVFS Enabled vs Disabled)")
+if thread_time_steps is not None and len(thread_time_steps):
+    plot_ipc(thread_ipc_dvfs_enabled, thread_ipc_dvfs_disabled, thread_time_steps, "Thread Level IPC over Time (DVFS Enabled vs Disabled)",
+             "IPCvstime_thread_level")
 else:
     print("Error: Unable to generate thread-level plot due to lack of data.")
\ No newline at end of file
@@ -1,21 +1,17 @@
-import re
 import matplotlib.pyplot as plt
-from tabulate import tabulate
+import numpy as np
+from figure_render import show_figure
+from stats_align import align_runs
+from stats_cache import load_stats_cached
+from stats_energy import energy_metrics
+from table_export import show_table
 
 # Function to read and extract power data from a 'stats.txt' file for a single core
 def extract_dynamic_power_data(file_path):
-    with open(file_path, 'r') as file:
-        stats_data = file.readlines()
-
-    dynamic_power_data = []
-    time_seconds = []
-
-    for line in stats_data:
-        if line.startswith("simSeconds"):
-            time_seconds.append(float(re.search(r'\d+\.\d+', line).group()))
-        elif "system.cpu_cluster.cpus.power_model.dynamicPower" in line:
-            power = float(re.search(r'(\d+\.\d+)', line).group())
-            dynamic_power_data.append(power)
+    power_stat = "system.cpu_cluster.cpus.power_model.dynamicPower"
+    series, _ = load_stats_cached(file_path, names=("simSeconds", power_stat))
+    time_seconds = series["simSeconds"]
+    dynamic_power_data = series[power_stat]
 
     # Ensure both lists have the same length
     min_length = min(len(time_seconds), len(dynamic_power_data))
@@ -32,34 +28,34 @@ file_path_no_dvfs = '/home/said/GEM5/ARM/gem5/output/mibench/telecomFFT4_w4_s327
 time_dvfs, dynamic_power_dvfs = extract_dynamic_power_data(file_path_dvfs)
 time_no_dvfs, dynamic_power_no_dvfs = extract_dynamic_power_data(file_path_no_dvfs)
 
-# Find the common minimum length between time arrays and power data
-min_length = min(len(time_dvfs), len(time_no_dvfs))
+# Integrate each whole run over simulated time (before alignment cuts it to the overlap)
+energy_dvfs = energy_metrics(time_dvfs, np.asarray(dynamic_power_dvfs)[:, None])
+energy_no_dvfs = energy_metrics(time_no_dvfs, np.asarray(dynamic_power_no_dvfs)[:, None])
 
-# Trim both time and power data to the same minimum length
-time_dvfs = time_dvfs[:min_length]
-dynamic_power_dvfs = dynamic_power_dvfs[:min_length]
-dynamic_power_no_dvfs = dynamic_power_no_dvfs[:min_length]
+# Put both runs on a common simulated-time grid instead of truncating to the shorter one
+time_grid, aligned = align_runs([(time_dvfs, dynamic_power_dvfs), (time_no_dvfs, dynamic_power_no_dvfs)])
+time_dvfs = time_no_dvfs = time_grid
+dynamic_power_dvfs, dynamic_power_no_dvfs = aligned[0, :, 0], aligned[1, :, 0]
 
 # Calculate total average power consumption over the entire time period
-total_average_power_dvfs = sum(dynamic_power_dvfs) / len(dynamic_power_dvfs)
-total_average_power_no_dvfs = sum(dynamic_power_no_dvfs) / len(dynamic_power_no_dvfs)
+total_average_power_dvfs = dynamic_power_dvfs.mean()
+total_average_power_no_dvfs = dynamic_power_no_dvfs.mean()
 
-# Prepare table for comparison
-table_data = []
+# Preview the table for comparison (set STATS_TABLE_DIR to export all of it)
 headers = ["Time (s)", "Dynamic Power (W) with DVFS", "Dynamic Power (W) without DVFS"]
-for i in range(min_length):
-    row = [f"{time_dvfs[i]:.6f}", 
-           f"{dynamic_power_dvfs[i]:.6f}", 
-           f"{dynamic_power_no_dvfs[i]:.6f}"]
-    table_data.append(row)
-
-print(tabulate(table_data, headers=headers, tablefmt="grid"))
+show_table("average_power_singlecore", headers, [time_grid, dynamic_power_dvfs, dynamic_power_no_dvfs])
 
 # Print total average power consumption
 print(f"\nTotal Average Power Consumption:")
 print(f"  With DVFS: {total_average_power_dvfs:.6f} W")
 print(f"  Without DVFS: {total_average_power_no_dvfs:.6f} W")
 
+# Print dynamic energy, time-weighted average power and energy-delay product of each run
+print(f"\nDynamic Energy (integrated over simulated time):")
+for label, metrics in (("With DVFS", energy_dvfs), ("Without DVFS", energy_no_dvfs)):
+    print(f"  {label}: {metrics['total_energy']:.6f} J over {metrics['runtime']:.6f} s, "
+          f"{metrics['average_power']:.6f} W average, EDP {metrics['edp']:.6f} J*s")
+
 # Plot dynamic power for both states
 plt.figure(figsize=(10, 6))
 
@@ -76,4 +72,4 @@ plt.legend(fontsize=12)
 
 # Display the plot
 plt.tight_layout()
-plt.show()
+show_figure("average_power_singlecore")
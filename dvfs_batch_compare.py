@@ -0,0 +1,110 @@
+import argparse
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from stats_io import find_stats_file
+from stats_profile import add_profile_argument, enable
+from stats_run import StatsRun
+
+ENABLE_SUFFIX = "_dvfsenable"
+DISABLE_SUFFIX = "_dvfsdisable"
+
+HEADERS = ["Benchmark",
+           "Avg Dynamic Power with DVFS (W)", "Avg Dynamic Power without DVFS (W)", "Dynamic Power Delta (%)",
+           "Avg Total Power with DVFS (W)", "Avg Total Power without DVFS (W)", "Total Power Delta (%)",
+           "Avg IPC with DVFS", "Avg IPC without DVFS", "IPC Delta (%)"]
+
+
+# Find every <benchmark>_dvfsenable / <benchmark>_dvfsdisable pair of run
+# directories holding a stats.txt, plain or compressed (see
+# stats_io.find_stats_file), under output_root (suffixes are matched
+# case-insensitively). Returns sorted (benchmark, enabled stats, disabled stats).
+def find_dvfs_pairs(output_root):
+    runs = {}
+    for dir_path, _, file_names in os.walk(output_root):
+        stats_path = find_stats_file(dir_path, file_names)
+        if stats_path is None:
+            continue
+        run_name = os.path.basename(dir_path)
+        for suffix in (ENABLE_SUFFIX, DISABLE_SUFFIX):
+            if run_name.lower().endswith(suffix):
+                benchmark = os.path.join(os.path.relpath(os.path.dirname(dir_path), output_root),
+                                         run_name[:-len(suffix)])
+                runs.setdefault(os.path.normpath(benchmark), {})[suffix] = stats_path
+
+    return sorted((benchmark, paths[ENABLE_SUFFIX], paths[DISABLE_SUFFIX])
+                  for benchmark, paths in runs.items()
+                  if ENABLE_SUFFIX in paths and DISABLE_SUFFIX in paths)
+
+
+# Mean over dumps of the per-dump sum (or mean) across cores; NaN without data
+def _average_across_cores(run, stat, reduce):
+    _, values, _ = run.cpu_array(stat)
+    if values.size == 0:
+        return np.nan
+    return float(np.mean(reduce(values, axis=1)))
+
+
+# Average dynamic power, total (dynamic + static) power and IPC of one run
+def summarize_run(stats_path):
+    run = StatsRun.load(stats_path, cpu_stats=("power_model.dynamicPower", "power_model.staticPower", "ipc"),
+                        workers=1)
+    dynamic_power = _average_across_cores(run, "power_model.dynamicPower", np.sum)
+    static_power = _average_across_cores(run, "power_model.staticPower", np.sum)
+    return {
+        "dynamic_power": dynamic_power,
+        "total_power": dynamic_power + static_power,
+        "ipc": _average_across_cores(run, "ipc", np.mean),
+    }
+
+
+def _percent_delta(with_dvfs, without_dvfs):
+    if not without_dvfs or np.isnan(without_dvfs):
+        return np.nan
+    return 100.0 * (with_dvfs - without_dvfs) / without_dvfs
+
+
+# Summary row for one benchmark from the summaries of its two runs
+def compare_pair(benchmark, enabled, disabled):
+    row = [benchmark]
+    for key in ("dynamic_power", "total_power", "ipc"):
+        row += [enabled[key], disabled[key], _percent_delta(enabled[key], disabled[key])]
+    return row
+
+
+# Compare every DVFS pair under output_root. Each run is summarized in its own
+# worker process, so both runs of a pair are parsed at the same time.
+def compare_all(output_root, workers=None):
+    pairs = find_dvfs_pairs(output_root)
+    stats_paths = [path for _, enabled, disabled in pairs for path in (enabled, disabled)]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        summaries = dict(zip(stats_paths, executor.map(summarize_run, stats_paths)))
+    return [compare_pair(benchmark, summaries[enabled], summaries[disabled])
+            for benchmark, enabled, disabled in pairs]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare every *_dvfsenable/*_dvfsdisable run pair under a gem5 output tree")
+    parser.add_argument("output_root", help="e.g. /home/said/GEM5/ARM/gem5/output/mibench")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--csv", help="also write the summary table to this CSV file")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    if args.profile:
+        enable()
+
+    rows = compare_all(args.output_root, args.workers)
+    if not rows:
+        print(f"Error: no *{ENABLE_SUFFIX}/*{DISABLE_SUFFIX} pairs with stats.txt found under {args.output_root}")
+    else:
+        from tabulate import tabulate
+        print(tabulate(rows, headers=HEADERS, tablefmt="grid", floatfmt=".6f"))
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(HEADERS)
+            writer.writerows(rows)
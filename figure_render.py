@@ -0,0 +1,90 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+# Set STATS_FIGURE_DIR to render headless: figures are written there instead of
+# opening windows, in every format listed in STATS_FIGURE_FORMATS (default png).
+FIGURE_DIR_ENV = "STATS_FIGURE_DIR"
+FIGURE_FORMATS_ENV = "STATS_FIGURE_FORMATS"
+
+if os.environ.get(FIGURE_DIR_ENV):
+    matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # Imported once the backend is chosen
+
+from plot_decimate import decimate_figure
+from stats_profile import profiled
+
+
+def figure_dir():
+    return os.environ.get(FIGURE_DIR_ENV) or None
+
+
+def figure_formats():
+    formats = os.environ.get(FIGURE_FORMATS_ENV, "png")
+    return [fmt.strip().lstrip('.') for fmt in formats.split(',') if fmt.strip()]
+
+
+# Write a figure as <output_dir>/<name>.<format> for every format; returns the paths
+def save_figure(fig, name, output_dir=None, formats=None):
+    output_dir = output_dir or figure_dir()
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for fmt in formats or figure_formats():
+        path = os.path.join(output_dir, f"{name}.{fmt}")
+        fig.savefig(path, format=fmt)
+        paths.append(path)
+    return paths
+
+
+# Drop-in for plt.show(): thins long lines to the axes width as they draw, then shows the
+# figure, or saves and closes it when rendering headless
+@profiled("render")
+def show_figure(name, fig=None):
+    fig = fig or plt.gcf()
+    decimate_figure(fig)
+    if figure_dir() is None:
+        plt.show()
+        return []
+    paths = save_figure(fig, name)
+    plt.close(fig)
+    print("Saved " + ", ".join(paths))
+    return paths
+
+
+def _render_job(job):
+    draw, name, args, output_dir, formats = job
+    fig = draw(*args)
+    decimate_figure(fig)
+    paths = save_figure(fig, name, output_dir, formats)
+    plt.close(fig)
+    return paths
+
+
+# Render independent figures. `draw(*args)` must build and return one Figure for
+# each (name, args) job. Headless, the jobs run in forked worker processes and
+# every figure is saved; otherwise each figure is shown in turn.
+@profiled("render")
+def render_figures(draw, jobs, output_dir=None, formats=None, workers=None):
+    output_dir = output_dir or figure_dir()
+    if output_dir is None:
+        for _, args in jobs:
+            decimate_figure(draw(*args))
+            plt.show()
+        return []
+
+    formats = formats or figure_formats()
+    tasks = [(draw, name, args, output_dir, formats) for name, args in jobs]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            results = list(executor.map(_render_job, tasks))
+    else:
+        results = [_render_job(task) for task in tasks]
+
+    paths = [path for result in results for path in result]
+    print("Saved " + ", ".join(paths))
+    return paths
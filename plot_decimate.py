@@ -0,0 +1,133 @@
+import os
+
+import numpy as np
+
+# STATS_DECIMATE picks how long lines are thinned before drawing:
+# "minmax" (default) keeps the lowest and highest point of every bucket,
+# "lttb" uses largest-triangle-three-buckets, "off" draws every point.
+DECIMATE_ENV = "STATS_DECIMATE"
+DECIMATE_METHODS = ("minmax", "lttb", "off")
+
+# Points kept per horizontal pixel of the axes, and a floor for tiny axes
+POINTS_PER_PIXEL = 2
+MIN_POINTS = 200
+
+
+def decimate_method():
+    method = os.environ.get(DECIMATE_ENV, "minmax").lower()
+    if method not in DECIMATE_METHODS:
+        raise ValueError(f"Unknown {DECIMATE_ENV}='{method}', expected one of {DECIMATE_METHODS}")
+    return method
+
+
+# Indices of the minimum and maximum of `y` in each of num_buckets equal-count
+# buckets, plus the first and last sample, in ascending order. NaNs are skipped.
+def minmax_indices(y, num_buckets):
+    y = np.asarray(y, dtype=np.float64)
+    length = len(y)
+    if num_buckets <= 0 or 2 * num_buckets + 2 >= length:
+        return np.arange(length)
+
+    size = -(-length // num_buckets)
+    padded = np.full(num_buckets * size, np.nan)
+    padded[:length] = y
+    padded = padded.reshape(num_buckets, size)
+    nan = np.isnan(padded)
+    offsets = np.arange(num_buckets) * size
+    low = offsets + np.argmin(np.where(nan, np.inf, padded), axis=1)
+    high = offsets + np.argmax(np.where(nan, -np.inf, padded), axis=1)
+
+    indices = np.unique(np.concatenate(([0, length - 1], low, high)))
+    return indices[indices < length]
+
+
+# Indices picked by largest-triangle-three-buckets: `threshold` points that keep
+# the visual shape of (x, y), always including the first and last sample.
+# The loop runs once per output point, not per input sample.
+def lttb_indices(x, y, threshold):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    length = len(x)
+    if threshold < 3 or threshold >= length:
+        return np.arange(length)
+
+    edges = np.linspace(1, length - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = length - 1
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else length
+        next_x = np.nanmean(x[end:next_end]) if next_end > end else x[-1]
+        next_y = np.nanmean(y[end:next_end]) if next_end > end else y[-1]
+        prev_x, prev_y = x[selected[bucket]], y[selected[bucket]]
+
+        area = np.abs((prev_x - next_x) * (y[start:end] - prev_y)
+                      - (prev_x - x[start:end]) * (next_y - prev_y))
+        selected[bucket + 1] = start + np.argmax(np.nan_to_num(area, nan=-1.0))
+    return selected
+
+
+# Reduce (x, y) to about max_points points with the given method
+def decimate(x, y, max_points, method="minmax"):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if method == "off" or len(x) <= max_points:
+        return x, y
+    if method == "lttb":
+        indices = lttb_indices(x, y, max_points)
+    else:
+        indices = minmax_indices(y, max_points // 2)
+    return x[indices], y[indices]
+
+
+# Draw hook that decimate_axes puts on a long line. It keeps the full data and,
+# on each draw, thins the part inside the current x limits to the width the
+# axes has at that moment (the line's data is only the thinned copy). Axes are
+# laid out, inset locators included, before their lines draw, and pan, zoom and
+# resize all redraw, so every view is thinned from the full series.
+class _DecimatedDraw:
+    __slots__ = ("line", "x", "y", "method", "view")
+
+    def __init__(self, line, x, y, method):
+        self.line = line
+        self.x = x
+        self.y = y
+        self.method = method
+        self.view = None
+
+    def __call__(self, renderer):
+        ax = self.line.axes
+        max_points = max(int(ax.bbox.width * POINTS_PER_PIXEL), MIN_POINTS)
+        x_min, x_max = sorted(ax.get_xlim())
+        if self.view != (x_min, x_max, max_points):
+            self.view = (x_min, x_max, max_points)
+            # Keep one point beyond each limit so lines still run to the frame
+            start = max(np.searchsorted(self.x, x_min, side='left') - 1, 0)
+            end = np.searchsorted(self.x, x_max, side='right') + 1
+            self.line.set_data(*decimate(self.x[start:end], self.y[start:end], max_points, self.method))
+        return type(self.line).draw(self.line, renderer)
+
+
+# Thin every line of an axes to what its pixel width can show, at draw time.
+# Only the part inside the current x limits is kept, so an inset zoomed on a
+# short window keeps full detail there. Lines whose x data is not sorted (e.g.
+# IPC vs power) are left alone.
+def decimate_axes(ax, method=None):
+    method = method or decimate_method()
+    if method == "off":
+        return
+
+    for line in ax.get_lines():
+        if isinstance(vars(line).get("draw"), _DecimatedDraw):
+            continue
+        x = np.asarray(line.get_xdata(), dtype=np.float64)
+        y = np.asarray(line.get_ydata(), dtype=np.float64)
+        if len(x) <= MIN_POINTS or len(x) != len(y) or np.any(x[1:] < x[:-1]):
+            continue
+        line.draw = _DecimatedDraw(line, x, y, method)
+
+
+def decimate_figure(fig, method=None):
+    for ax in fig.get_axes():
+        decimate_axes(ax, method)
@@ -1,54 +1,42 @@
-import re
+import sys
 import matplotlib.pyplot as plt
-
-# Initialize lists to store power and time values
-dynamic_power = []
-static_power = []
-time = None
-
-# Read the text file
-with open("/home/said/Desktop/Programs/ocean_non_contig/core_b2l3p8/1800MHz0.98100/stats.txt", "r") as file:
-    data = file.read()
-
-# Extract dynamic power, static power, and time values using regular expressions
-dynamic_power_matches = re.findall(r'dynamicPower\s+(\d+\.\d+)', data)
-static_power_matches = re.findall(r'staticPower\s+(\d+\.\d+)', data)
-time_match = re.search(r'simSeconds\s+(\d+\.\d+)', data)
-
-# Convert extracted values to floats
-dynamic_power = [float(power) for power in dynamic_power_matches]
-static_power = [float(power) for power in static_power_matches]
-time = float(time_match.group(1)) * 1000  # Convert time to milliseconds
-
-# Determine the number of measurements
-num_measurements = min(len(dynamic_power), len(static_power))
+import numpy as np
+from figure_render import show_figure
+from stats_binning import bin_by_time
+from stats_cache import load_stats_cached
+from stats_parser import CPU_PREFIX
+
+# Read the text file and extract dynamic power, static power, and time values in a single pass
+file_path = "/home/said/Desktop/Programs/ocean_non_contig/core_b2l3p8/1800MHz0.98100/stats.txt"
+power_stats = ("power_model.dynamicPower", "power_model.staticPower")
+# Single-core configs name their core 'cpus' without an index
+single_core_names = tuple(f"{CPU_PREFIX}.{stat}" for stat in power_stats)
+series, cpu_series = load_stats_cached(file_path, names=("simSeconds",) + single_core_names, cpu_stats=power_stats)
+
+# Average the per-core samples of each dump
+def average_across_cores(stat):
+    per_cpu = list(cpu_series[stat].values())
+    if not per_cpu and len(series[f"{CPU_PREFIX}.{stat}"]):
+        per_cpu = [series[f"{CPU_PREFIX}.{stat}"]]
+    if not per_cpu:
+        print(f"Error: no {CPU_PREFIX}<N>.{stat} or {CPU_PREFIX}.{stat} values in {file_path}")
+        sys.exit(1)
+    length = min(len(values) for values in per_cpu)
+    return np.column_stack([values[:length] for values in per_cpu]).mean(axis=1)
+
+time_seconds = series["simSeconds"]
+dynamic_power = average_across_cores("power_model.dynamicPower")
+static_power = average_across_cores("power_model.staticPower")
 
 # Define the time interval for averaging (in milliseconds)
 time_interval = 1  # Set the time interval to 1 millisecond
 
-# Calculate the number of bins
-num_bins = int(time / time_interval)
-
-# Initialize lists to store averaged power values
-averaged_dynamic_power = [0] * num_bins
-averaged_static_power = [0] * num_bins
-
-# Initialize variables to track the number of measurements in each bin
-num_measurements_in_bin = [0] * num_bins
-
-# Aggregate power values into bins
-for i in range(num_measurements):
-    bin_index = int(i * num_bins / num_measurements)
-    averaged_dynamic_power[bin_index] += dynamic_power[i]
-    averaged_static_power[bin_index] += static_power[i]
-    num_measurements_in_bin[bin_index] += 1
-
-# Calculate the average power values
-averaged_dynamic_power = [power / count if count != 0 else 0 for power, count in zip(averaged_dynamic_power, num_measurements_in_bin)]
-averaged_static_power = [power / count if count != 0 else 0 for power, count in zip(averaged_static_power, num_measurements_in_bin)]
+# Aggregate power values into bins by the simulated time of each dump
+bin_starts, binned = bin_by_time(time_seconds, np.column_stack([dynamic_power, static_power]), time_interval / 1000)
+averaged_dynamic_power, averaged_static_power = binned["mean"].T
 
-# Create an array of time values for each bin
-time_values = [i * time_interval for i in range(num_bins)]
+# Create an array of time values for each bin (in milliseconds)
+time_values = bin_starts * 1000
 
 # Plot the data
 plt.plot(time_values, averaged_dynamic_power, label='Dynamic Power')
@@ -58,4 +46,4 @@ plt.ylabel('Power (Watts)')
 plt.title('Average Power vs Time')
 plt.legend()
 plt.grid(True)
-plt.show()
+show_figure("powervstime_average")
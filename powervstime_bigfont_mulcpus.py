@@ -1,29 +1,20 @@
-import re
 import matplotlib.pyplot as plt
 from mpl_toolkits.axes_grid1.inset_locator import inset_axes
-from tabulate import tabulate
+from figure_render import show_figure
+from stats_cache import load_stats_cached
+from stats_follow import follow_if_requested
+from table_export import show_table
 
 # Read the 'stats.txt' file
 file_path = '/home/said/GEM5/ARM/gem5/output/mibench/basicmathlarge-L3_dvfsdisable/stats.txt'
-with open(file_path, 'r') as file:
-    stats_data = file.readlines()
 
-# Extract relevant data
-dynamic_power_data = {}
-time_seconds = []
+# With STATS_FOLLOW set, plot the run live while gem5 is still writing it
+follow_if_requested([file_path], "power_model.dynamicPower", ylabel="Dynamic Power (W)")
 
-for line in stats_data:
-    if line.startswith("simSeconds"):
-        time_seconds.append(float(re.search(r'\d+\.\d+', line).group()))
-    elif "power_model.dynamicPower" in line:
-        cpu_match = re.search(r'system\.cpu_cluster\.cpus(\d+)\.power_model\.dynamicPower', line)
-        if cpu_match:
-            cpu_id = cpu_match.group(1)
-            power = float(re.search(r'(\d+\.\d+)', line).group())
-            if cpu_id not in dynamic_power_data:
-                dynamic_power_data[cpu_id] = []
-                
-            dynamic_power_data[cpu_id].append(power)
+# Extract relevant data in a single pass
+series, cpu_series = load_stats_cached(file_path, cpu_stats=("power_model.dynamicPower",))
+time_seconds = series["simSeconds"]
+dynamic_power_data = cpu_series["power_model.dynamicPower"]
 
 # Ensure all lists have the same length
 min_length = min(len(time_seconds), *[len(powers) for powers in dynamic_power_data.values()])
@@ -31,16 +22,9 @@ time_seconds = time_seconds[:min_length]
 for cpu_id in dynamic_power_data:
     dynamic_power_data[cpu_id] = dynamic_power_data[cpu_id][:min_length]
 
-# Print table of values
-table_data = []
+# Preview the table of values (set STATS_TABLE_DIR to export all of it)
 headers = ["Time (s)"] + [f"CPU {cpu_id} Dynamic Power (W)" for cpu_id in dynamic_power_data]
-for i in range(min_length):
-    row = [f"{time_seconds[i]:.6f}"]
-    for cpu_id in dynamic_power_data:
-        row.append(f"{dynamic_power_data[cpu_id][i]:.6f}")
-    table_data.append(row)
-
-print(tabulate(table_data, headers=headers, tablefmt="grid"))
+show_table("powervstime_bigfont_mulcpus", headers, [time_seconds] + list(dynamic_power_data.values()))
 
 # Plot dynamic power vs time for all CPUs
 fig, ax = plt.subplots(figsize=(10, 6))
@@ -76,4 +60,4 @@ ax_inset.legend(loc='lower center', bbox_to_anchor=(0.19, -2.0), fontsize=11, nc
 
 # Show the plot
 plt.tight_layout()
-plt.show()
+show_figure("powervstime_bigfont_mulcpus")
@@ -1,27 +1,22 @@
-import re
+import sys
+
 import matplotlib.pyplot as plt
+import numpy as np
 from mpl_toolkits.axes_grid1.inset_locator import inset_axes
 from tabulate import tabulate
+from figure_render import render_figures
+from stats_align import align_cpu_series
+from stats_cache import load_stats_cached
+from stats_follow import follow_if_requested
+from stats_energy import energy_metrics
+from stats_online import summarize_stats, summary_only
+from table_export import show_table
 
 # Function to read and extract power data from a 'stats.txt' file
 def extract_dynamic_power_data(file_path):
-    with open(file_path, 'r') as file:
-        stats_data = file.readlines()
-
-    dynamic_power_data = {}
-    time_seconds = []
-
-    for line in stats_data:
-        if line.startswith("simSeconds"):
-            time_seconds.append(float(re.search(r'\d+\.\d+', line).group()))
-        elif "power_model.dynamicPower" in line:
-            cpu_match = re.search(r'system\.cpu_cluster\.cpus(\d+)\.power_model\.dynamicPower', line)
-            if cpu_match:
-                cpu_id = cpu_match.group(1)
-                power = float(re.search(r'(\d+\.\d+)', line).group())
-                if cpu_id not in dynamic_power_data:
-                    dynamic_power_data[cpu_id] = []
-                dynamic_power_data[cpu_id].append(power)
+    series, cpu_series = load_stats_cached(file_path, cpu_stats=("power_model.dynamicPower",))
+    time_seconds = series["simSeconds"]
+    dynamic_power_data = cpu_series["power_model.dynamicPower"]
 
     # Ensure all lists have the same length
     min_length = min(len(time_seconds), *[len(powers) for powers in dynamic_power_data.values()])
@@ -35,44 +30,69 @@ def extract_dynamic_power_data(file_path):
 file_path_dvfs = '/home/said/GEM5/ARM/gem5/output/mibench/networkdijkstralarge_L3_dvfsenable/stats.txt'
 file_path_no_dvfs = '/home/said/GEM5/ARM/gem5/output/mibench/networkdijkstralarge_L3_dvfsdisable/stats.txt'
 
+# With STATS_FOLLOW set, plot both runs live while gem5 is still writing them
+follow_if_requested([file_path_dvfs, file_path_no_dvfs], "power_model.dynamicPower", ylabel="Dynamic Power (W)",
+                    labels=["DVFS", "No DVFS"])
+
+# With STATS_SUMMARY_ONLY set, only print per-core and total dynamic power
+# statistics, streamed from both files in one pass each with constant memory
+# (no series are kept, so the runs are not aligned, integrated or plotted)
+if summary_only():
+    stat = "power_model.dynamicPower"
+    _, per_core_dvfs, totals_dvfs = summarize_stats(file_path_dvfs, cpu_stats=(stat,))
+    _, per_core_no_dvfs, totals_no_dvfs = summarize_stats(file_path_no_dvfs, cpu_stats=(stat,))
+    for label, per_core in (("with", per_core_dvfs[stat]), ("without", per_core_no_dvfs[stat])):
+        print(f"\nDynamic Power (W) {label} DVFS per Core:")
+        print(tabulate(
+            [(core_id, *running.summary().values()) for core_id, running in per_core.items()],
+            headers=["Core", "Samples", "Mean", "Std", "Min", "P50", "P95", "P99", "Max"],
+            tablefmt="grid", floatfmt=".6f"
+        ))
+    print("\nAverage Total Dynamic Power (W) across All Cores:")
+    print(f"With DVFS: {totals_dvfs[stat].mean:.6f} W")
+    print(f"Without DVFS: {totals_no_dvfs[stat].mean:.6f} W")
+    sys.exit()
+
 # Extract data from both files
 time_dvfs, dynamic_power_dvfs = extract_dynamic_power_data(file_path_dvfs)
 time_no_dvfs, dynamic_power_no_dvfs = extract_dynamic_power_data(file_path_no_dvfs)
 
-# Find the common minimum length between time arrays and power data
-min_length = min(len(time_dvfs), len(time_no_dvfs))
-time_dvfs, time_no_dvfs = time_dvfs[:min_length], time_no_dvfs[:min_length]
+# Integrate each whole run over simulated time, per core and in total
+# (before alignment cuts the runs to their overlap)
+def dynamic_energy(time_seconds, dynamic_power_data):
+    metrics = energy_metrics(time_seconds, np.column_stack(list(dynamic_power_data.values())))
+    metrics["energy"] = dict(zip(dynamic_power_data, metrics["energy"]))
+    return metrics
 
-for core_id in dynamic_power_dvfs:
-    dynamic_power_dvfs[core_id] = dynamic_power_dvfs[core_id][:min_length]
-    dynamic_power_no_dvfs[core_id] = dynamic_power_no_dvfs[core_id][:min_length]
+energy_dvfs = dynamic_energy(time_dvfs, dynamic_power_dvfs)
+energy_no_dvfs = dynamic_energy(time_no_dvfs, dynamic_power_no_dvfs)
+
+# Put both runs on a common simulated-time grid instead of truncating to the shorter one
+time_grid, (dynamic_power_dvfs, dynamic_power_no_dvfs) = align_cpu_series(
+    [(time_dvfs, dynamic_power_dvfs), (time_no_dvfs, dynamic_power_no_dvfs)])
+time_dvfs = time_no_dvfs = time_grid
 
 # Calculate average dynamic power for each core
 average_dynamic_power_dvfs = {
-    core_id: sum(powers) / len(powers) for core_id, powers in dynamic_power_dvfs.items()
+    core_id: np.mean(powers) for core_id, powers in dynamic_power_dvfs.items()
 }
 average_dynamic_power_no_dvfs = {
-    core_id: sum(powers) / len(powers) for core_id, powers in dynamic_power_no_dvfs.items()
+    core_id: np.mean(powers) for core_id, powers in dynamic_power_no_dvfs.items()
 }
 
 # Calculate the average total dynamic power across all cores
-total_dynamic_power_dvfs = [
-    sum(powers) for powers in zip(*dynamic_power_dvfs.values())
-]
-total_dynamic_power_no_dvfs = [
-    sum(powers) for powers in zip(*dynamic_power_no_dvfs.values())
-]
-average_total_dynamic_power_dvfs = sum(total_dynamic_power_dvfs) / len(total_dynamic_power_dvfs)
-average_total_dynamic_power_no_dvfs = sum(total_dynamic_power_no_dvfs) / len(total_dynamic_power_no_dvfs)
-
-# Print detailed dynamic power values along with averages
+total_dynamic_power_dvfs = np.sum(list(dynamic_power_dvfs.values()), axis=0)
+total_dynamic_power_no_dvfs = np.sum(list(dynamic_power_no_dvfs.values()), axis=0)
+average_total_dynamic_power_dvfs = np.mean(total_dynamic_power_dvfs)
+average_total_dynamic_power_no_dvfs = np.mean(total_dynamic_power_no_dvfs)
+
+# Preview detailed dynamic power values per core (set STATS_TABLE_DIR to export all of them)
 print("\nDetailed Dynamic Power Values:")
 for core_id in dynamic_power_dvfs:
     print(f"\nCore {core_id}:")
-    print("Time (s) | Dynamic Power with DVFS (W) | Dynamic Power without DVFS (W)")
-    print("-" * 55)
-    for t, p_dvfs, p_no_dvfs in zip(time_dvfs, dynamic_power_dvfs[core_id], dynamic_power_no_dvfs[core_id]):
-        print(f"{t:8.3f} | {p_dvfs:26.6f} | {p_no_dvfs:29.6f}")
+    show_table(f"powervstime_dvfsvsnondvfs_core{core_id}",
+               ["Time (s)", "Dynamic Power with DVFS (W)", "Dynamic Power without DVFS (W)"],
+               [time_dvfs, dynamic_power_dvfs[core_id], dynamic_power_no_dvfs[core_id]])
 
 # Print average dynamic power values in tabular format
 print("\nAverage Dynamic Power (W) with and without DVFS per Core:")
@@ -88,13 +108,25 @@ print("\nAverage Total Dynamic Power (W) across All Cores:")
 print(f"With DVFS: {average_total_dynamic_power_dvfs:.6f} W")
 print(f"Without DVFS: {average_total_dynamic_power_no_dvfs:.6f} W")
 
-# Plot dynamic power for each core separately
-for core_id in dynamic_power_dvfs:
+# Print dynamic energy per core, then the totals with time-weighted average power and EDP
+print("\nDynamic Energy (J) with and without DVFS per Core:")
+print(tabulate(
+    [(core_id, f"{energy_dvfs['energy'][core_id]:.6f}", f"{energy_no_dvfs['energy'].get(core_id, np.nan):.6f}")
+     for core_id in energy_dvfs["energy"]],
+    headers=["Core", "Energy with DVFS (J)", "Energy without DVFS (J)"],
+    tablefmt="grid"
+))
+for label, metrics in (("With DVFS", energy_dvfs), ("Without DVFS", energy_no_dvfs)):
+    print(f"{label}: {metrics['total_energy']:.6f} J over {metrics['runtime']:.6f} s, "
+          f"{metrics['average_power']:.6f} W average, EDP {metrics['edp']:.6f} J*s")
+
+# Plot dynamic power with and without DVFS for one core
+def plot_core_dynamic_power(core_id, time_dvfs, power_dvfs, time_no_dvfs, power_no_dvfs):
     fig, ax = plt.subplots(figsize=(10, 6))
 
     # Plot dynamic power with and without DVFS for the current core
-    ax.plot(time_dvfs, dynamic_power_dvfs[core_id], 'o-', label=f'Core {core_id} with DVFS')
-    ax.plot(time_no_dvfs, dynamic_power_no_dvfs[core_id], 'x--', label=f'Core {core_id} without DVFS')
+    ax.plot(time_dvfs, power_dvfs, 'o-', label=f'Core {core_id} with DVFS')
+    ax.plot(time_no_dvfs, power_no_dvfs, 'x--', label=f'Core {core_id} without DVFS')
 
     ax.set_xlabel('Time (s)', fontsize=16)
     ax.set_ylabel('Dynamic Power (W)', fontsize=16)
@@ -103,15 +135,22 @@ for core_id in dynamic_power_dvfs:
 
     # Create an inset for zoomed-in view
     ax_inset = inset_axes(ax, width="32%", height="32%", loc='upper right')
-    ax_inset.plot(time_dvfs, dynamic_power_dvfs[core_id], 'o-', color='tab:blue')
-    ax_inset.plot(time_no_dvfs, dynamic_power_no_dvfs[core_id], 'x--', color='tab:orange')
+    ax_inset.plot(time_dvfs, power_dvfs, 'o-', color='tab:blue')
+    ax_inset.plot(time_no_dvfs, power_no_dvfs, 'x--', color='tab:orange')
 
     ax_inset.set_xlim(-0.01, 0.25)
-    ax_inset.set_ylim(0, max(dynamic_power_dvfs[core_id]) + 0.05)
+    ax_inset.set_ylim(0, max(power_dvfs) + 0.05)
     ax_inset.set_xlabel('Time (s)', fontsize=11)
     ax_inset.set_ylabel('Dynamic Power (W)', fontsize=11)
     ax_inset.grid(True)
 
     ax.legend(loc='lower right', fontsize=12)
     plt.tight_layout()
-    plt.show()
+    return fig
+
+# Plot dynamic power for each core separately (in parallel when rendering headless)
+render_figures(plot_core_dynamic_power, [
+    (f"powervstime_dvfsvsnondvfs_core{core_id}",
+     (core_id, time_dvfs, dynamic_power_dvfs[core_id], time_no_dvfs, dynamic_power_no_dvfs[core_id]))
+    for core_id in dynamic_power_dvfs
+])
@@ -1,27 +1,17 @@
-import re
 import matplotlib.pyplot as plt
+import numpy as np
 from mpl_toolkits.axes_grid1.inset_locator import inset_axes
-from tabulate import tabulate
+from figure_render import show_figure
+from stats_align import align_cpu_series
+from stats_cache import load_stats_cached
+from stats_follow import follow_if_requested
+from table_export import show_table
 
 # Function to read and extract power data from a 'stats.txt' file
 def extract_dynamic_power_data(file_path):
-    with open(file_path, 'r') as file:
-        stats_data = file.readlines()
-
-    dynamic_power_data = {}
-    time_seconds = []
-
-    for line in stats_data:
-        if line.startswith("simSeconds"):
-            time_seconds.append(float(re.search(r'\d+\.\d+', line).group()))
-        elif "power_model.dynamicPower" in line:
-            cpu_match = re.search(r'system\.cpu_cluster\.cpus(\d+)\.power_model\.dynamicPower', line)
-            if cpu_match:
-                cpu_id = cpu_match.group(1)
-                power = float(re.search(r'(\d+\.\d+)', line).group())
-                if cpu_id not in dynamic_power_data:
-                    dynamic_power_data[cpu_id] = []
-                dynamic_power_data[cpu_id].append(power)
+    series, cpu_series = load_stats_cached(file_path, cpu_stats=("power_model.dynamicPower",))
+    time_seconds = series["simSeconds"]
+    dynamic_power_data = cpu_series["power_model.dynamicPower"]
 
     # Ensure all lists have the same length
     min_length = min(len(time_seconds), *[len(powers) for powers in dynamic_power_data.values()])
@@ -35,32 +25,28 @@ def extract_dynamic_power_data(file_path):
 file_path_dvfs = '/home/said/GEM5/ARM/gem5/output/mibench/networkdijkstralarge3_L3_dvffdisable/stats.txt'
 file_path_no_dvfs = '/home/said/GEM5/ARM/gem5/output/mibench/networkdijkstralarge_L3_dvfsdisable/stats.txt'
 
+# With STATS_FOLLOW set, plot both runs live while gem5 is still writing them
+follow_if_requested([file_path_dvfs, file_path_no_dvfs], "power_model.dynamicPower", ylabel="Dynamic Power (W)",
+                    labels=["DVFS", "No DVFS"])
+
 # Extract data from both files
 time_dvfs, dynamic_power_dvfs = extract_dynamic_power_data(file_path_dvfs)
 time_no_dvfs, dynamic_power_no_dvfs = extract_dynamic_power_data(file_path_no_dvfs)
 
-# Find the common minimum length between time arrays and power data
-min_length = min(len(time_dvfs), len(time_no_dvfs))
-
-# Trim both time and power data to the same minimum length
-time_dvfs = time_dvfs[:min_length]
-time_no_dvfs = time_no_dvfs[:min_length]
+# Put both runs on a common simulated-time grid instead of truncating to the shorter one
+time_grid, (dynamic_power_dvfs, dynamic_power_no_dvfs) = align_cpu_series(
+    [(time_dvfs, dynamic_power_dvfs), (time_no_dvfs, dynamic_power_no_dvfs)])
+time_dvfs = time_no_dvfs = time_grid
 
-for core_id in dynamic_power_dvfs:
-    dynamic_power_dvfs[core_id] = dynamic_power_dvfs[core_id][:min_length]
-    dynamic_power_no_dvfs[core_id] = dynamic_power_no_dvfs[core_id][:min_length]
-
-# Print table of values for comparison
-table_data = []
+# Preview the table of values for comparison, one block of rows per core
+# (set STATS_TABLE_DIR to export all of it)
 headers = ["Time (s)", "Core", "Dynamic Power (W) with DVFS", "Dynamic Power (W) without DVFS"]
-for core_id in dynamic_power_dvfs:
-    for i in range(min_length):
-        row = [f"{time_dvfs[i]:.6f}", f"Core {core_id}", 
-               f"{dynamic_power_dvfs[core_id][i]:.6f}", 
-               f"{dynamic_power_no_dvfs[core_id][i]:.6f}"]
-        table_data.append(row)
-
-print(tabulate(table_data, headers=headers, tablefmt="grid"))
+core_ids = list(dynamic_power_dvfs)
+columns = [np.tile(time_grid, len(core_ids)),
+           np.repeat([f"Core {core_id}" for core_id in core_ids], len(time_grid)),
+           np.concatenate([dynamic_power_dvfs[core_id] for core_id in core_ids] or [[]]),
+           np.concatenate([dynamic_power_no_dvfs[core_id] for core_id in core_ids] or [[]])]
+show_table("powervstime_dvfsvsnondvfs_singlefig", headers, columns)
 
 # Plot dynamic power for cores from both stats.txt files
 fig, ax = plt.subplots(figsize=(10, 6))
@@ -108,4 +94,4 @@ ax.legend(loc='lower right', fontsize=12)
 
 # Show the plot
 plt.tight_layout()
-plt.show()
+show_figure("powervstime_dvfsvsnondvfs_singlefig")
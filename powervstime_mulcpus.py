@@ -1,27 +1,20 @@
-import re
 import matplotlib.pyplot as plt
-from tabulate import tabulate
+import numpy as np
+from figure_render import show_figure
+from stats_cache import load_stats_cached
+from stats_follow import follow_if_requested
+from table_export import show_table
 
 # Read the 'stats.txt' file
 file_path = '/home/said/GEM5/ARM/gem5/output/Splash/DVFS_nonpinning_powermodel_raspberrypi4_barnes_8p_twice_DVFSdenable/stats.txt'
-with open(file_path, 'r') as file:
-    stats_data = file.readlines()
 
-# Extract relevant data
-dynamic_power_data = {}
-time_seconds = []
+# With STATS_FOLLOW set, plot the run live while gem5 is still writing it
+follow_if_requested([file_path], "power_model.dynamicPower", ylabel="Dynamic Power (W)")
 
-for line in stats_data:
-    if line.startswith("simSeconds"):
-        time_seconds.append(float(re.search(r'\d+\.\d+', line).group()))
-    elif "power_model.dynamicPower" in line:
-        cpu_match = re.search(r'system\.cpu_cluster\.cpus(\d+)\.power_model\.dynamicPower', line)
-        if cpu_match:
-            cpu_id = cpu_match.group(1)
-            power = float(re.search(r'(\d+\.\d+)', line).group())
-            if cpu_id not in dynamic_power_data:
-                dynamic_power_data[cpu_id] = []
-            dynamic_power_data[cpu_id].append(power)
+# Extract relevant data in a single pass
+series, cpu_series = load_stats_cached(file_path, cpu_stats=("power_model.dynamicPower",))
+time_seconds = series["simSeconds"]
+dynamic_power_data = cpu_series["power_model.dynamicPower"]
 
 # Ensure all lists have the same length
 min_length = min(len(time_seconds), *[len(powers) for powers in dynamic_power_data.values()])
@@ -30,10 +23,10 @@ for cpu_id in dynamic_power_data:
     dynamic_power_data[cpu_id] = dynamic_power_data[cpu_id][:min_length]
 
 # Calculate total dynamic power for each time step
-total_dynamic_power_per_step = [sum(powers) for powers in zip(*dynamic_power_data.values())]
+total_dynamic_power_per_step = np.sum(list(dynamic_power_data.values()), axis=0)
 
 # Calculate total dynamic power
-total_dynamic_power = sum(total_dynamic_power_per_step)
+total_dynamic_power = np.sum(total_dynamic_power_per_step)
 
 # Calculate average total dynamic power
 average_total_dynamic_power = total_dynamic_power / len(total_dynamic_power_per_step)
@@ -44,16 +37,9 @@ print(f"Total Dynamic Power: {total_dynamic_power:.6f} W")
 # Print average total dynamic power
 print(f"Average Total Dynamic Power: {average_total_dynamic_power:.6f} W")
 
-# Print table of values
-table_data = []
+# Preview the table of values (set STATS_TABLE_DIR to export all of it)
 headers = ["Time (s)"] + [f"CPU {cpu_id} Dynamic Power (W)" for cpu_id in dynamic_power_data]
-for i in range(min_length):
-    row = [f"{time_seconds[i]:.6f}"]
-    for cpu_id in dynamic_power_data:
-        row.append(f"{dynamic_power_data[cpu_id][i]:.6f}")
-    table_data.append(row)
-
-print(tabulate(table_data, headers=headers, tablefmt="grid"))
+show_table("powervstime_mulcpus", headers, [time_seconds] + list(dynamic_power_data.values()))
 
 # Plot dynamic power vs time for all CPUs
 plt.figure(figsize=(10, 6))
@@ -66,4 +52,4 @@ plt.ylabel('Power (Watt)')
 plt.title('Dynamic Power vs Time for All CPUs')
 plt.legend()
 plt.grid(True)
-plt.show()
\ No newline at end of file
+show_figure("powervstime_mulcpus")
\ No newline at end of file
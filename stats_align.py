@@ -0,0 +1,105 @@
+import numpy as np
+
+from stats_profile import profiled
+
+RESAMPLE_METHODS = ("hold", "linear")
+
+
+# Stack the per-core series of one run into a (dumps x cores) array next to its
+# time stamps, cutting everything to the shortest series of the run.
+# Returns (times, values, cpu_ids).
+def stack_cpu_series(time_seconds, per_cpu, cpu_ids=None):
+    cpu_ids = list(per_cpu) if cpu_ids is None else list(cpu_ids)
+    length = min([len(time_seconds)] + [len(per_cpu[cpu_id]) for cpu_id in cpu_ids])
+    times = np.asarray(time_seconds[:length], dtype=np.float64)
+    values = np.empty((length, len(cpu_ids)))
+    for column, cpu_id in enumerate(cpu_ids):
+        values[:, column] = per_cpu[cpu_id][:length]
+    return times, values, cpu_ids
+
+
+# Evaluate one run on `grid` (seconds). `values` is (dumps,) or (dumps x series).
+# "hold" gives every grid point the dump whose interval (previous stamp, stamp]
+# contains it, matching how gem5 reports stats for the period ending at a dump;
+# "linear" interpolates between neighbouring dumps. Points after the last dump
+# (and before the first for "linear") are NaN.
+def resample(times, values, grid, method="hold"):
+    if method not in RESAMPLE_METHODS:
+        raise ValueError(f"Unknown resample method '{method}', expected one of {RESAMPLE_METHODS}")
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    grid = np.asarray(grid, dtype=np.float64)
+    out_shape = grid.shape + values.shape[1:]
+    if len(times) == 0:
+        return np.full(out_shape, np.nan)
+    column = (-1,) + (1,) * (values.ndim - 1)
+
+    if method == "hold":
+        # Tolerate grid points a rounding error past a dump stamp
+        index = np.searchsorted(times, grid - np.abs(grid) * 1e-12, side='left')
+        outside = index >= len(times)
+        out = values[np.minimum(index, len(times) - 1)]
+    else:
+        upper = np.clip(np.searchsorted(times, grid, side='right'), 1, len(times) - 1) if len(times) > 1 \
+            else np.zeros(len(grid), dtype=np.int64)
+        lower = np.maximum(upper - 1, 0)
+        span = times[upper] - times[lower]
+        weight = np.divide(grid - times[lower], span, out=np.zeros(len(grid)), where=span > 0)
+        weight = weight.reshape(column)
+        out = values[lower] * (1 - weight) + values[upper] * weight
+        outside = (grid < times[0]) | (grid > times[-1])
+
+    if np.any(outside):
+        out[outside] = np.nan
+    return out
+
+
+# Build a regular time grid for several runs. span="overlap" covers only the time
+# every run reached, span="union" covers all of them. The default step is the
+# finest median dump period among the runs.
+def time_grid(times_list, step=None, span="overlap"):
+    times_list = [np.asarray(times, dtype=np.float64) for times in times_list]
+    times_list = [times for times in times_list if len(times)]
+    if not times_list:
+        return np.empty(0)
+    if step is None:
+        periods = [np.median(np.diff(times)) for times in times_list if len(times) > 1]
+        step = min(periods) if periods else 1.0
+    firsts = [times[0] for times in times_list]
+    lasts = [times[-1] for times in times_list]
+    if span == "overlap":
+        start, end = max(firsts), min(lasts)
+    elif span == "union":
+        start, end = min(firsts), max(lasts)
+    else:
+        raise ValueError(f"Unknown span '{span}', expected 'overlap' or 'union'")
+    if end < start:
+        return np.empty(0)
+    return start + np.arange(int(np.floor((end - start) / step + 1e-9)) + 1) * step
+
+
+# Put several runs on one common time grid.
+# `runs` is a sequence of (times, values) pairs where values is (dumps x series);
+# runs with fewer series are padded with NaN columns.
+# Returns (grid, aligned) with aligned shaped (runs x grid points x series).
+@profiled("align")
+def align_runs(runs, step=None, span="overlap", method="hold"):
+    runs = [(np.asarray(times, dtype=np.float64), np.asarray(values, dtype=np.float64)) for times, values in runs]
+    runs = [(times, values[:, None] if values.ndim == 1 else values) for times, values in runs]
+    grid = time_grid([times for times, _ in runs], step, span)
+    width = max((values.shape[1] for _, values in runs), default=0)
+    aligned = np.full((len(runs), len(grid), width), np.nan)
+    for run, (times, values) in enumerate(runs):
+        aligned[run, :, :values.shape[1]] = resample(times, values, grid, method)
+    return grid, aligned
+
+
+# Align runs given as (time_seconds, {cpu_id: series}) pairs, the shape the
+# scripts get from load_stats. Only CPUs present in every run are kept.
+# Returns (grid, [{cpu_id: series on the grid} for each run]).
+def align_cpu_series(runs, step=None, span="overlap", method="hold"):
+    cpu_ids = [cpu_id for cpu_id in runs[0][1] if all(cpu_id in per_cpu for _, per_cpu in runs[1:])]
+    stacked = [stack_cpu_series(time_seconds, per_cpu, cpu_ids)[:2] for time_seconds, per_cpu in runs]
+    grid, aligned = align_runs(stacked, step, span, method)
+    return grid, [{cpu_id: aligned[run, :, column] for column, cpu_id in enumerate(cpu_ids)}
+                  for run in range(len(runs))]
@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import matplotlib
+
+matplotlib.use("Agg")  # Benchmarks always render off-screen
+
+import matplotlib.pyplot as plt  # Imported once the backend is chosen
+import numpy as np
+from tabulate import tabulate
+
+from plot_decimate import decimate_figure
+from stats_align import align_cpu_series
+from stats_binning import bin_by_time
+from stats_cache import cache_path_for, load_stats_cached
+from stats_energy import energy_metrics
+from stats_parser import load_stats
+from stats_synth import generate_stats
+from table_export import preview_table, write_csv
+
+# Synthetic inputs per size: arguments for stats_synth.generate_stats
+SIZES = {
+    "small": {"dumps": 200, "cores": 4, "threads": 2, "noise": 20},
+    "medium": {"dumps": 5000, "cores": 8, "threads": 2, "noise": 50},
+    "huge": {"dumps": 10000, "cores": 32, "threads": 2, "noise": 20},
+}
+STAGES = ("parse", "parse_parallel", "cache_cold", "cache_warm", "align", "aggregate", "tabulate", "render")
+
+CPU_STATS = ("ipc", "power_model.dynamicPower", "power_model.staticPower")
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), "stats_bench")
+DEFAULT_RESULTS = "bench_results.jsonl"
+
+
+# Path of the synthetic stats.txt for a size, generated on first use
+def bench_input(size, data_dir=DEFAULT_DATA_DIR):
+    params = SIZES[size]
+    name = "_".join(f"{key}{value}" for key, value in params.items())
+    path = os.path.join(data_dir, f"{size}_{name}", "stats.txt")
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        print(f"Generating {path} ...")
+        generate_stats(path + ".tmp", **params)
+        os.replace(path + ".tmp", path)
+    return path
+
+
+# Best wall-clock time of `repeat` calls of fn(), and its last result
+def time_best(fn, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+# Time every requested stage on one input. Later stages work on the series
+# parsed by the "parse" stage, so they measure only their own work.
+def run_stages(path, stages=STAGES, repeat=3):
+    timings = {}
+    series, cpu_series = load_stats(path, cpu_stats=CPU_STATS, workers=1)
+    times = np.asarray(series["simSeconds"])
+    power = cpu_series["power_model.dynamicPower"]
+
+    def clear_cache():
+        if os.path.exists(cache_path_for(path)):
+            os.remove(cache_path_for(path))
+
+    def cache_cold():
+        clear_cache()
+        return load_stats_cached(path, cpu_stats=CPU_STATS, workers=1)
+
+    def aggregate():
+        values = np.column_stack(list(power.values()))
+        bin_by_time(times, values, 10 * float(np.median(np.diff(times))), ("mean", "max", "energy"))
+        return energy_metrics(times, values)
+
+    def tabulate_stage():
+        columns = [times] + list(power.values())
+        headers = ["Time (s)"] + [f"CPU {cpu_id} Dynamic Power (W)" for cpu_id in power]
+        preview_table(headers, columns)
+        with tempfile.NamedTemporaryFile(suffix=".csv") as file:
+            write_csv(file.name, headers, columns)
+
+    def render():
+        fig, ax = plt.subplots(figsize=(10, 6))
+        for cpu_id, values in power.items():
+            ax.plot(times, values, '-', label=f'CPU {cpu_id}')
+        ax.legend()
+        decimate_figure(fig)
+        with tempfile.NamedTemporaryFile(suffix=".png") as file:
+            fig.savefig(file.name)
+        plt.close(fig)
+
+    work = {
+        "parse": lambda: load_stats(path, cpu_stats=CPU_STATS, workers=1),
+        "parse_parallel": lambda: load_stats(path, cpu_stats=CPU_STATS, workers=os.cpu_count()),
+        "cache_cold": cache_cold,
+        "cache_warm": lambda: load_stats_cached(path, cpu_stats=CPU_STATS, workers=1),
+        "align": lambda: align_cpu_series([(times, power), (times * 1.01, power)]),
+        "aggregate": aggregate,
+        "tabulate": tabulate_stage,
+        "render": render,
+    }
+    for stage in stages:
+        if stage == "cache_warm":
+            load_stats_cached(path, cpu_stats=CPU_STATS, workers=1)
+        timings[stage], _ = time_best(work[stage], repeat)
+    clear_cache()
+    return timings
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+# Latest earlier result for every (size, stage) in a results file
+def load_previous(results_path):
+    previous = {}
+    if os.path.exists(results_path):
+        with open(results_path) as file:
+            for line in file:
+                record = json.loads(line)
+                previous[(record["size"], record["stage"])] = record
+    return previous
+
+
+# Benchmark the given sizes, print a table (with the change against the
+# previous run of each stage) and append the results to results_path
+def run_benchmarks(sizes, stages=STAGES, repeat=3, data_dir=DEFAULT_DATA_DIR, results_path=DEFAULT_RESULTS):
+    previous = load_previous(results_path) if results_path else {}
+    common = {"timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"), "commit": _git_commit(),
+              "python": platform.python_version(), "cpus": os.cpu_count()}
+    records, rows = [], []
+    for size in sizes:
+        path = bench_input(size, data_dir)
+        megabytes = os.path.getsize(path) / (1 << 20)
+        for stage, seconds in run_stages(path, stages, repeat).items():
+            records.append({**common, "size": size, **SIZES[size], "megabytes": round(megabytes, 1),
+                            "stage": stage, "seconds": seconds})
+            before = previous.get((size, stage))
+            change = f"{100 * (seconds / before['seconds'] - 1):+.1f}%" if before else ""
+            rows.append([size, f"{megabytes:.1f}", stage, f"{seconds:.4f}", change])
+
+    print(tabulate(rows, headers=["Size", "MB", "Stage", "Best (s)", "vs previous"], tablefmt="grid"))
+    if results_path:
+        with open(results_path, 'a') as file:
+            for record in records:
+                file.write(json.dumps(record) + "\n")
+        print(f"Appended {len(records)} results to {results_path}")
+    return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time parse, align, aggregate, tabulate and render stages on synthetic stats.txt files")
+    parser.add_argument("sizes", nargs="*", default=["small", "medium"], choices=list(SIZES),
+                        help="input sizes to run (default: small medium)")
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=list(STAGES))
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage; the best time is kept")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="where generated inputs are kept between runs")
+    parser.add_argument("--results", default=DEFAULT_RESULTS, help="JSON-lines file results are appended to ('' to skip)")
+    args = parser.parse_args()
+    run_benchmarks(args.sizes, args.stages, args.repeat, args.data_dir, args.results)
@@ -0,0 +1,80 @@
+import numpy as np
+
+from stats_profile import profiled
+
+AGGREGATIONS = ("mean", "sum", "min", "max", "count", "energy")
+
+
+# Bin number of every sample. A dump stamped t reports the interval that ends at t,
+# so (0, w] is bin 0, (w, 2w] is bin 1 and so on; the relative tolerance keeps
+# values like 0.009 / 0.003 = 3.0000000000000004 from landing one bin too far.
+def time_bin_index(times, bin_width, t_start=0.0):
+    scaled = np.asarray(times, dtype=np.float64) - t_start
+    scaled *= (1 - 1e-12) / bin_width
+    np.ceil(scaled, out=scaled)
+    bin_index = scaled.astype(np.int64)
+    bin_index -= 1
+    return np.maximum(bin_index, 0, out=bin_index)
+
+
+# Aggregate samples into fixed-width bins of simulated time.
+# `times` holds one timestamp per dump (seconds, as simSeconds); `values` is
+# either one series of the same length or a (dumps x series) array, e.g. one
+# column per core. Returns (bin_starts, {aggregation: binned values}) with one
+# row per bin; bins without samples are NaN (0 for count and sum).
+# "energy" sums power x dump interval, taking the first dump to start at t_start.
+@profiled("aggregate")
+def bin_by_time(times, values, bin_width, aggregations=("mean",), t_start=0.0, num_bins=None):
+    unknown = set(aggregations) - set(AGGREGATIONS)
+    if unknown:
+        raise ValueError(f"Unknown aggregation(s) {sorted(unknown)}, expected one of {AGGREGATIONS}")
+
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    length = min(len(times), len(values))
+    times, values = times[:length], values[:length]
+
+    bin_index = time_bin_index(times, bin_width, t_start)
+    intervals = np.diff(times, prepend=t_start)
+    if num_bins is None:
+        num_bins = int(bin_index.max()) + 1 if length else 0
+    keep = bin_index < num_bins
+    if not np.all(keep):
+        values, bin_index, intervals = values[keep], bin_index[keep], intervals[keep]
+
+    # Group samples of the same bin next to each other (a no-op for normal,
+    # time-ordered dumps) and reduce every group with a single reduceat.
+    if np.any(bin_index[1:] < bin_index[:-1]):
+        order = np.argsort(bin_index, kind='stable')
+        values, bin_index, intervals = values[order], bin_index[order], intervals[order]
+    starts = np.flatnonzero(np.r_[True, bin_index[1:] != bin_index[:-1]]) if len(bin_index) \
+        else np.empty(0, dtype=np.int64)
+    occupied = bin_index[starts]
+    column = (-1,) + (1,) * (values.ndim - 1)
+    counts = np.diff(np.r_[starts, len(bin_index)]).reshape(column)
+
+    def reduce(ufunc, samples):
+        return ufunc.reduceat(samples, starts, axis=0) if len(starts) else samples[:0]
+
+    shape = (num_bins,) + values.shape[1:]
+    result = {}
+    sums = None
+    for how in aggregations:
+        empty = 0.0 if how in ("sum", "count", "energy") else np.nan
+        out = np.full(shape, empty)
+        if how == "count":
+            out[occupied] = counts
+        elif how in ("sum", "mean"):
+            if sums is None:
+                sums = reduce(np.add, values)
+            out[occupied] = sums if how == "sum" else sums / counts
+        elif how == "min":
+            out[occupied] = reduce(np.minimum, values)
+        elif how == "max":
+            out[occupied] = reduce(np.maximum, values)
+        else:  # energy
+            out[occupied] = reduce(np.add, values * intervals.reshape(column))
+        result[how] = out
+
+    bin_starts = t_start + np.arange(num_bins) * bin_width
+    return bin_starts, result
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from stats_parser import CPU_PREFIX, load_stats, split_cpu_stat
+from stats_profile import count, profiled
+from stats_select import StatSelector
+
+# Sidecar file layout: MAGIC, little-endian u64 header length, JSON header,
+# zero padding to an 8-byte boundary, then one 8-byte numeric column after another.
+MAGIC = b"STATCACHE2\n"
+CACHE_SUFFIX = ".cache"
+
+# Bytes hashed from the head and the tail of stats.txt to detect content changes
+# without reading the whole file again.
+HASH_SAMPLE_BYTES = 1 << 20
+
+
+def cache_path_for(file_path):
+    return file_path + CACHE_SUFFIX
+
+
+# Identify the current contents of stats.txt by size, mtime and a hash of its
+# first and last HASH_SAMPLE_BYTES.
+def file_fingerprint(file_path):
+    st = os.stat(file_path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as file:
+        digest.update(file.read(HASH_SAMPLE_BYTES))
+        if st.st_size > 2 * HASH_SAMPLE_BYTES:
+            file.seek(st.st_size - HASH_SAMPLE_BYTES)
+            digest.update(file.read(HASH_SAMPLE_BYTES))
+        elif st.st_size > HASH_SAMPLE_BYTES:
+            digest.update(file.read())
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": digest.hexdigest()}
+
+
+# Write named 8-byte numeric columns plus extra JSON header fields to `path`.
+# The file is written under a temporary name and renamed so readers never see a
+# partial file.
+def write_columns(path, header_fields, columns):
+    arrays = [(name, np.asarray(values, dtype=dtype)) for name, values, dtype in columns]
+
+    layout = []
+    offset = 0
+    for name, values in arrays:
+        layout.append({"name": name, "dtype": values.dtype.str, "offset": offset, "length": len(values)})
+        offset += values.nbytes
+
+    header = json.dumps({**header_fields, "columns": layout}).encode()
+    data_start = len(MAGIC) + 8 + len(header)
+    padding = -data_start % 8
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    try:
+        with open(tmp_path, 'wb') as file:
+            file.write(MAGIC)
+            file.write(struct.pack('<Q', len(header)))
+            file.write(header)
+            file.write(b"\0" * padding)
+            for _, values in arrays:
+                file.write(values.tobytes())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+# Memory-map a file written by write_columns and return (header, {column name: array view}).
+# Returns (None, None) when the file is missing or not one this code wrote.
+def read_columns(path):
+    try:
+        with open(path, 'rb') as file:
+            mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None, None
+
+    if mm[:len(MAGIC)] != MAGIC:
+        return None, None
+    (header_length,) = struct.unpack_from('<Q', mm, len(MAGIC))
+    header_start = len(MAGIC) + 8
+    try:
+        header = json.loads(mm[header_start:header_start + header_length])
+    except ValueError:
+        return None, None
+    data_start = header_start + header_length
+    data_start += -data_start % 8
+
+    columns = {}
+    for column in header["columns"]:
+        columns[column["name"]] = np.frombuffer(mm, dtype=np.dtype(column["dtype"]), count=column["length"],
+                                                offset=data_start + column["offset"])
+    return header, columns
+
+
+# Write series and cpu_series (as returned by collect_series) to a columnar cache.
+def write_cache(cache_path, fingerprint, names, cpu_stats, series, cpu_series, patterns=()):
+    columns = []
+    for name, values in series.items():
+        columns.append((name, values, np.float64))
+    for stat, per_cpu in cpu_series.items():
+        for cpu_id, values in per_cpu.items():
+            columns.append((f"{CPU_PREFIX}{cpu_id}.{stat}", values, np.float64))
+
+    header = {"fingerprint": fingerprint, "names": list(names), "cpu_stats": list(cpu_stats),
+              "patterns": list(patterns)}
+    write_columns(cache_path, header, columns)
+
+
+# Split cache columns back into the (series, cpu_series) shape of load_stats.
+def series_from_columns(columns, names, cpu_stats, patterns=()):
+    series = {name: columns[name] for name in names}
+    cpu_series = {stat: {} for stat in cpu_stats}
+    selected = StatSelector(patterns).match if patterns else None
+    for name, values in columns.items():
+        cpu_stat = split_cpu_stat(name)
+        if cpu_stat is not None and cpu_stat[1] in cpu_series:
+            cpu_series[cpu_stat[1]][cpu_stat[0]] = values
+        elif selected is not None and selected(name):
+            if cpu_stat is None:
+                series[name] = values
+            else:
+                cpu_series.setdefault(cpu_stat[1], {})[cpu_stat[0]] = values
+    return series, cpu_series
+
+
+# Same result as stats_parser.load_stats, but served from a memory-mapped cache
+# next to stats.txt when the file has not changed since the cache was written.
+# Series are returned as read-only NumPy arrays backed by the mapping rather than lists.
+@profiled("load")
+def load_stats_cached(file_path, names=("simSeconds",), cpu_stats=(), workers=None, patterns=()):
+    cache_path = cache_path_for(file_path)
+    fingerprint = file_fingerprint(file_path)
+    header, columns = read_columns(cache_path)
+
+    parse_names, parse_cpu_stats, parse_patterns = list(names), list(cpu_stats), list(patterns)
+    if header is not None and header["fingerprint"] == fingerprint:
+        cached_patterns = header.get("patterns", [])
+        if set(names) <= set(header["names"]) and set(cpu_stats) <= set(header["cpu_stats"]) \
+                and set(patterns) <= set(cached_patterns):
+            count(cache_hits=1)
+            return series_from_columns(columns, names, cpu_stats, patterns)
+        # Re-parse once for everything asked for so far, so scripts asking for
+        # different stats keep hitting the same cache.
+        parse_names = list(dict.fromkeys([*header["names"], *names]))
+        parse_cpu_stats = list(dict.fromkeys([*header["cpu_stats"], *cpu_stats]))
+        parse_patterns = list(dict.fromkeys([*cached_patterns, *patterns]))
+
+    count(cache_misses=1)
+    series, cpu_series = load_stats(file_path, parse_names, parse_cpu_stats, workers, parse_patterns)
+    try:
+        write_cache(cache_path, fingerprint, parse_names, parse_cpu_stats, series, cpu_series, parse_patterns)
+    except OSError as e:
+        print(f"Warning: could not write stats cache {cache_path}: {e}")
+        return series_from_columns({**series, **{f"{CPU_PREFIX}{cpu_id}.{stat}": values
+                                                 for stat, per_cpu in cpu_series.items()
+                                                 for cpu_id, values in per_cpu.items()}},
+                                   names, cpu_stats, patterns)
+
+    _, columns = read_columns(cache_path)
+    return series_from_columns(columns, names, cpu_stats, patterns)
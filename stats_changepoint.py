@@ -0,0 +1,126 @@
+import numpy as np
+
+from stats_align import stack_cpu_series
+from stats_profile import profiled
+
+# Dumps on each side of a candidate boundary, and the shift score (difference of
+# the two window means over its standard error) a boundary needs
+DEFAULT_WINDOW = 20
+DEFAULT_THRESHOLD = 8.0
+
+# Fraction of a series' overall standard deviation always counted as window
+# noise, so flat stretches (a core held at one DVFS level) do not turn tiny
+# wiggles into boundaries
+NOISE_FLOOR = 0.05
+
+
+# Sums over [t - window, t) and [t, t + window) of every column, for every t at
+# which both windows fit (t = window .. dumps - window), from one cumulative sum
+def _window_sums(values, window):
+    cumulative = np.concatenate([np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0)])
+    middle = cumulative[window:len(cumulative) - window]
+    return middle - cumulative[:len(middle)], cumulative[2 * window:] - middle
+
+
+# Windowed mean-shift score of every dump boundary of a (dumps x series) array:
+# |mean after - mean before| over the standard error of that difference, with the
+# two windows `window` dumps wide. Row t scores a change between dumps t-1 and t;
+# rows too close to either end score 0. NaN samples are left out of the windows.
+def change_score(values, window=DEFAULT_WINDOW):
+    values = np.asarray(values, dtype=np.float64)
+    values = values[:, None] if values.ndim == 1 else values
+    score = np.zeros(values.shape)
+    if len(values) < 2 * window:
+        return score
+
+    valid = ~np.isnan(values)
+    samples = np.where(valid, values, 0.0)
+    count_before, count_after = _window_sums(valid.astype(np.float64), window)
+    sum_before, sum_after = _window_sums(samples, window)
+    squares_before, squares_after = _window_sums(samples * samples, window)
+    floor = (NOISE_FLOOR * np.nanstd(values, axis=0)) ** 2
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_before, mean_after = sum_before / count_before, sum_after / count_after
+        variance_before = np.maximum(squares_before / count_before - mean_before ** 2, 0.0)
+        variance_after = np.maximum(squares_after / count_after - mean_after ** 2, 0.0)
+        error = np.sqrt(variance_before / count_before + variance_after / count_after + floor / window)
+        shift = np.abs(mean_after - mean_before) / error
+    # Half-empty windows (NaN padding from alignment) and flat series score nothing
+    shift[(count_before < window / 2) | (count_after < window / 2) | ~np.isfinite(shift)] = 0.0
+    score[window:len(values) - window + 1] = shift
+    return score
+
+
+# Maximum over [i - radius, i + radius] of every column, in O(dumps) with block
+# prefix and suffix maxima (van Herk / Gil-Werman) instead of a loop per window
+def running_max(values, radius):
+    width = 2 * radius + 1
+    length = len(values)
+    tail = radius + (-(length + 2 * radius)) % width
+    padded = np.concatenate([np.full((radius,) + values.shape[1:], -np.inf), values,
+                             np.full((tail,) + values.shape[1:], -np.inf)])
+    blocks = padded.reshape((-1, width) + values.shape[1:])
+    prefix = np.maximum.accumulate(blocks, axis=1).reshape(padded.shape)
+    suffix = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(padded.shape)
+    return np.maximum(suffix[:length], prefix[width - 1:width - 1 + length])
+
+
+# Phase and DVFS-transition boundaries of every column of a (dumps x series)
+# array, e.g. one column per core. A boundary is a dump whose change_score
+# reaches threshold and is the highest within `window` dumps either side, so
+# boundaries are at least a window apart. All columns are scored at once.
+# Returns one sorted array of boundary dump indices per column.
+@profiled("changepoints")
+def detect_change_points(values, window=DEFAULT_WINDOW, threshold=DEFAULT_THRESHOLD):
+    score = change_score(values, window)
+    peaks = (score >= threshold) & (score >= running_max(score, window))
+    columns, dumps = np.nonzero(peaks.T)  # Ordered by column, then dump
+    # Equal scores on a plateau keep only their first dump
+    keep = np.ones(len(dumps), dtype=bool)
+    keep[1:] = (columns[1:] != columns[:-1]) | (dumps[1:] - dumps[:-1] > window)
+    dumps, columns = dumps[keep], columns[keep]
+    return np.split(dumps, np.searchsorted(columns, np.arange(1, score.shape[1])))
+
+
+# Segments of one series between its boundaries as (start index, end index
+# (exclusive), mean), with NaN samples left out of the means
+def segment_means(values, boundaries):
+    values = np.asarray(values, dtype=np.float64)
+    starts = np.concatenate([[0], boundaries]).astype(np.int64)
+    ends = np.concatenate([boundaries, [len(values)]]).astype(np.int64)
+    valid = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(valid, values, 0.0), starts)
+    counts = np.add.reduceat(valid.astype(np.int64), starts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return starts, ends, sums / counts
+
+
+# Segments of every core's series: {cpu_id: [(start time, end time, dumps, mean)]},
+# the end time being that of the segment's last dump. Series are cut to the
+# shortest, as by stats_align.stack_cpu_series.
+def phase_segments(times, per_cpu, window=DEFAULT_WINDOW, threshold=DEFAULT_THRESHOLD):
+    times, values, cpu_ids = stack_cpu_series(times, per_cpu)
+    if len(times) == 0:
+        return {cpu_id: [] for cpu_id in cpu_ids}
+    times = times.tolist()
+    segments = {}
+    for column, (cpu_id, boundaries) in enumerate(zip(cpu_ids, detect_change_points(values, window, threshold))):
+        starts, ends, means = segment_means(values[:, column], boundaries)
+        segments[cpu_id] = [(times[start], times[end - 1], end - start, mean)
+                            for start, end, mean in zip(starts.tolist(), ends.tolist(), means.tolist())]
+    return segments
+
+
+# Segments of phase_segments as table columns (one row per segment) for show_table
+def segment_table(segments, unit=""):
+    rows = [(cpu_id, *segment) for cpu_id, per_cpu in segments.items() for segment in per_cpu]
+    headers = ["Series", "Start (s)", "End (s)", "Dumps", f"Mean{f' ({unit})' if unit else ''}"]
+    return headers, [list(column) for column in zip(*rows)] if rows else [[] for _ in headers]
+
+
+# Dotted vertical lines at the segment starts (after the first) of every core
+def annotate_change_points(ax, segments, **line_style):
+    style = {"color": "grey", "linestyle": ":", "linewidth": 1, "alpha": 0.7, **line_style}
+    for boundary_time in sorted({start for per_cpu in segments.values() for start, *_ in per_cpu[1:]}):
+        ax.axvline(boundary_time, **style)
@@ -0,0 +1,387 @@
+import argparse
+import os
+
+import numpy as np
+
+from stats_align import align_cpu_series
+from stats_binning import bin_by_time
+from stats_cache import load_stats_cached
+from stats_changepoint import (DEFAULT_THRESHOLD, DEFAULT_WINDOW, annotate_change_points, phase_segments,
+                               segment_table)
+from stats_energy import DYNAMIC_POWER_STAT, IPC_STAT, STATIC_POWER_STAT, energy_metrics
+from stats_index import load_stats_in_time_range
+from stats_profile import add_profile_argument, enable
+from stats_diff import add_diff_arguments, run_diff
+from stats_sweep import add_sweep_arguments, run_sweep
+
+# One entry point for the analyses of the per-experiment scripts, taking stats
+# paths as arguments. Every subcommand prints its numbers as plain text; the
+# detailed tables (--table) and figures (--plot) are opt-in, and tabulate,
+# matplotlib and the inset helpers are only imported when one is asked for, so
+# numeric-only calls start in a fraction of the time the scripts take.
+#
+#   python stats_cli.py average run1/stats.txt run2/stats.txt
+#   python stats_cli.py power-vs-time run/stats.txt --bin-ms 1 --plot
+#   python stats_cli.py dvfs-compare bench_dvfsenable/stats.txt bench_dvfsdisable/stats.txt
+#   python stats_cli.py dvfs-compare --root /path/to/gem5/output/mibench
+#   python stats_cli.py sweep /path/to/ocean_non_contig --plot
+#   python stats_cli.py phases run/stats.txt --stat power_model.dynamicPower --plot
+#   python stats_cli.py power-fit runs/*/stats.txt --plot
+#   python stats_cli.py diff bench_dvfsenable/stats.txt bench_dvfsdisable/stats.txt --per-dump --top 20
+
+
+# Name of a run for headings and output files: its run directory
+def run_label(stats_path):
+    return os.path.basename(os.path.dirname(os.path.abspath(stats_path))) or stats_path
+
+
+# Plain-text table with right-aligned columns (no tabulate needed)
+def format_rows(headers, rows, floatfmt=".6f"):
+    cells = [[format(value, floatfmt) if isinstance(value, float) else str(value) for value in row] for row in rows]
+    widths = [max([len(header)] + [len(row[column]) for row in cells]) for column, header in enumerate(headers)]
+    return "\n".join("  ".join(cell.rjust(width) for cell, width in zip(row, widths))
+                     for row in [list(headers)] + cells)
+
+
+# (times, {cpu_id: values}) of each requested per-core stat, cut to a common length.
+# With --t-min/--t-max only the dumps in that simulated-time window are read,
+# located through the stats.txt.index sidecar (see stats_index).
+def _load_cpu_stats(stats_path, cpu_stats, args=None):
+    t_min, t_max = (getattr(args, "t_min", None), getattr(args, "t_max", None))
+    if t_min is None and t_max is None:
+        series, cpu_series = load_stats_cached(stats_path, cpu_stats=tuple(cpu_stats))
+    else:
+        series, cpu_series = load_stats_in_time_range(stats_path, t_min, t_max, cpu_stats=tuple(cpu_stats))
+        cpu_series = {stat: cpu_series.get(stat, {}) for stat in cpu_stats}
+    time_seconds = np.asarray(series["simSeconds"])
+    length = min([len(time_seconds)] + [len(values) for stat in cpu_stats for values in cpu_series[stat].values()])
+    return time_seconds[:length], [{cpu_id: np.asarray(values[:length]) for cpu_id, values in cpu_series[stat].items()}
+                                   for stat in cpu_stats]
+
+
+def _show_table(args, name, headers, columns):
+    if args.table:
+        from table_export import show_table
+        show_table(name, headers, columns)
+
+
+# pyplot, imported through figure_render so STATS_FIGURE_DIR picks the backend first
+def _pyplot():
+    from figure_render import plt
+    return plt
+
+
+# Figure plus an inset zoomed on the first quarter second, as the scripts draw them.
+# tight_layout cannot place inset axes (it warns), so these use constrained layout.
+def _figure_with_inset(inset_size):
+    plt = _pyplot()
+    from mpl_toolkits.axes_grid1.inset_locator import inset_axes
+    fig, ax = plt.subplots(figsize=(10, 6), layout="constrained")
+    ax_inset = inset_axes(ax, width=inset_size, height=inset_size, loc='upper right')
+    ax_inset.set_xlim(-0.01, 0.25)
+    return fig, ax, ax_inset
+
+
+def _show(name, fig):
+    from figure_render import show_figure
+    if fig.get_layout_engine() is None:
+        fig.tight_layout()
+    show_figure(name, fig)
+
+
+# IPC over time per core (IPCvstime.py)
+def ipc_vs_time(args):
+    for stats_path in args.stats:
+        label = run_label(stats_path)
+        time_seconds, (ipc_data,) = _load_cpu_stats(stats_path, (IPC_STAT,), args)
+        print(f"\n{label}: {len(time_seconds)} dumps")
+        print(format_rows(["CPU", "Mean IPC", "Min IPC", "Max IPC"],
+                          [(cpu_id, float(np.mean(ipc)), float(np.min(ipc)), float(np.max(ipc)))
+                           for cpu_id, ipc in ipc_data.items()]))
+        _show_table(args, f"IPCvstime_{label}", ["Time (s)"] + [f"CPU {cpu_id} IPC" for cpu_id in ipc_data],
+                    [time_seconds] + list(ipc_data.values()))
+
+        if args.plot:
+            plt = _pyplot()
+            fig, ax, ax_inset = _figure_with_inset("35%")
+            colors = plt.cm.tab10(range(len(ipc_data)))
+            for idx, (cpu_id, ipc_values) in enumerate(ipc_data.items()):
+                ax.plot(time_seconds, ipc_values, 'o-', label=f'CPU {cpu_id} IPC', color=colors[idx])
+                ax_inset.plot(time_seconds, ipc_values, 'o-', label=f'CPU {cpu_id} IPC', color=colors[idx])
+            ax.set_xlabel('Time (s)', fontsize=16)
+            ax.set_ylabel('IPC (Instructions Per Cycle)', fontsize=16)
+            ax.set_title(label, fontsize=18)
+            ax.grid(True)
+            ax_inset.set_ylim(0, max(float(np.max(ipc)) for ipc in ipc_data.values()) + 0.05)
+            ax_inset.set_xlabel('Time (s)', fontsize=10)
+            ax_inset.set_ylabel('IPC', fontsize=10)
+            ax_inset.grid(True)
+            ax_inset.legend(loc='lower center', bbox_to_anchor=(0.45, -0.75), fontsize=13, ncol=2)
+            _show(f"IPCvstime_{label}", fig)
+
+
+# Dynamic power over time per core, with total, average and energy
+# (powervstime_mulcpus.py), or binned average power (powervstime_average.py)
+def power_vs_time(args):
+    for stats_path in args.stats:
+        label = run_label(stats_path)
+        time_seconds, (dynamic_power, static_power) = _load_cpu_stats(stats_path,
+                                                                      (DYNAMIC_POWER_STAT, STATIC_POWER_STAT), args)
+        dynamic = np.column_stack(list(dynamic_power.values()))
+        static = np.column_stack(list(static_power.values())) if static_power else None
+        total_per_step = dynamic.sum(axis=1)
+        metrics = energy_metrics(time_seconds, dynamic, static)
+        print(f"\n{label}: {len(time_seconds)} dumps")
+        print(f"Total Dynamic Power: {np.sum(total_per_step):.6f} W")
+        print(f"Average Total Dynamic Power: {np.mean(total_per_step):.6f} W")
+        print(f"Energy: {metrics['total_energy']:.6f} J over {metrics['runtime']:.6f} s, "
+              f"{metrics['average_power']:.6f} W average, EDP {metrics['edp']:.6f} J*s")
+
+        if args.bin_ms:
+            # Per-dump averages across cores, then averaged in bins of simulated time
+            columns = [dynamic.mean(axis=1)] + ([static.mean(axis=1)] if static is not None else [])
+            bin_starts, binned = bin_by_time(time_seconds, np.column_stack(columns), args.bin_ms / 1000)
+            time_values, averages = bin_starts * 1000, binned["mean"].T
+            _show_table(args, f"powervstime_average_{label}",
+                        ["Time (ms)", "Dynamic Power (W)", "Static Power (W)"][:1 + len(averages)],
+                        [time_values, *averages])
+        else:
+            _show_table(args, f"powervstime_mulcpus_{label}",
+                        ["Time (s)"] + [f"CPU {cpu_id} Dynamic Power (W)" for cpu_id in dynamic_power],
+                        [time_seconds] + list(dynamic_power.values()))
+
+        if args.plot:
+            plt = _pyplot()
+            fig, ax = plt.subplots(figsize=(10, 6))
+            if args.bin_ms:
+                for values, power_label in zip(averages, ('Dynamic Power', 'Static Power')):
+                    ax.plot(time_values, values, label=power_label)
+                ax.set_xlabel('Time (Milliseconds)')
+                ax.set_ylabel('Power (Watts)')
+                ax.set_title(f'Average Power vs Time ({label})')
+            else:
+                for cpu_id, power_values in dynamic_power.items():
+                    ax.plot(time_seconds, power_values, '-', label=f'CPU {cpu_id} Dynamic Power')
+                ax.set_xlabel('Time (s)')
+                ax.set_ylabel('Power (Watt)')
+                ax.set_title(f'Dynamic Power vs Time for All CPUs ({label})')
+            ax.legend()
+            ax.grid(True)
+            _show(f"powervstime_{'average' if args.bin_ms else 'mulcpus'}_{label}", fig)
+
+
+# Dynamic power against IPC per core (IPCvspower_dynamic.py)
+def ipc_vs_power(args):
+    for stats_path in args.stats:
+        label = run_label(stats_path)
+        time_seconds, (dynamic_power, ipc_data) = _load_cpu_stats(stats_path, (DYNAMIC_POWER_STAT, IPC_STAT), args)
+        rows = []
+        for cpu_id, power in dynamic_power.items():
+            ipc = ipc_data.get(cpu_id)
+            correlation = float(np.corrcoef(ipc, power)[0, 1]) if ipc is not None and len(ipc) > 1 else np.nan
+            rows.append((cpu_id, float(np.mean(ipc)) if ipc is not None else np.nan, float(np.mean(power)),
+                         correlation))
+        print(f"\n{label}: {len(time_seconds)} dumps")
+        print(format_rows(["CPU", "Mean IPC", "Mean Dynamic Power (W)", "Correlation"], rows))
+        _show_table(args, f"IPCvspower_dynamic_{label}",
+                    ["Time (s)"] + [f"CPU {cpu_id} Power (W)" for cpu_id in dynamic_power]
+                    + [f"CPU {cpu_id} IPC" for cpu_id in ipc_data],
+                    [time_seconds] + list(dynamic_power.values()) + list(ipc_data.values()))
+
+        if args.plot:
+            plt = _pyplot()
+            fig, ax = plt.subplots(figsize=(10, 6))
+            colors = plt.cm.tab10(range(len(dynamic_power)))
+            for idx, cpu_id in enumerate(dynamic_power):
+                if cpu_id in ipc_data:
+                    ax.plot(ipc_data[cpu_id], dynamic_power[cpu_id], 'o-', label=f'CPU {cpu_id}', color=colors[idx])
+            ax.set_xlabel('IPC (Instructions Per Cycle)', fontsize=16)
+            ax.set_ylabel('Dynamic Power (W)', fontsize=16)
+            ax.set_title(f'Power vs IPC for Each CPU ({label})', fontsize=18)
+            ax.grid(True)
+            ax.legend(fontsize=12, title="CPU Cores")
+            _show(f"IPCvspower_dynamic_{label}", fig)
+
+
+# One DVFS-enabled run against one DVFS-disabled run (powervstime_dvfsvsnondvfs_mulfig.py),
+# or every pair under an output tree (dvfs_batch_compare.py)
+def dvfs_compare(args):
+    if args.root:
+        from dvfs_batch_compare import HEADERS, compare_all
+        rows = compare_all(args.root, args.workers)
+        if args.table:
+            from tabulate import tabulate
+            print(tabulate(rows, headers=HEADERS, tablefmt="grid", floatfmt=".6f"))
+        else:
+            print(format_rows(HEADERS, rows))
+        return
+    if len(args.stats) != 2:
+        raise SystemExit("dvfs-compare needs two stats files (DVFS enabled, DVFS disabled) or --root")
+
+    runs = [_load_cpu_stats(stats_path, (DYNAMIC_POWER_STAT,), args) for stats_path in args.stats]
+    runs = [(time_seconds, dynamic_power) for time_seconds, (dynamic_power,) in runs]
+    # Integrate each whole run before alignment cuts the runs to their overlap
+    energy = [energy_metrics(time_seconds, np.column_stack(list(dynamic_power.values())))
+              for time_seconds, dynamic_power in runs]
+    time_grid, (power_dvfs, power_no_dvfs) = align_cpu_series(runs)
+
+    print("\nAverage Dynamic Power (W) and Dynamic Energy (J) with and without DVFS per Core:")
+    energy_dvfs, energy_no_dvfs = (dict(zip(dynamic_power, metrics["energy"]))
+                                   for (_, dynamic_power), metrics in zip(runs, energy))
+    print(format_rows(["Core", "Power with DVFS", "Power without DVFS", "Energy with DVFS", "Energy without DVFS"],
+                      [(core_id, float(np.mean(power_dvfs[core_id])), float(np.mean(power_no_dvfs[core_id])),
+                        float(energy_dvfs[core_id]), float(energy_no_dvfs.get(core_id, np.nan)))
+                       for core_id in power_dvfs]))
+    print("\nAverage Total Dynamic Power (W) across All Cores:")
+    for label, power in (("With DVFS", power_dvfs), ("Without DVFS", power_no_dvfs)):
+        print(f"{label}: {np.mean(np.sum(list(power.values()), axis=0)):.6f} W")
+    for label, metrics in zip(("With DVFS", "Without DVFS"), energy):
+        print(f"{label}: {metrics['total_energy']:.6f} J over {metrics['runtime']:.6f} s, "
+              f"{metrics['average_power']:.6f} W average, EDP {metrics['edp']:.6f} J*s")
+
+    for core_id in power_dvfs:
+        _show_table(args, f"powervstime_dvfsvsnondvfs_core{core_id}",
+                    ["Time (s)", "Dynamic Power with DVFS (W)", "Dynamic Power without DVFS (W)"],
+                    [time_grid, power_dvfs[core_id], power_no_dvfs[core_id]])
+        if args.plot:
+            fig, ax, ax_inset = _figure_with_inset("32%")
+            for axes in (ax, ax_inset):
+                axes.plot(time_grid, power_dvfs[core_id], 'o-', color='tab:blue', label=f'Core {core_id} with DVFS')
+                axes.plot(time_grid, power_no_dvfs[core_id], 'x--', color='tab:orange',
+                          label=f'Core {core_id} without DVFS')
+                axes.grid(True)
+            ax.set_xlabel('Time (s)', fontsize=16)
+            ax.set_ylabel('Dynamic Power (W)', fontsize=16)
+            ax.set_title(f'Dynamic Power for Core {core_id}', fontsize=18)
+            ax_inset.set_ylim(0, float(np.nanmax(power_dvfs[core_id])) + 0.05)
+            ax.legend(loc='lower right', fontsize=12)
+            _show(f"powervstime_dvfsvsnondvfs_core{core_id}", fig)
+
+
+# Per-core averages of dynamic and static power and IPC, streamed in one pass
+# with constant memory (see stats_online); never draws or tabulates
+def average(args):
+    from stats_online import summarize_stats
+    cpu_stats = (DYNAMIC_POWER_STAT, STATIC_POWER_STAT, IPC_STAT)
+    for stats_path in args.stats:
+        _, per_core, totals = summarize_stats(stats_path, cpu_stats=cpu_stats)
+        cpu_ids = list(per_core[DYNAMIC_POWER_STAT] or per_core[IPC_STAT])
+        print(f"\n{run_label(stats_path)}:")
+        headers = ["CPU", "Dynamic Power (W)", "Static Power (W)", "IPC"]
+        if args.quantiles:
+            headers += ["Dynamic P50", "Dynamic P95", "Dynamic P99"]
+        rows = []
+        for cpu_id in cpu_ids:
+            means = [per_core[stat][cpu_id].mean if cpu_id in per_core[stat] else np.nan for stat in cpu_stats]
+            row = [cpu_id, *means]
+            if args.quantiles:
+                dynamic = per_core[DYNAMIC_POWER_STAT].get(cpu_id)
+                row += [dynamic.quantile(q) if dynamic is not None else np.nan for q in (0.50, 0.95, 0.99)]
+            rows.append(row)
+        print(format_rows(headers, rows))
+        print(f"Average Total Dynamic Power: {totals[DYNAMIC_POWER_STAT].mean:.6f} W")
+        print(f"Average Total Static Power: {totals[STATIC_POWER_STAT].mean:.6f} W")
+
+
+# Phase and DVFS-transition boundaries of one per-core stat (see stats_changepoint)
+def phases(args):
+    for stats_path in args.stats:
+        label = run_label(stats_path)
+        time_seconds, (per_cpu,) = _load_cpu_stats(stats_path, (args.stat,), args)
+        segments = phase_segments(time_seconds, per_cpu, args.window, args.threshold)
+        print(f"\n{label}: {len(time_seconds)} dumps, "
+              + ", ".join(f"CPU {cpu_id}: {len(per_segment)} segments" for cpu_id, per_segment in segments.items()))
+        headers, columns = segment_table(segments)
+        print(format_rows(headers, list(zip(*columns))))
+        _show_table(args, f"phases_{label}", headers, columns)
+
+        if args.plot:
+            plt = _pyplot()
+            fig, ax = plt.subplots(figsize=(10, 6))
+            for cpu_id, values in per_cpu.items():
+                ax.plot(time_seconds, values, '-', label=f'CPU {cpu_id}')
+            annotate_change_points(ax, segments)
+            ax.set_xlabel('Time (s)')
+            ax.set_ylabel(args.stat)
+            ax.set_title(f'{args.stat} phases ({label})')
+            ax.legend()
+            ax.grid(True)
+            _show(f"phases_{label}", fig)
+
+
+# Least-squares fit of dynamic power against IPC per core and pooled, over one
+# or many runs, drawn as a density plot (see stats_regression)
+def power_fit(args):
+    from stats_regression import FIT_HEADERS, density_grid, fit_runs, fit_table, plot_density
+    runs, per_core, pooled, bounds = fit_runs(args.stats)
+    rows = fit_table(runs, per_core, pooled, run_label)
+    print(format_rows(FIT_HEADERS, rows))
+    _show_table(args, "power_fit", FIT_HEADERS, [list(column) for column in zip(*rows)])
+
+    if args.plot:
+        title = 'Dynamic Power vs IPC' + (f' ({run_label(args.stats[0])})' if len(args.stats) == 1 else '')
+        _show("power_fit", plot_density(*density_grid(args.stats, bounds, args.bins), per_core, pooled, title))
+
+
+COMMANDS = {
+    "ipc-vs-time": (ipc_vs_time, "IPC over time per core"),
+    "power-vs-time": (power_vs_time, "dynamic power over time per core, or binned average power"),
+    "ipc-vs-power": (ipc_vs_power, "dynamic power against IPC per core"),
+    "dvfs-compare": (dvfs_compare, "DVFS-enabled against DVFS-disabled runs"),
+    "average": (average, "per-core average power and IPC in one streaming pass"),
+    "phases": (phases, "phase and DVFS-transition boundaries of a per-core stat"),
+    "power-fit": (power_fit, "least-squares fit of dynamic power against IPC, per core and pooled"),
+}
+
+# Subcommands that read per-core series and so can be limited to a time window
+TIME_WINDOW_COMMANDS = ("ipc-vs-time", "power-vs-time", "ipc-vs-power", "dvfs-compare", "phases")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Analyze gem5 stats.txt files")
+    add_profile_argument(parser)
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, (function, help_text) in COMMANDS.items():
+        command = commands.add_parser(name, help=help_text)
+        command.set_defaults(run=function)
+        command.add_argument("stats", nargs="*" if name == "dvfs-compare" else "+",
+                             help="stats.txt files (plain or compressed)")
+        if name != "average":
+            command.add_argument("--table", action="store_true",
+                                 help="preview the detailed table (and export it when STATS_TABLE_DIR is set)")
+            command.add_argument("--plot", action="store_true",
+                                 help="draw the figure (saved under STATS_FIGURE_DIR when set)")
+        if name in TIME_WINDOW_COMMANDS:
+            command.add_argument("--t-min", type=float, help="only dumps with simSeconds >= this (read via the index)")
+            command.add_argument("--t-max", type=float, help="only dumps with simSeconds <= this (read via the index)")
+    commands.choices["power-vs-time"].add_argument("--bin-ms", type=float,
+                                                   help="average power across cores in bins of this many ms")
+    commands.choices["dvfs-compare"].add_argument("--root", help="compare every *_dvfsenable/*_dvfsdisable pair "
+                                                                 "under this gem5 output tree")
+    commands.choices["dvfs-compare"].add_argument("--workers", type=int, default=None,
+                                                  help="worker processes for --root (default: all cores)")
+    commands.choices["average"].add_argument("--quantiles", action="store_true",
+                                             help="also print p50/p95/p99 of dynamic power")
+    commands.choices["phases"].add_argument("--stat", default=IPC_STAT,
+                                            help=f"per-core stat to segment (default: {IPC_STAT})")
+    commands.choices["phases"].add_argument("--window", type=int, default=DEFAULT_WINDOW,
+                                            help=f"dumps on each side of a boundary (default: {DEFAULT_WINDOW})")
+    commands.choices["power-fit"].add_argument("--bins", type=int, default=200,
+                                               help="density plot cells per axis (default: 200)")
+    commands.choices["phases"].add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                            help=f"mean-shift score a boundary needs (default: {DEFAULT_THRESHOLD})")
+    sweep = commands.add_parser("sweep", help="power, runtime, IPC and energy per operating point of a "
+                                              "<freq>MHz<volt> sweep, with its Pareto frontier")
+    sweep.set_defaults(run=run_sweep)
+    add_sweep_arguments(sweep)
+    diff = commands.add_parser("diff", help="rank the stats that changed most between two runs")
+    diff.set_defaults(run=run_diff)
+    add_diff_arguments(diff)
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    if args.profile:
+        enable()
+    args.run(args)
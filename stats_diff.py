@@ -0,0 +1,322 @@
+import argparse
+import mmap
+import multiprocessing
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from stats_index import load_index
+from stats_io import compression_of, iter_chunks
+from stats_parser import BEGIN_MARKER, END_MARKER, PARALLEL_MIN_BYTES, dump_aligned_blocks
+from stats_profile import add_profile_argument, enable, stage
+from stats_select import StatSelector
+
+# Rows printed by default, and the ways rows can be ranked
+DEFAULT_TOP = 40
+SORT_KEYS = ("abs", "rel")
+
+# Dumps summed into each partial RunDiff of diff_per_dump. Partials always cover
+# the same dumps and are merged in dump order, so the floating-point sums (and
+# the output) do not depend on how many workers computed them.
+DUMPS_PER_PARTIAL = 64
+
+FINAL_HEADERS = ["Stat", "Run A", "Run B", "Delta", "Relative"]
+PER_DUMP_HEADERS = ["Stat", "Mean A", "Mean B", "Delta", "Relative", "Max |Delta|", "At Dump"]
+
+
+# Names and values of the scalar stats in one dump's bytes, by the rule of
+# stats_parser.parse_dumps (a name followed by a number), but returned as a list
+# of names and one float64 array instead of a dict: a dump of a big system holds
+# tens of thousands of stats, and the values convert in a single NumPy call.
+def dump_values(block):
+    names, values = [], []
+    for line in block.splitlines():
+        parts = line.split(None, 2)
+        if len(parts) > 1 and not line.startswith(b'-'):
+            names.append(parts[0])
+            values.append(parts[1])
+    try:
+        return names, np.array(values, dtype=bytes).astype(np.float64)
+    except ValueError:
+        # Distribution headers and other non-scalar lines: drop them one by one
+        parsed = []
+        for name, value in zip(names, values):
+            try:
+                parsed.append((name, float(value)))
+            except ValueError:
+                continue
+        return [name for name, _ in parsed], np.array([value for _, value in parsed], dtype=np.float64)
+
+
+# Split bytes holding whole dumps into the bytes of each complete dump
+def _split_dumps(data):
+    begin, end = BEGIN_MARKER.encode(), END_MARKER.encode()
+    pos = data.find(begin)
+    while pos != -1:
+        end_pos = data.find(end, pos)
+        if end_pos == -1:
+            return  # Dump still being written
+        yield data[pos:end_pos]
+        pos = data.find(begin, end_pos)
+
+
+# Yield the bytes of every complete dump of a plain or compressed stats.txt
+def iter_dump_blocks(file_path):
+    if compression_of(file_path) is not None:
+        for block in dump_aligned_blocks(iter_chunks(file_path)):
+            yield from _split_dumps(block)
+        return
+    index = load_index(file_path)
+    with open(file_path, 'rb') as file:
+        if len(index["offset"]) == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for offset, length in zip(index["offset"].tolist(), index["length"].tolist()):
+                yield mm[offset:offset + length]
+
+
+# Bytes of the last complete dump of a stats.txt (b"" if it has none). Plain
+# files are searched backwards from their end, so only the last dump is read;
+# compressed files have to be decompressed in full.
+def last_dump_block(file_path):
+    if compression_of(file_path) is not None:
+        last = b""
+        for block in dump_aligned_blocks(iter_chunks(file_path)):
+            for dump in _split_dumps(block):
+                last = dump
+        return last
+    begin, end = BEGIN_MARKER.encode(), END_MARKER.encode()
+    with open(file_path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return b""
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = mm.rfind(begin)
+            while pos != -1:
+                end_pos = mm.find(end, pos)
+                if end_pos != -1:
+                    return mm[pos:end_pos]
+                pos = mm.rfind(begin, 0, pos)  # Last dump still being written
+    return b""
+
+
+# Every stat of two runs on one set of columns (the union of their names), with
+# per-stat sums and counts over the dumps each run reported it in, the values of
+# their last dump and the largest |B - A| between dumps of the same number.
+# gem5 writes the same stats in the same order in every dump, so a dump whose
+# names equal those of the previous dump of its run reuses its columns: one list
+# comparison per dump instead of a dict lookup per stat.
+class RunDiff:
+    def __init__(self):
+        self.names = []
+        self.columns = {}
+        self.layouts = [None, None]
+        self.dumps = 0
+        self.count = np.zeros((2, 0), dtype=np.int64)
+        self.total = np.zeros((2, 0))
+        self.last = np.zeros((2, 0))
+        self.max_delta = np.zeros(0)
+        self.max_dump = np.zeros(0, dtype=np.int64)
+
+    def _columns_of(self, names):
+        columns = self.columns
+        for name in names:
+            if name not in columns:
+                columns[name] = len(self.names)
+                self.names.append(name)
+        grow = len(self.names) - len(self.max_delta)
+        if grow:
+            self.count = np.pad(self.count, ((0, 0), (0, grow)))
+            self.total = np.pad(self.total, ((0, 0), (0, grow)))
+            self.last = np.pad(self.last, ((0, 0), (0, grow)), constant_values=np.nan)
+            self.max_delta = np.pad(self.max_delta, (0, grow))
+            self.max_dump = np.pad(self.max_dump, (0, grow), constant_values=-1)
+        return np.fromiter((columns[name] for name in names), dtype=np.int64, count=len(names))
+
+    # Columns of the names of one dump of a run (0 = A, 1 = B)
+    def _layout(self, run, names):
+        layout = self.layouts[run]
+        if layout is None or layout[0] != names:
+            layout = self.layouts[run] = (names, self._columns_of(names))
+        return layout[1]
+
+    # Fold in dump number `dump` of both runs, each given as the bytes of that dump
+    def add(self, dump, block_a, block_b):
+        dumps = [dump_values(block_a), dump_values(block_b)]
+        columns = [self._layout(run, names) for run, (names, _) in enumerate(dumps)]
+        rows = np.full((2, len(self.names)), np.nan)
+        for run, (_, values) in enumerate(dumps):
+            rows[run, columns[run]] = values
+        present = ~np.isnan(rows)
+        self.count += present
+        self.total += np.where(present, rows, 0.0)
+        self.last = np.where(present, rows, self.last)
+        delta = np.abs(rows[1] - rows[0])
+        larger = delta > self.max_delta  # False where either run lacks the stat
+        self.max_delta[larger] = delta[larger]
+        self.max_dump[larger] = dump
+        self.dumps += 1
+        return self
+
+    # Fold in the RunDiff of later dumps of the same two runs
+    def merge(self, other):
+        columns = self._columns_of(other.names)
+        self.count[:, columns] += other.count
+        self.total[:, columns] += other.total
+        self.last[:, columns] = np.where(other.count > 0, other.last, self.last[:, columns])
+        larger = other.max_delta > self.max_delta[columns]
+        self.max_delta[columns[larger]] = other.max_delta[larger]
+        self.max_dump[columns[larger]] = other.max_dump[larger]
+        self.dumps += other.dumps
+        return self
+
+    # Per-stat mean of each run over the dumps that reported it (NaN if none)
+    def means(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.count > 0, self.total / self.count, np.nan)
+
+
+# Diff the dumps [start, end) of two indexed plain files (parallel worker)
+def _diff_range(path_a, path_b, ranges_a, ranges_b, first_dump):
+    diff = RunDiff()
+    with open(path_a, 'rb') as file_a, open(path_b, 'rb') as file_b:
+        with mmap.mmap(file_a.fileno(), 0, access=mmap.ACCESS_READ) as mm_a, \
+                mmap.mmap(file_b.fileno(), 0, access=mmap.ACCESS_READ) as mm_b:
+            for dump, ((offset_a, length_a), (offset_b, length_b)) in enumerate(zip(ranges_a, ranges_b), first_dump):
+                diff.add(dump, mm_a[offset_a:offset_a + length_a], mm_b[offset_b:offset_b + length_b])
+    return diff
+
+
+def _diff_range_args(args):
+    return _diff_range(*args)
+
+
+# Diff two runs dump by dump, pairing dumps by number up to the shorter run.
+# Dumps are summed DUMPS_PER_PARTIAL at a time and the partials merged in order.
+# Plain files have their partials diffed in forked worker processes
+# (workers=None uses every core once the files reach PARALLEL_MIN_BYTES
+# together); compressed files are streamed side by side.
+def diff_per_dump(path_a, path_b, workers=None):
+    diff = RunDiff()
+    if compression_of(path_a) is not None or compression_of(path_b) is not None:
+        part = RunDiff()
+        for dump, (block_a, block_b) in enumerate(zip(iter_dump_blocks(path_a), iter_dump_blocks(path_b))):
+            part.add(dump, block_a, block_b)
+            if part.dumps == DUMPS_PER_PARTIAL:
+                diff.merge(part)
+                part = RunDiff()
+        return diff.merge(part) if part.dumps else diff
+
+    if workers is None:
+        big = os.path.getsize(path_a) + os.path.getsize(path_b) >= PARALLEL_MIN_BYTES
+        workers = os.cpu_count() if big else 1
+    index_a, index_b = load_index(path_a), load_index(path_b)
+    dumps = min(len(index_a["offset"]), len(index_b["offset"]))
+    ranges_a, ranges_b = (list(zip(index["offset"][:dumps].tolist(), index["length"][:dumps].tolist()))
+                          for index in (index_a, index_b))
+    tasks = [(path_a, path_b, ranges_a[start:start + DUMPS_PER_PARTIAL], ranges_b[start:start + DUMPS_PER_PARTIAL],
+              start) for start in range(0, dumps, DUMPS_PER_PARTIAL)]
+    if workers > 1 and len(tasks) > 1 and "fork" in multiprocessing.get_all_start_methods():
+        with multiprocessing.get_context("fork").Pool(min(workers, len(tasks))) as pool:
+            for part in pool.imap(_diff_range_args, tasks):
+                diff.merge(part)
+    else:
+        for task in tasks:
+            diff.merge(_diff_range(*task))
+    return diff
+
+
+# Diff the last complete dump of two runs (read concurrently, which overlaps
+# their decompression when the files are compressed)
+def diff_final(path_a, path_b):
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        block_a, block_b = executor.map(last_dump_block, (path_a, path_b))
+    return RunDiff().add(0, block_a, block_b)
+
+
+# Rank the stats of a RunDiff by absolute or relative change of their means
+# (the final values for diff_final). Relative change is against |A|, infinite
+# when A is 0 and B is not. `patterns` (see stats_select) restrict the stats.
+# Returns (names, means (2 x stats), delta, relative, order) where order lists
+# the stats present in both runs and changed, largest change first.
+def rank_stats(diff, sort="abs", patterns=()):
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Unknown sort key '{sort}', expected one of {SORT_KEYS}")
+    names = [name.decode(errors='replace') for name in diff.names]
+    means = diff.means()
+    delta = means[1] - means[0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        relative = np.where(delta == 0, 0.0, delta / np.abs(means[0]))
+    key = np.abs(delta if sort == "abs" else relative)
+    ranked = ~np.isnan(key) & (delta != 0)
+    if patterns:
+        selector = StatSelector(patterns)
+        ranked &= np.fromiter((selector.match(name) for name in names), dtype=bool, count=len(names))
+    candidates = np.flatnonzero(ranked)
+    order = candidates[np.argsort(-key[candidates], kind='stable')]
+    return names, means, delta, relative, order
+
+
+# Table rows (FINAL_HEADERS or PER_DUMP_HEADERS) for the top stats of rank_stats
+def diff_rows(diff, ranking, top=None, per_dump=False):
+    names, means, delta, relative, order = ranking
+    order = order[:top] if top else order
+    rows = [[names[column], means[0, column], means[1, column], delta[column], relative[column]]
+            for column in order.tolist()]
+    if per_dump:
+        for row, column in zip(rows, order.tolist()):
+            row += [float(diff.max_delta[column]), int(diff.max_dump[column])]
+    return rows
+
+
+def add_diff_arguments(parser):
+    parser.add_argument("stats_a", help="stats.txt of run A (plain or compressed)")
+    parser.add_argument("stats_b", help="stats.txt of run B (plain or compressed)")
+    parser.add_argument("--per-dump", action="store_true",
+                        help="compare every dump (paired by number) instead of only the last one")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help=f"rows to print (default: {DEFAULT_TOP})")
+    parser.add_argument("--sort", choices=SORT_KEYS, default="abs", help="rank by absolute or relative change")
+    parser.add_argument("--match", action="append", default=[],
+                        help="only stats matching this pattern, e.g. 'system.**.dcache.*' (repeatable)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes for --per-dump on plain files (default: all cores for big files)")
+    parser.add_argument("--csv", help="also write every changed stat to this CSV file")
+
+
+def run_diff(args):
+    with stage("diff") as profile:
+        if args.per_dump:
+            diff = diff_per_dump(args.stats_a, args.stats_b, args.workers)
+        else:
+            diff = diff_final(args.stats_a, args.stats_b)
+        ranking = rank_stats(diff, args.sort, tuple(args.match))
+        profile.add(dumps=diff.dumps, stats=len(diff.names))
+    counts = diff.count > 0
+    empty = [path for path, present in zip((args.stats_a, args.stats_b), counts) if not present.any()]
+    if empty:
+        print(f"Error: no complete dumps to compare in {', '.join(empty)}")
+        return
+
+    names, _, _, _, order = ranking
+    print(f"{len(names)} stats over {diff.dumps} dump(s): {int(counts[0].sum())} in A, {int(counts[1].sum())} in B, "
+          f"{int((counts[0] & ~counts[1]).sum())} only in A, {int((counts[1] & ~counts[0]).sum())} only in B, "
+          f"{len(order)} changed" + (f" (matching {', '.join(args.match)})" if args.match else ""))
+    headers = PER_DUMP_HEADERS if args.per_dump else FINAL_HEADERS
+    from tabulate import tabulate
+    print(tabulate(diff_rows(diff, ranking, args.top, args.per_dump), headers=headers, tablefmt="grid",
+                   floatfmt=".6g"))
+    if args.csv:
+        from table_export import write_csv
+        write_csv(args.csv, headers, [list(column) for column in zip(*diff_rows(diff, ranking, None, args.per_dump))]
+                  or [[] for _ in headers])
+        print(f"Saved {args.csv}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank the stats that changed most between two gem5 runs")
+    add_diff_arguments(parser)
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    if args.profile:
+        enable()
+    run_diff(args)
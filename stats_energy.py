@@ -0,0 +1,132 @@
+import numpy as np
+
+from stats_profile import profiled
+
+INTEGRATION_METHODS = ("trapezoid", "hold")
+
+# Per-core stats behind run_metrics
+DYNAMIC_POWER_STAT = "power_model.dynamicPower"
+STATIC_POWER_STAT = "power_model.staticPower"
+IPC_STAT = "ipc"
+CYCLES_STAT = "numCycles"
+
+
+def _along(ndim, axis, index):
+    where = [slice(None)] * ndim
+    where[axis] = index
+    return tuple(where)
+
+
+# Integrate power (W) over simulated time (s) into energy (J).
+# `times` is (dumps,) or (runs x dumps), with NaN after the last dump of shorter
+# runs; `power` has the same shape, optionally with a trailing cores axis.
+# "trapezoid" averages neighbouring samples, "hold" takes each dump's value over
+# the interval (previous stamp, stamp] it reports, like stats_binning's energy.
+# With t_start, the first dump's power also covers (t_start, first stamp].
+# Returns the energy with the dumps axis removed.
+def integrate_power(times, power, t_start=0.0, method="trapezoid"):
+    if method not in INTEGRATION_METHODS:
+        raise ValueError(f"Unknown integration method '{method}', expected one of {INTEGRATION_METHODS}")
+    times = np.asarray(times, dtype=np.float64)
+    power = np.asarray(power, dtype=np.float64)
+    axis = times.ndim - 1
+    times = times.reshape(times.shape + (1,) * (power.ndim - times.ndim))
+
+    if t_start is not None:
+        times = np.concatenate([np.full_like(times[_along(times.ndim, axis, slice(0, 1))], t_start), times],
+                               axis=axis)
+        power = np.concatenate([power[_along(power.ndim, axis, slice(0, 1))], power], axis=axis)
+    intervals = np.diff(times, axis=axis)
+    later = power[_along(power.ndim, axis, slice(1, None))]
+    if method == "trapezoid":
+        samples = (later + power[_along(power.ndim, axis, slice(None, -1))]) * 0.5
+    else:
+        samples = later
+    # NaN padding of shorter runs contributes nothing
+    return np.nansum(samples * intervals, axis=axis)
+
+
+# Energy, delay and efficiency of one or many runs, computed for all cores and
+# runs at once. Arguments are shaped as for integrate_power, with a cores axis:
+# dynamic_power and static_power in W, instructions as committed instructions
+# per dump interval (e.g. instructions_from_ipc). Runtime counts from t_start
+# (or the first dump) to the last dump. Returns a dict of arrays:
+#   runtime             s, per run
+#   energy              J, per core (dynamic + static)
+#   total_energy        J, per run (all cores)
+#   average_power       W, per run, time-weighted (total_energy / runtime)
+#   edp                 J*s, per run (total_energy * runtime)
+# plus dynamic_energy and static_energy per core when static power is given,
+# and instructions (per core), total_instructions and instructions_per_joule
+# (per run) when instructions are given.
+@profiled("aggregate")
+def energy_metrics(times, dynamic_power, static_power=None, instructions=None, t_start=0.0, method="trapezoid"):
+    times = np.asarray(times, dtype=np.float64)
+    start = np.nanmin(times, axis=-1) if t_start is None else t_start
+    runtime = np.nanmax(times, axis=-1) - start
+
+    metrics = {"runtime": runtime}
+    energy = integrate_power(times, dynamic_power, t_start, method)
+    if static_power is not None:
+        static_energy = integrate_power(times, static_power, t_start, method)
+        metrics["dynamic_energy"] = energy
+        metrics["static_energy"] = static_energy
+        energy = energy + static_energy
+    total_energy = energy.sum(axis=-1)
+
+    metrics["energy"] = energy
+    metrics["total_energy"] = total_energy
+    with np.errstate(divide='ignore', invalid='ignore'):
+        metrics["average_power"] = total_energy / runtime
+        metrics["edp"] = total_energy * runtime
+        if instructions is not None:
+            per_core = np.nansum(np.asarray(instructions, dtype=np.float64), axis=times.ndim - 1)
+            metrics["instructions"] = per_core
+            metrics["total_instructions"] = per_core.sum(axis=-1)
+            metrics["instructions_per_joule"] = metrics["total_instructions"] / total_energy
+    return metrics
+
+
+# Committed instructions per dump interval from IPC and cycles of that interval
+def instructions_from_ipc(ipc, cycles):
+    return np.asarray(ipc, dtype=np.float64) * np.asarray(cycles, dtype=np.float64)
+
+
+# Stack the (times, dumps x cores) arrays of several runs into (runs x dumps)
+# and (runs x dumps x cores), padding shorter runs and missing cores with NaN.
+# Runs longer than num_dumps (if given) are cut.
+def stack_runs(runs, num_dumps=None):
+    if num_dumps is None:
+        num_dumps = max((len(times) for times, _ in runs), default=0)
+    runs = [(times[:num_dumps], values[:num_dumps]) for times, values in runs]
+    num_cores = max((values.shape[1] for _, values in runs), default=0)
+    times_out = np.full((len(runs), num_dumps), np.nan)
+    values_out = np.full((len(runs), num_dumps, num_cores), np.nan)
+    for run, (times, values) in enumerate(runs):
+        times_out[run, :len(times)] = times
+        values_out[run, :values.shape[0], :values.shape[1]] = values
+    return times_out, values_out
+
+
+# energy_metrics for StatsRun objects loaded with at least DYNAMIC_POWER_STAT.
+# Static power and instructions (IPC x cycles) are used when every run has them
+# for all its cores. All runs are evaluated together; results have one row per run.
+# Raises ValueError naming the first run without dynamic power on any core.
+def run_metrics(runs, t_start=0.0, method="trapezoid"):
+    for run in runs:
+        if not run.cpu_series.get(DYNAMIC_POWER_STAT):
+            raise ValueError(f"{run.file_path} has no per-core {DYNAMIC_POWER_STAT} values")
+    cpu_ids = [run.cpu_ids(DYNAMIC_POWER_STAT) for run in runs]
+
+    def stacked(stat, num_dumps=None):
+        if not all(set(ids) <= set(run.cpu_series.get(stat, ())) for run, ids in zip(runs, cpu_ids)):
+            return None, None
+        return stack_runs([run.cpu_array(stat, ids)[:2] for run, ids in zip(runs, cpu_ids)], num_dumps)
+
+    times, dynamic_power = stacked(DYNAMIC_POWER_STAT)
+    num_dumps = times.shape[1]
+    _, static_power = stacked(STATIC_POWER_STAT, num_dumps)
+    _, ipc = stacked(IPC_STAT, num_dumps)
+    _, cycles = stacked(CYCLES_STAT, num_dumps)
+    instructions = None if ipc is None or cycles is None else instructions_from_ipc(ipc, cycles)
+    return energy_metrics(times, dynamic_power, static_power, instructions, t_start, method)
@@ -0,0 +1,251 @@
+import argparse
+import os
+import sys
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from stats_parser import END_MARKER, collect_series, merge_series, parse_dumps
+from stats_profile import add_profile_argument, enable
+
+END_MARKER_BYTES = END_MARKER.encode()
+
+# Set STATS_FOLLOW to make the time-series scripts follow their stats files
+# live (see follow_if_requested); a number sets the refresh period in seconds
+FOLLOW_ENV = "STATS_FOLLOW"
+DEFAULT_INTERVAL = 2.0
+
+
+# Follow the stats.txt of a running gem5 simulation.
+# Every poll() reads only the bytes appended since the previous call and parses
+# the dumps they complete; a trailing dump that is still being written is kept
+# as raw bytes until its End marker arrives. A file that does not exist yet (gem5
+# has not written its first dump) is waited for: polls return 0 until it appears.
+class StatsFollower:
+    def __init__(self, file_path, names=("simSeconds",), cpu_stats=("ipc", "power_model.dynamicPower")):
+        self.file_path = file_path
+        self.names = tuple(names)
+        self.cpu_stats = tuple(cpu_stats)
+        self.file = None
+        self.generation = -1
+        self.reset()
+
+    # Start again from the beginning of the file (also used when it is rewritten)
+    def reset(self):
+        if self.file is not None:
+            self.file.close()
+        self._open()
+        self.pending = b""
+        self.num_dumps = 0
+        self.generation += 1   # bumped on every restart, so plots know to start over
+        self.series, self.cpu_series = collect_series((), self.names, self.cpu_stats)
+
+    # Open the file if it exists yet; returns whether it is open
+    def _open(self):
+        try:
+            self.file = open(self.file_path, 'rb')
+        except FileNotFoundError:
+            self.file = None
+        return self.file is not None
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # gem5 restarted: the path now points to a new file, or the file got shorter
+    def _rewritten(self):
+        try:
+            path_stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return False
+        open_stat = os.fstat(self.file.fileno())
+        return (path_stat.st_ino, path_stat.st_dev) != (open_stat.st_ino, open_stat.st_dev) \
+            or open_stat.st_size < self.file.tell()
+
+    # Parse newly appended complete dumps; returns how many were added
+    def poll(self):
+        if self.file is None:
+            if not self._open():
+                return 0
+        elif self._rewritten():
+            self.reset()
+            if self.file is None:
+                return 0
+
+        new_bytes = self.file.read()
+        if not new_bytes:
+            return 0
+
+        # The pending bytes hold no complete End marker, so only the new tail
+        # (plus a marker split across the two reads) has to be searched.
+        search_from = max(0, len(self.pending) - len(END_MARKER_BYTES))
+        self.pending += new_bytes
+        end = self.pending.rfind(END_MARKER_BYTES, search_from)
+        if end == -1:
+            return 0
+        cut = self.pending.find(b"\n", end)
+        cut = len(self.pending) if cut == -1 else cut + 1
+
+        complete, self.pending = self.pending[:cut], self.pending[cut:]
+        records = list(parse_dumps(complete.decode(errors='replace').splitlines(),
+                                   self.names, self.cpu_stats))
+        merge_series((self.series, self.cpu_series), collect_series(records, self.names, self.cpu_stats))
+        self.num_dumps += len(records)
+        return len(records)
+
+
+# Points per line artist of a live plot. A refresh re-sets only the newest
+# artist of each series, so it costs O(new dumps + FOLLOW_CHUNK_POINTS) however
+# long the run already is.
+FOLLOW_CHUNK_POINTS = 4096
+
+# Line styles of the first, second, ... followed run
+FOLLOW_LINESTYLES = ('-', '--', ':', '-.')
+
+
+# One per-core series of a live plot, drawn as a chain of line artists of at
+# most FOLLOW_CHUNK_POINTS points; full artists are never touched again.
+class _LiveSeries:
+    def __init__(self, ax, label, linestyle):
+        self.ax = ax
+        self.label = label
+        self.style = {"linestyle": linestyle}
+        self.lines = []
+        self.x, self.y = [], []   # points of the newest artist
+
+    def extend(self, x, y):
+        done = 0
+        while done < len(x):
+            if not self.lines or len(self.x) >= FOLLOW_CHUNK_POINTS:
+                # Start the next artist at the last point of the previous one
+                # so the curve stays joined
+                self.x, self.y = self.x[-1:], self.y[-1:]
+                line, = self.ax.plot([], [], label=self.label if not self.lines else '_nolegend_', **self.style)
+                self.style["color"] = line.get_color()
+                self.lines.append(line)
+            take = min(len(x) - done, FOLLOW_CHUNK_POINTS - len(self.x))
+            self.x += x[done:done + take]
+            self.y += y[done:done + take]
+            self.lines[-1].set_data(self.x, self.y)
+            done += take
+
+    def remove(self):
+        for line in self.lines:
+            line.remove()
+
+
+# Live plot of a per-core stat of one or more running simulations: refresh()
+# polls every file and hands only the dumps it appended to the plot, and the
+# axis limits grow with the new points instead of being recomputed from all data.
+class LivePlot:
+    def __init__(self, file_paths, cpu_stat="ipc", labels=None, ylabel=None, title=None):
+        self.cpu_stat = cpu_stat
+        self.title = title or f'{cpu_stat} per CPU'
+        self.followers = [StatsFollower(file_path, cpu_stats=(cpu_stat,)) for file_path in file_paths]
+        self.labels = list(labels) if labels else [None] * len(self.followers)
+        self.generations = [0] * len(self.followers)
+        self.series = [{} for _ in self.followers]   # cpu_id -> (_LiveSeries, points plotted)
+        self.fig, self.ax = plt.subplots(figsize=(10, 6))
+        self.ax.set_xlabel('Time (s)', fontsize=16)
+        self.ax.set_ylabel(ylabel or cpu_stat, fontsize=16)
+        self.ax.grid(True)
+
+    def close(self):
+        for follower in self.followers:
+            follower.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Poll every followed file; returns how many dumps were added
+    def refresh(self):
+        added = 0
+        for run, follower in enumerate(self.followers):
+            added += follower.poll()
+            if follower.generation != self.generations[run]:
+                # The file was rewritten, so its curves start over
+                for live, _ in self.series[run].values():
+                    live.remove()
+                self.series[run] = {}
+                self.generations[run] = follower.generation
+            time_seconds = follower.series["simSeconds"]
+            for cpu_id, values in follower.cpu_series[self.cpu_stat].items():
+                live, plotted = self.series[run].get(cpu_id) or (None, 0)
+                if live is None:
+                    label = f'CPU {cpu_id}' if self.labels[run] is None else f'CPU {cpu_id} - {self.labels[run]}'
+                    live = _LiveSeries(self.ax, label, FOLLOW_LINESTYLES[run % len(FOLLOW_LINESTYLES)])
+                length = min(len(time_seconds), len(values))
+                if length > plotted:
+                    x, y = time_seconds[plotted:length], values[plotted:length]
+                    live.extend(x, y)
+                    self.ax.update_datalim(np.column_stack([x, y]))
+                    if not plotted:
+                        self.ax.legend(fontsize=12)
+                self.series[run][cpu_id] = (live, length)
+        if added:
+            self.ax.autoscale_view()
+            dumps = ", ".join(str(follower.num_dumps) for follower in self.followers)
+            self.ax.set_title(f'{self.title} ({dumps} dumps)', fontsize=18)
+        return added
+
+
+# Plot a per-core stat of running simulations, refreshing every `interval`
+# seconds until the window is closed.
+def follow_plot(file_paths, cpu_stat="ipc", interval=DEFAULT_INTERVAL, labels=None, ylabel=None, title=None):
+    if isinstance(file_paths, str):
+        file_paths = [file_paths]
+    plt.ion()
+    with LivePlot(file_paths, cpu_stat, labels, ylabel, title) as live:
+        while plt.fignum_exists(live.fig.number):
+            if live.refresh():
+                print("; ".join(f"{follower.file_path}: {follower.num_dumps} dumps, simSeconds "
+                                f"{follower.series['simSeconds'][-1]:.6f}"
+                                for follower in live.followers if follower.series["simSeconds"]))
+            plt.pause(interval)
+
+
+# Seconds between refreshes when STATS_FOLLOW is set: its value if that is a
+# positive number, else DEFAULT_INTERVAL; None when follow mode is off
+def follow_interval():
+    value = os.environ.get(FOLLOW_ENV)
+    if not value:
+        return None
+    try:
+        interval = float(value)
+    except ValueError:
+        return DEFAULT_INTERVAL
+    return interval if interval > 0 else DEFAULT_INTERVAL
+
+
+# For the time-series scripts: with STATS_FOLLOW set, live-plot `cpu_stat` of
+# the given (possibly still growing) stats files instead of the finished-run
+# figure, and exit once the window is closed. Returns without doing anything
+# when follow mode is off.
+def follow_if_requested(file_paths, cpu_stat, labels=None, ylabel=None, title=None):
+    interval = follow_interval()
+    if interval is None:
+        return
+    follow_plot(file_paths, cpu_stat, interval, labels, ylabel, title)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Live plot of a per-core stat from a growing gem5 stats.txt")
+    parser.add_argument("stats_files", nargs="+", help="stats.txt of one or more running simulations")
+    parser.add_argument("--stat", default="ipc", help="per-core stat after 'cpus<N>.', e.g. power_model.dynamicPower")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="refresh period in seconds")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    if args.profile:
+        enable()
+    follow_plot(args.stats_files, args.stat, args.interval)
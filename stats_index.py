@@ -0,0 +1,115 @@
+import mmap
+
+import numpy as np
+
+from stats_cache import file_fingerprint, read_columns, write_columns
+from stats_io import compression_of
+from stats_parser import BEGIN_MARKER, END_MARKER, collect_series, iter_dumps, parse_dumps
+
+INDEX_SUFFIX = ".index"
+
+
+def index_path_for(file_path):
+    return file_path + INDEX_SUFFIX
+
+
+# Find every complete dump in a memory-mapped stats.txt.
+# Returns (offsets, lengths, sim_seconds) with one entry per dump; a dump
+# without a simSeconds line gets NaN.
+def scan_dumps(mm):
+    begin = BEGIN_MARKER.encode()
+    end = END_MARKER.encode()
+    sim_seconds_key = b"\nsimSeconds "
+    offsets, lengths, sim_seconds = [], [], []
+
+    pos = mm.find(begin)
+    while pos != -1:
+        end_pos = mm.find(end, pos)
+        if end_pos == -1:
+            break  # Dump still being written
+        block_end = mm.find(b"\n", end_pos)
+        block_end = len(mm) if block_end == -1 else block_end + 1
+
+        value = np.nan
+        key_pos = mm.find(sim_seconds_key, pos, end_pos)
+        if key_pos != -1:
+            line_end = mm.find(b"\n", key_pos + 1, end_pos)
+            fields = mm[key_pos + 1:line_end].split()
+            try:
+                value = float(fields[1])
+            except (IndexError, ValueError):
+                pass
+
+        offsets.append(pos)
+        lengths.append(block_end - pos)
+        sim_seconds.append(value)
+        pos = mm.find(begin, block_end)
+
+    return (np.array(offsets, dtype=np.int64), np.array(lengths, dtype=np.int64),
+            np.array(sim_seconds, dtype=np.float64))
+
+
+# Return the dump index of a stats.txt as {"offset", "length", "simSeconds"} arrays,
+# building the stats.txt.index sidecar when it is missing or stale.
+# Compressed files have no byte offsets to seek to and cannot be indexed.
+def load_index(file_path):
+    if compression_of(file_path) is not None:
+        raise ValueError(f"Cannot index compressed {file_path}; decompress it to read time ranges by offset")
+    index_path = index_path_for(file_path)
+    fingerprint = file_fingerprint(file_path)
+    header, columns = read_columns(index_path)
+    if header is not None and header.get("fingerprint") == fingerprint and "offset" in columns:
+        return columns
+
+    with open(file_path, 'rb') as file:
+        if fingerprint["size"] == 0:
+            offsets, lengths, sim_seconds = scan_dumps(b"")
+        else:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                offsets, lengths, sim_seconds = scan_dumps(mm)
+
+    columns = [("offset", offsets, np.int64), ("length", lengths, np.int64),
+               ("simSeconds", sim_seconds, np.float64)]
+    try:
+        write_columns(index_path, {"fingerprint": fingerprint}, columns)
+    except OSError as e:
+        print(f"Warning: could not write stats index {index_path}: {e}")
+    return {name: values for name, values, _ in columns}
+
+
+# Dump numbers whose simSeconds lies in [t_min, t_max] (either bound may be None).
+def dumps_in_time_range(index, t_min=None, t_max=None):
+    sim_seconds = index["simSeconds"]
+    mask = np.ones(len(sim_seconds), dtype=bool)
+    if t_min is not None:
+        mask &= sim_seconds >= t_min
+    if t_max is not None:
+        mask &= sim_seconds <= t_max
+    return np.flatnonzero(mask)
+
+
+# Yield per-dump records (see stats_parser.parse_dumps) for the given dump numbers,
+# reading only those blocks of the file.
+def iter_dumps_at(file_path, index, dump_ids, names=None, cpu_stats=(), patterns=()):
+    offsets, lengths = index["offset"], index["length"]
+    with open(file_path, 'rb') as file:
+        for dump_id in dump_ids:
+            file.seek(int(offsets[dump_id]))
+            text = file.read(int(lengths[dump_id])).decode(errors='replace')
+            yield from parse_dumps(text.splitlines(), names, cpu_stats, patterns)
+
+
+# Load series (see stats_parser.load_stats) for dumps with simSeconds in [t_min, t_max].
+# Compressed files are streamed in full and filtered instead.
+def load_stats_in_time_range(file_path, t_min=None, t_max=None, names=("simSeconds",), cpu_stats=(), patterns=()):
+    if compression_of(file_path) is not None:
+        parse_names = list(dict.fromkeys(["simSeconds", *names]))
+        records = (record for record in iter_dumps(file_path, parse_names, cpu_stats, patterns)
+                   if (t_min is None or record.get("simSeconds", np.nan) >= t_min)
+                   and (t_max is None or record.get("simSeconds", np.nan) <= t_max))
+        return collect_series(records, names, cpu_stats, patterns)
+
+    index = load_index(file_path)
+    dump_ids = dumps_in_time_range(index, t_min, t_max)
+    records = iter_dumps_at(file_path, index, dump_ids, names, cpu_stats, patterns)
+    return collect_series(records, names, cpu_stats, patterns)
@@ -0,0 +1,144 @@
+import bz2
+import codecs
+import gzip
+import lzma
+import os
+import queue
+import threading
+
+# Leading bytes of every compressed format stats.txt can be read from. The
+# format is sniffed from the content, so archives need no particular suffix.
+COMPRESSION_MAGIC = (
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+)
+
+# Names a run's stats file may have, plain first. The compression is still
+# sniffed from the content; the suffixes only serve to find the file.
+STATS_FILE_NAMES = ("stats.txt", "stats.txt.gz", "stats.txt.bz2", "stats.txt.xz", "stats.txt.zst")
+
+# Decompressed bytes per chunk, and how many chunks the background reader may
+# decompress ahead of the parser
+READ_CHUNK_BYTES = 1 << 20
+READ_AHEAD_CHUNKS = 8
+
+
+# "gzip", "bz2", "xz" or "zstd" for a compressed file, None for plain text
+def compression_of(file_path):
+    with open(file_path, 'rb') as file:
+        head = file.read(6)
+    for magic, compression in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+# Path of the stats file of a run directory given the names of its files (as
+# listed by os.walk), preferring the plain stats.txt; None if it has none
+def find_stats_file(dir_path, file_names):
+    for name in STATS_FILE_NAMES:
+        if name in file_names:
+            return os.path.join(dir_path, name)
+    return None
+
+
+# zstd needs the zstandard package (or Python 3.14's compression.zstd)
+def _open_zstd(file_path):
+    try:
+        import zstandard
+    except ImportError:
+        zstandard = None
+    if zstandard is not None:
+        return zstandard.ZstdDecompressor().stream_reader(open(file_path, 'rb'), read_across_frames=True,
+                                                          closefd=True)
+    try:
+        from compression import zstd
+    except ImportError as e:
+        raise ImportError(f"Reading zstd-compressed {file_path} needs zstandard (pip install zstandard)") from e
+    return zstd.open(file_path, 'rb')
+
+
+# Binary file object with the decompressed contents of a plain or compressed file
+def open_decompressed(file_path):
+    compression = compression_of(file_path)
+    if compression is None:
+        return open(file_path, 'rb')
+    if compression == "gzip":
+        return gzip.open(file_path, 'rb')
+    if compression == "bz2":
+        return bz2.open(file_path, 'rb')
+    if compression == "xz":
+        return lzma.open(file_path, 'rb')
+    return _open_zstd(file_path)
+
+
+def _put(chunks, item, stop):
+    while not stop.is_set():
+        try:
+            chunks.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            pass
+
+
+def _read_ahead(file, chunk_bytes, chunks, stop):
+    try:
+        while not stop.is_set():
+            chunk = file.read(chunk_bytes)
+            _put(chunks, chunk, stop)
+            if not chunk:
+                return
+    except Exception as e:
+        _put(chunks, e, stop)
+
+
+# Yield the decompressed contents of a file in chunks of about chunk_bytes.
+# Compressed files are decompressed on a background thread (zlib, bz2, lzma and
+# zstd release the GIL), so decompression overlaps with parsing the previous chunks.
+def iter_chunks(file_path, chunk_bytes=READ_CHUNK_BYTES):
+    file = open_decompressed(file_path)
+    if compression_of(file_path) is None:
+        with file:
+            while True:
+                chunk = file.read(chunk_bytes)
+                if not chunk:
+                    return
+                yield chunk
+
+    chunks = queue.Queue(READ_AHEAD_CHUNKS)
+    stop = threading.Event()
+    reader = threading.Thread(target=_read_ahead, args=(file, chunk_bytes, chunks, stop), daemon=True)
+    reader.start()
+    try:
+        while True:
+            chunk = chunks.get()
+            if isinstance(chunk, Exception):
+                raise chunk
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        stop.set()
+        reader.join()
+        file.close()
+
+
+# Yield the text lines of a plain or compressed stats.txt (only lines of plain
+# files keep their newline; parse_dumps does not care)
+def iter_lines(file_path):
+    if compression_of(file_path) is None:
+        with open(file_path, 'r') as file:
+            yield from file
+        return
+
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    tail = ""
+    for chunk in iter_chunks(file_path):
+        lines = (tail + decoder.decode(chunk)).split('\n')
+        tail = lines.pop()
+        yield from lines
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail
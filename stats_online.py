@@ -0,0 +1,304 @@
+import math
+import mmap
+import multiprocessing
+import os
+from array import array
+from collections import deque
+
+import numpy as np
+
+from stats_io import compression_of, iter_chunks
+from stats_parser import (PARALLEL_CHUNK_BYTES, PARALLEL_MIN_BYTES, dump_aligned_blocks, dump_aligned_ranges,
+                          iter_dumps, parse_dumps, split_cpu_stat)
+from stats_profile import stage
+
+# Scripts that support it print only summary statistics, computed in one pass
+# with constant memory, when STATS_SUMMARY_ONLY is set
+SUMMARY_ONLY_ENV = "STATS_SUMMARY_ONLY"
+
+# Samples buffered per accumulator before they are folded in with NumPy
+BATCH_SAMPLES = 4096
+
+# Relative accuracy of quantiles, and the most buckets a sketch keeps per sign
+RELATIVE_ACCURACY = 0.01
+MAX_BUCKETS = 2048
+# Magnitudes below this count as zero in the quantile sketch
+MIN_MAGNITUDE = 1e-12
+
+
+def summary_only():
+    return bool(os.environ.get(SUMMARY_ONLY_ENV))
+
+
+# Mergeable quantile sketch with logarithmic buckets (DDSketch): every quantile
+# it returns is within RELATIVE_ACCURACY of the true sample value, memory is at
+# most 2 x max_buckets counters however many samples are added, and merging two
+# sketches just adds their bucket counts, so per-chunk sketches combine exactly.
+# Past max_buckets the smallest magnitudes share a bucket, so only the lowest
+# quantiles lose accuracy.
+class QuantileSketch:
+    __slots__ = ("relative_accuracy", "log_gamma", "max_buckets", "positive", "negative", "zeros", "count")
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY, max_buckets=MAX_BUCKETS):
+        self.relative_accuracy = relative_accuracy
+        self.log_gamma = math.log((1 + relative_accuracy) / (1 - relative_accuracy))
+        self.max_buckets = max_buckets
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+        self.count = 0
+
+    def _add_magnitudes(self, buckets, magnitudes):
+        if magnitudes.size == 0:
+            return
+        keys, counts = np.unique(np.ceil(np.log(magnitudes) / self.log_gamma).astype(np.int64), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            buckets[key] = buckets.get(key, 0) + count
+        self._collapse(buckets)
+
+    def _collapse(self, buckets):
+        if len(buckets) <= self.max_buckets:
+            return
+        keys = sorted(buckets)
+        cut = len(keys) - self.max_buckets
+        buckets[keys[cut]] += sum(buckets.pop(key) for key in keys[:cut])
+
+    # Add a batch of samples (NaN is skipped)
+    def add_array(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        self._add_magnitudes(self.positive, values[values > MIN_MAGNITUDE])
+        self._add_magnitudes(self.negative, -values[values < -MIN_MAGNITUDE])
+        self.zeros += int(np.count_nonzero(np.abs(values) <= MIN_MAGNITUDE))
+        self.count += int(values.size)
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge quantile sketches of different relative accuracy")
+        for buckets, other_buckets in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_buckets.items():
+                buckets[key] = buckets.get(key, 0) + count
+            self._collapse(buckets)
+        self.zeros += other.zeros
+        self.count += other.count
+        return self
+
+    def _value(self, key):
+        gamma = math.exp(self.log_gamma)
+        return 2 * gamma ** key / (gamma + 1)
+
+    # Value at quantile q (0..1), NaN for an empty sketch
+    def quantile(self, q):
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive))
+
+
+# Single-pass summary of one series: count, Welford mean and variance, min, max
+# and quantiles from a QuantileSketch. Samples are buffered BATCH_SAMPLES at a
+# time and folded in with NumPy, so memory stays constant however long the run.
+# merge() combines the summaries of separate chunks (Chan et al.'s update), so
+# parallel parsers can each summarize their part of a file. Read count, mean,
+# min and max after flush() (the summarize_* functions return flushed results).
+class RunningStats:
+    __slots__ = ("count", "mean", "m2", "min", "max", "sketch", "pending")
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sketch = QuantileSketch(relative_accuracy)
+        self.pending = array('d')
+
+    def add(self, value):
+        self.pending.append(value)
+        if len(self.pending) >= BATCH_SAMPLES:
+            self.flush()
+
+    def add_array(self, values):
+        self.flush()
+        self._fold(np.asarray(values, dtype=np.float64))
+
+    def flush(self):
+        if self.pending:
+            self._fold(np.frombuffer(self.pending, dtype=np.float64))
+            self.pending = array('d')
+
+    def _fold(self, values):
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        batch = RunningStats.__new__(RunningStats)
+        batch.count = int(values.size)
+        batch.mean = float(values.mean())
+        batch.m2 = float(np.sum((values - batch.mean) ** 2))
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        self._combine(batch)
+        self.sketch.add_array(values)
+
+    def _combine(self, other):
+        count = self.count + other.count
+        if count == 0:
+            return
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def merge(self, other):
+        self.flush()
+        other.flush()
+        self._combine(other)
+        self.sketch.merge(other.sketch)
+        return self
+
+    # Sample variance (ddof=1), NaN with fewer than two samples
+    @property
+    def variance(self):
+        self.flush()
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def quantile(self, q):
+        self.flush()
+        return self.sketch.quantile(q)
+
+    # count, mean, std, min, p50, p95, p99 and max as a dict
+    def summary(self):
+        self.flush()
+        empty = self.count == 0
+        return {"count": self.count, "mean": math.nan if empty else self.mean, "std": self.std,
+                "min": math.nan if empty else self.min, "p50": self.quantile(0.50), "p95": self.quantile(0.95),
+                "p99": self.quantile(0.99), "max": math.nan if empty else self.max}
+
+
+# Running summaries of selected stats over a stream of per-dump records.
+# Returns (stats, cpu_stats, totals): stats maps stat name -> RunningStats,
+# cpu_stats maps per-core stat -> {cpu_id: RunningStats}, and totals maps
+# per-core stat -> RunningStats of its per-dump sum across cores.
+def summarize_records(records, names=(), cpu_stats=()):
+    stats = {name: RunningStats() for name in names}
+    per_core = {stat: {} for stat in cpu_stats}
+    totals = {stat: RunningStats() for stat in cpu_stats}
+
+    for record in records:
+        dump_totals = {}
+        for name, value in record.items():
+            running = stats.get(name)
+            if running is not None:
+                running.add(value)
+                continue
+            cpu_stat = split_cpu_stat(name)
+            if cpu_stat is None or cpu_stat[1] not in per_core:
+                continue
+            cpu_id, stat = cpu_stat
+            running = per_core[stat].get(cpu_id)
+            if running is None:
+                running = per_core[stat][cpu_id] = RunningStats()
+            running.add(value)
+            dump_totals[stat] = dump_totals.get(stat, 0.0) + value
+        for stat, total in dump_totals.items():
+            totals[stat].add(total)
+
+    return stats, per_core, totals
+
+
+# Merge the summaries of a later chunk into those of an earlier one
+def merge_summaries(into, part):
+    for summaries, part_summaries in ((into[0], part[0]), (into[2], part[2])):
+        for name, running in part_summaries.items():
+            if name in summaries:
+                summaries[name].merge(running)
+            else:
+                summaries[name] = running
+    for stat, per_cpu in part[1].items():
+        into_per_cpu = into[1].setdefault(stat, {})
+        for cpu_id, running in per_cpu.items():
+            if cpu_id in into_per_cpu:
+                into_per_cpu[cpu_id].merge(running)
+            else:
+                into_per_cpu[cpu_id] = running
+    return into
+
+
+def _flushed(summaries):
+    stats, per_core, totals = summaries
+    for running in [*stats.values(), *totals.values(),
+                    *(running for per_cpu in per_core.values() for running in per_cpu.values())]:
+        running.flush()
+    return summaries
+
+
+def _summarize_block(block, names, cpu_stats):
+    records = parse_dumps(block.decode(errors='replace').splitlines(), names, cpu_stats)
+    return _flushed(summarize_records(records, names, cpu_stats))
+
+
+def _summarize_range(file_path, start, end, names, cpu_stats):
+    with open(file_path, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            block = mm[start:end]
+    return _summarize_block(block, names, cpu_stats)
+
+
+def _summarize_range_args(args):
+    return _summarize_range(*args)
+
+
+# Summarize the requested stats of a stats.txt in one pass, without keeping any
+# series (see summarize_records for the result). Like stats_parser.load_stats,
+# files of PARALLEL_MIN_BYTES or more are split into dump-aligned chunks that
+# forked workers summarize, and the per-chunk summaries are merged.
+def summarize_stats(file_path, names=("simSeconds",), cpu_stats=(), workers=None):
+    names, cpu_stats = list(names), list(cpu_stats)
+    if workers is None:
+        workers = os.cpu_count() if os.path.getsize(file_path) >= PARALLEL_MIN_BYTES else 1
+    if workers == 1 or "fork" not in multiprocessing.get_all_start_methods():
+        with stage("parse") as profile:
+            profile.add(workers=1)
+            return _flushed(summarize_records(iter_dumps(file_path, names, cpu_stats), names, cpu_stats))
+
+    with stage("parse") as profile:
+        profile.add(workers=workers)
+        result = summarize_records((), names, cpu_stats)
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            if compression_of(file_path) is not None:
+                # At most two blocks per worker in flight, as in stats_parser
+                pending = deque()
+                for block in dump_aligned_blocks(iter_chunks(file_path)):
+                    pending.append(pool.apply_async(_summarize_block, (block, names, cpu_stats)))
+                    if len(pending) >= 2 * workers:
+                        merge_summaries(result, pending.popleft().get())
+                parts = (task.get() for task in pending)
+            else:
+                with open(file_path, 'rb') as file:
+                    if os.fstat(file.fileno()).st_size == 0:
+                        return _flushed(result)
+                    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        ranges = dump_aligned_ranges(mm, max(workers, os.path.getsize(file_path) // PARALLEL_CHUNK_BYTES))
+                parts = pool.imap(_summarize_range_args,
+                                  [(file_path, start, end, names, cpu_stats) for start, end in ranges])
+            for part in parts:
+                merge_summaries(result, part)
+        return _flushed(result)
@@ -0,0 +1,256 @@
+import functools
+import mmap
+import multiprocessing
+import os
+import re
+from array import array
+from collections import deque
+
+from stats_io import compression_of, iter_chunks, iter_lines
+from stats_profile import counted, stage
+from stats_select import StatSelector
+
+# Markers gem5 writes around every statistics dump in stats.txt
+BEGIN_MARKER = "---------- Begin Simulation Statistics ----------"
+END_MARKER = "---------- End Simulation Statistics   ----------"
+
+# Prefix shared by every per-core stat, e.g. system.cpu_cluster.cpus0.ipc
+CPU_PREFIX = "system.cpu_cluster.cpus"
+
+# Files at least this big are parsed in parallel when workers is left to default
+PARALLEL_MIN_BYTES = 256 << 20
+# Target size of the dump-aligned byte ranges handed to each parallel task
+PARALLEL_CHUNK_BYTES = 64 << 20
+
+
+# Split a per-core stat name into (cpu_id, stat), or return None if it is not one.
+# 'system.cpu_cluster.cpus2.power_model.dynamicPower' -> ('2', 'power_model.dynamicPower')
+def split_cpu_stat(name):
+    if not name.startswith(CPU_PREFIX):
+        return None
+    cpu_id, dot, stat = name[len(CPU_PREFIX):].partition('.')
+    if not dot or not cpu_id.isdigit():
+        return None
+    return cpu_id, stat
+
+
+# Compile every way of asking for stats into one StatSelector: exact `names`,
+# per-core `cpu_stats` (the part after 'cpus<N>.', for every core present) and
+# wildcard `patterns` (see stats_select). Arguments must be hashable; selectors
+# are kept so repeated parses (parallel ranges, indexed dumps, follow polls)
+# reuse their memoized matches.
+@functools.lru_cache(maxsize=32)
+def stat_selector(names=(), cpu_stats=(), patterns=()):
+    selector = StatSelector(patterns)
+    for name in names:
+        selector.add_components(name.split('.'))
+    prefix = CPU_PREFIX.split('.')
+    cpu_component = re.compile(re.escape(prefix[-1]) + r"\d+")
+    for stat in cpu_stats:
+        selector.add_components(prefix[:-1] + [cpu_component] + stat.split('.'))
+    return selector
+
+
+# Walk stats.txt lines once and yield one {stat name: value} dict per complete dump.
+# `names` selects stats by exact name (None keeps every scalar stat), `cpu_stats`
+# selects per-core stats by the part after 'cpus<N>.' for every core present and
+# `patterns` adds wildcard stat patterns. All three are compiled into a single
+# matcher, so each line costs a whitespace split and one memoized lookup.
+def parse_dumps(lines, names=None, cpu_stats=(), patterns=()):
+    selected = None if names is None else stat_selector(tuple(names), tuple(cpu_stats), tuple(patterns)).match
+    record = None
+
+    for line in lines:
+        if line.startswith('-'):
+            if line.startswith(BEGIN_MARKER):
+                record = {}
+            elif line.startswith(END_MARKER) and record is not None:
+                yield record
+                record = None
+            continue
+        if record is None:
+            continue
+
+        parts = line.split(None, 2)
+        if len(parts) < 2:
+            continue
+        name = parts[0]
+        if selected is not None and not selected(name):
+            continue
+
+        try:
+            record[name] = float(parts[1])
+        except ValueError:
+            # Distribution headers and other non-scalar lines
+            continue
+
+
+# Yield per-dump records for the requested stats of a stats.txt file, which may
+# be gzip, bz2, xz or zstd compressed (see stats_io).
+def iter_dumps(file_path, names=None, cpu_stats=(), patterns=()):
+    yield from parse_dumps(counted(iter_lines(file_path), "lines"), names, cpu_stats, patterns)
+
+
+# Turn per-dump records into series.
+# Returns (series, cpu_series): series maps stat name -> values per dump,
+# cpu_series maps per-core stat -> {cpu_id: values per dump}. Values are kept in
+# growable array('d') buffers, 8 bytes per sample instead of a boxed float plus a
+# list slot, and they convert to NumPy without copying.
+# With `patterns`, every other stat in the records is added as well: per-core
+# stats to cpu_series under their stat, the rest to series under their full name.
+def collect_series(records, names=(), cpu_stats=(), patterns=()):
+    series = {name: array('d') for name in names}
+    cpu_series = {stat: {} for stat in cpu_stats}
+
+    for record in records:
+        for name, value in record.items():
+            if name in series:
+                series[name].append(value)
+                continue
+            cpu_stat = split_cpu_stat(name)
+            if cpu_stat is None:
+                if patterns:
+                    series[name] = array('d', [value])
+                continue
+            cpu_id, stat = cpu_stat
+            per_cpu = cpu_series.get(stat)
+            if per_cpu is None:
+                if not patterns:
+                    continue
+                per_cpu = cpu_series[stat] = {}
+            if cpu_id not in per_cpu:
+                per_cpu[cpu_id] = array('d')
+            per_cpu[cpu_id].append(value)
+
+    return series, cpu_series
+
+
+# Split a memory-mapped stats.txt into about `parts` byte ranges that each start
+# on a "Begin Simulation Statistics" marker, so no dump straddles two ranges.
+def dump_aligned_ranges(mm, parts):
+    size = len(mm)
+    marker = BEGIN_MARKER.encode()
+    starts = [0]
+    for i in range(1, parts):
+        start = mm.find(marker, max(size * i // parts, starts[-1] + 1))
+        if start == -1:
+            break
+        if start != starts[-1]:
+            starts.append(start)
+    return list(zip(starts, starts[1:] + [size]))
+
+
+# Split a stream of byte chunks into blocks of about block_bytes that each end
+# right before a "Begin Simulation Statistics" marker, so no dump straddles two.
+def dump_aligned_blocks(chunks, block_bytes=PARALLEL_CHUNK_BYTES):
+    marker = BEGIN_MARKER.encode()
+    pending, size = [], 0
+    for chunk in chunks:
+        pending.append(chunk)
+        size += len(chunk)
+        if size < block_bytes:
+            continue
+        data = b"".join(pending)
+        cut = data.rfind(marker)
+        if cut <= 0:
+            pending, size = [data], len(data)
+            continue
+        yield data[:cut]
+        pending, size = [data[cut:]], len(data) - cut
+    if size:
+        yield b"".join(pending)
+
+
+# Parse one dump-aligned block of stats.txt bytes into series (parallel worker).
+def _load_block(block, names, cpu_stats, patterns=()):
+    records = parse_dumps(block.decode(errors='replace').splitlines(), names, cpu_stats, patterns)
+    return collect_series(records, names, cpu_stats, patterns)
+
+
+# Parse one dump-aligned byte range of a file into series (parallel worker).
+def _load_range(file_path, start, end, names, cpu_stats, patterns=()):
+    with open(file_path, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            block = mm[start:end]
+    return _load_block(block, names, cpu_stats, patterns)
+
+
+def _load_range_args(args):
+    return _load_range(*args)
+
+
+# Parse a compressed file in a process pool: this process decompresses (see
+# stats_io.iter_chunks) and cuts dump-aligned blocks while the workers parse the
+# blocks before them. At most two blocks per worker are in flight at a time.
+def _load_compressed_parallel(pool, workers, file_path, names, cpu_stats, patterns):
+    result = collect_series((), names, cpu_stats, patterns)
+    pending = deque()
+    for block in dump_aligned_blocks(iter_chunks(file_path)):
+        pending.append(pool.apply_async(_load_block, (block, names, cpu_stats, patterns)))
+        if len(pending) >= 2 * workers:
+            merge_series(result, pending.popleft().get())
+    while pending:
+        merge_series(result, pending.popleft().get())
+    return result
+
+
+# Append the series of a later part of the file to those of an earlier part.
+def merge_series(into, part):
+    series, cpu_series = into
+    part_series, part_cpu_series = part
+    for name, values in part_series.items():
+        series.setdefault(name, array('d')).extend(values)
+    for stat, per_cpu in part_cpu_series.items():
+        for cpu_id, values in per_cpu.items():
+            cpu_series.setdefault(stat, {}).setdefault(cpu_id, array('d')).extend(values)
+    return into
+
+
+# Parse dump-aligned ranges of a file in a process pool and merge them in dump order.
+# Workers are forked so the calling script does not have to be import-safe; where
+# fork is unavailable the ranges are parsed one after another in this process.
+# Compressed files cannot be split by offset and are streamed to the workers instead.
+def load_stats_parallel(file_path, names=("simSeconds",), cpu_stats=(), workers=None, patterns=()):
+    workers = workers or os.cpu_count() or 1
+    can_fork = "fork" in multiprocessing.get_all_start_methods()
+    if compression_of(file_path) is not None:
+        if workers == 1 or not can_fork:
+            return collect_series(iter_dumps(file_path, names, cpu_stats, patterns), names, cpu_stats, patterns)
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            return _load_compressed_parallel(pool, workers, file_path, list(names), list(cpu_stats),
+                                             list(patterns))
+
+    with open(file_path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        if size == 0:
+            return collect_series((), names, cpu_stats, patterns)
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            parts = max(workers, size // PARALLEL_CHUNK_BYTES)
+            ranges = dump_aligned_ranges(mm, parts)
+
+    tasks = [(file_path, start, end, list(names), list(cpu_stats), list(patterns)) for start, end in ranges]
+    result = collect_series((), names, cpu_stats, patterns)
+    if workers > 1 and len(tasks) > 1 and can_fork:
+        with multiprocessing.get_context("fork").Pool(min(workers, len(tasks))) as pool:
+            for part in pool.imap(_load_range_args, tasks):
+                merge_series(result, part)
+    else:
+        for task in tasks:
+            merge_series(result, _load_range(*task))
+    return result
+
+
+# Parse a stats.txt file once and return the requested series (see collect_series).
+# `patterns` are wildcard stat patterns, e.g. 'system.cpu_cluster.cpus*.power_model.*Power'.
+# workers=None parses files of PARALLEL_MIN_BYTES or more on every core.
+def load_stats(file_path, names=("simSeconds",), cpu_stats=(), workers=None, patterns=()):
+    if workers is None:
+        workers = os.cpu_count() if os.path.getsize(file_path) >= PARALLEL_MIN_BYTES else 1
+    with stage("parse") as profile:
+        if workers > 1:
+            series, cpu_series = load_stats_parallel(file_path, names, cpu_stats, workers, patterns)
+        else:
+            records = iter_dumps(file_path, names, cpu_stats, patterns)
+            series, cpu_series = collect_series(records, names, cpu_stats, patterns)
+        profile.add(dumps=max((len(values) for values in series.values()), default=0), workers=workers)
+    return series, cpu_series
@@ -0,0 +1,202 @@
+import atexit
+import functools
+import json
+import os
+import resource
+import sys
+import time
+
+# Stage profiling is off unless STATS_PROFILE is set or a script is started
+# with --profile (a flag without a value). The report is JSON, written to
+# stderr for STATS_PROFILE=1/- or a bare --profile, or to the file given as
+# STATS_PROFILE=<path>.
+# When off, stage() hands back one shared no-op object and @profiled functions
+# cost a single flag check per call.
+PROFILE_ENV = "STATS_PROFILE"
+
+_stages = None   # finished stage records while profiling is on
+_open = []       # stages currently running, innermost last
+_output = "-"
+_started = time.perf_counter()
+
+
+# Turn profiling on; the report goes to `output`, by default to the path in
+# STATS_PROFILE as it is set now, or to stderr
+def enable(output=None):
+    global _stages, _output
+    if _stages is None:
+        _stages = []
+        atexit.register(write_report)
+    _output = output or os.environ.get(PROFILE_ENV) or "-"
+
+
+def enabled():
+    return _stages is not None
+
+
+# Bytes this process read through read() and friends (Linux), or None
+def _bytes_read():
+    try:
+        with open("/proc/self/io") as file:
+            for line in file:
+                if line.startswith("rchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+# Resident set size of this process right now (Linux), or None
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# Peak resident set size of the whole process so far
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+class _Stage:
+    __slots__ = ("record", "wall", "cpu", "children_cpu", "bytes_read", "rss")
+
+    def __init__(self, name):
+        self.record = {"stage": name}
+
+    def __enter__(self):
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        self.children_cpu = children.ru_utime + children.ru_stime
+        self.bytes_read = _bytes_read()
+        self.rss = _rss_mb()
+        self.cpu = time.process_time()
+        self.wall = time.perf_counter()
+        _open.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        bytes_read = _bytes_read()
+        rss = _rss_mb()
+        _open.remove(self)
+        self.record.update({
+            "depth": len(_open),
+            "wall_s": round(wall, 6),
+            "cpu_s": round(cpu, 6),
+            "children_cpu_s": round(children.ru_utime + children.ru_stime - self.children_cpu, 6),
+            # Memory the stage kept resident (negative if it freed more than it
+            # took); ru_maxrss only gives the peak of the whole process so far
+            "rss_delta_mb": None if rss is None or self.rss is None else round(rss - self.rss, 1),
+            "process_peak_rss_mb": round(_peak_rss_mb(), 1),
+            "bytes_read": None if bytes_read is None else bytes_read - self.bytes_read,
+        })
+        _stages.append(self.record)
+
+    # Add to counters of this stage, e.g. add(dumps=1000, lines=52000)
+    def add(self, **counts):
+        for key, value in counts.items():
+            self.record[key] = self.record.get(key, 0) + value
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def add(self, **counts):
+        pass
+
+
+_NO_STAGE = _NoStage()
+
+
+# Context manager timing one stage: `with stage("parse") as s: ...; s.add(dumps=n)`
+def stage(name):
+    return _NO_STAGE if _stages is None else _Stage(name)
+
+
+# Add counters to the innermost running stage, if any
+def count(**counts):
+    if _open:
+        _open[-1].add(**counts)
+
+
+# Decorator running every call of a function as a stage
+def profiled(name):
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _stages is None:
+                return function(*args, **kwargs)
+            with _Stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# Pass items through, adding how many there were to the innermost stage (under
+# `key`) once the iterable is exhausted; a no-op when profiling is off
+def counted(iterable, key):
+    if _stages is None:
+        return iterable
+
+    def counting():
+        seen = 0
+        try:
+            for item in iterable:
+                seen += 1
+                yield item
+        finally:
+            count(**{key: seen})
+    return counting()
+
+
+# Per-stage records plus totals per stage name
+def report():
+    totals = {}
+    for record in _stages or ():
+        total = totals.setdefault(record["stage"], {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0})
+        total["calls"] += 1
+        total["wall_s"] = round(total["wall_s"] + record["wall_s"], 6)
+        total["cpu_s"] = round(total["cpu_s"] + record["cpu_s"], 6)
+    return {
+        "script": os.path.basename(sys.argv[0]) if sys.argv else None,
+        "argv": sys.argv[1:],
+        "pid": os.getpid(),
+        "wall_s": round(time.perf_counter() - _started, 6),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "stages": list(_stages or ()),
+        "totals": totals,
+    }
+
+
+def write_report(output=None):
+    output = output or _output
+    text = json.dumps(report(), indent=2)
+    if output in ("-", "1"):
+        print(text, file=sys.stderr)
+    else:
+        with open(output, 'w') as file:
+            file.write(text + "\n")
+
+
+# --profile for scripts with an argparse CLI; call enable() when it is set.
+# It takes no value, so it cannot swallow a positional argument after it; the
+# report goes to the file in STATS_PROFILE if that is set, else to stderr.
+def add_profile_argument(parser):
+    parser.add_argument("--profile", action="store_true",
+                        help=f"write a JSON stage profile to stderr (or to ${PROFILE_ENV}=<path>)")
+
+
+# Turn profiling on from the environment or a --profile argument
+if os.environ.get(PROFILE_ENV) or "--profile" in sys.argv[1:]:
+    enable()
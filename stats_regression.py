@@ -0,0 +1,168 @@
+import numpy as np
+
+from stats_cache import load_stats_cached
+from stats_energy import DYNAMIC_POWER_STAT, IPC_STAT
+from stats_profile import profiled
+
+# Cells per axis of the IPC/power density histogram
+DENSITY_BINS = 200
+
+FIT_HEADERS = ["Run", "CPU", "Samples", "Slope (W/IPC)", "Intercept (W)", "r", "R^2", "Slope Std Err", "RMSE (W)"]
+
+# Rows of the moments arrays below: sample count, means of x and y, and the sums
+# of squared and cross deviations from those means
+N, MEAN_X, MEAN_Y, SXX, SYY, SXY = range(6)
+
+
+# Least-squares moments of paired samples, one column per series: x and y are
+# (samples x series) arrays and pairs with a NaN on either side are left out.
+# Returns a (6 x series) array indexed by N, MEAN_X, ... SXY.
+def co_moments(x, y):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    count = valid.sum(axis=0).astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_x = np.where(valid, x, 0.0).sum(axis=0) / count
+        mean_y = np.where(valid, y, 0.0).sum(axis=0) / count
+    dx = np.where(valid, x - mean_x, 0.0)
+    dy = np.where(valid, y - mean_y, 0.0)
+    return np.stack([count, np.nan_to_num(mean_x), np.nan_to_num(mean_y),
+                     np.einsum('ij,ij->j', dx, dx), np.einsum('ij,ij->j', dy, dy), np.einsum('ij,ij->j', dx, dy)])
+
+
+# Moments of the union of the samples along the last axis (e.g. all cores of a
+# run, or one core over several runs), as if co_moments had seen them together
+def pool_moments(moments):
+    moments = np.asarray(moments, dtype=np.float64)
+    count = moments[N].sum(axis=-1)
+    weights = np.divide(moments[N], count[..., None], out=np.zeros(moments[N].shape), where=count[..., None] > 0)
+    mean_x = (weights * moments[MEAN_X]).sum(axis=-1)
+    mean_y = (weights * moments[MEAN_Y]).sum(axis=-1)
+    dx = moments[MEAN_X] - mean_x[..., None]
+    dy = moments[MEAN_Y] - mean_y[..., None]
+    return np.stack([count, mean_x, mean_y, (moments[SXX] + moments[N] * dx * dx).sum(axis=-1),
+                     (moments[SYY] + moments[N] * dy * dy).sum(axis=-1),
+                     (moments[SXY] + moments[N] * dx * dy).sum(axis=-1)])
+
+
+# Ordinary least-squares line y = slope * x + intercept of every column of a
+# moments array, with Pearson's r, the standard error of the slope and the RMSE
+# of the residuals. Returns a dict of arrays (NaN where a column cannot be fit).
+def fit_lines(moments):
+    count, mean_x, mean_y, sxx, syy, sxy = np.asarray(moments, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = sxy / sxx
+        residual = np.maximum(syy - slope * sxy, 0.0)
+        r = sxy / np.sqrt(sxx * syy)
+        return {
+            "samples": count,
+            "slope": slope,
+            "intercept": mean_y - slope * mean_x,
+            "r": r,
+            "r2": r * r,
+            "slope_stderr": np.sqrt(residual / (count - 2) / sxx),
+            "rmse": np.sqrt(residual / count),
+        }
+
+
+# Per-core IPC and dynamic power of one run as (cpu_ids, ipc, power), the two
+# arrays (dumps x cores) and cut to the shortest series
+def load_ipc_power(stats_path):
+    _, cpu_series = load_stats_cached(stats_path, cpu_stats=(DYNAMIC_POWER_STAT, IPC_STAT))
+    power, ipc = cpu_series[DYNAMIC_POWER_STAT], cpu_series[IPC_STAT]
+    cpu_ids = [cpu_id for cpu_id in power if cpu_id in ipc]
+    if not cpu_ids:
+        return cpu_ids, np.empty((0, 0)), np.empty((0, 0))
+    length = min(min(len(power[cpu_id]), len(ipc[cpu_id])) for cpu_id in cpu_ids)
+    return (cpu_ids, np.column_stack([np.asarray(ipc[cpu_id][:length]) for cpu_id in cpu_ids]),
+            np.column_stack([np.asarray(power[cpu_id][:length]) for cpu_id in cpu_ids]))
+
+
+# Regression of dynamic power against IPC over one or many runs: per core of
+# every run, pooled over the cores of every run, and, with several runs, per
+# core and pooled over all of them. Runs are read one at a time and reduced to
+# their moments, so memory does not grow with the number of runs.
+# Returns (runs, per_core, pooled, bounds): runs is [(stats_path, cpu_ids,
+# moments)], per_core maps cpu_id -> moments over all runs, pooled is the
+# moments of every sample and bounds the (min, max) of IPC and of power seen,
+# for density_grid.
+@profiled("aggregate")
+def fit_runs(stats_paths):
+    runs, per_core = [], {}
+    bounds = np.array([[np.inf, -np.inf], [np.inf, -np.inf]])
+    for stats_path in stats_paths:
+        cpu_ids, ipc, power = load_ipc_power(stats_path)
+        moments = co_moments(ipc, power)
+        runs.append((stats_path, cpu_ids, moments))
+        for column, cpu_id in enumerate(cpu_ids):
+            if cpu_id in per_core:
+                per_core[cpu_id] = pool_moments(np.stack([per_core[cpu_id], moments[:, column]], axis=-1))
+            else:
+                per_core[cpu_id] = moments[:, column]
+        for row, values in enumerate((ipc, power)):
+            if np.any(~np.isnan(values)):
+                bounds[row] = min(bounds[row, 0], np.nanmin(values)), max(bounds[row, 1], np.nanmax(values))
+    core_moments = np.column_stack(list(per_core.values())) if per_core else np.zeros((6, 0))
+    return runs, per_core, pool_moments(core_moments), bounds
+
+
+def _fit_row(run, cpu_id, moments):
+    fit = fit_lines(moments)
+    return [run, cpu_id, int(fit["samples"])] + [float(fit[key]) for key in
+                                                 ("slope", "intercept", "r", "r2", "slope_stderr", "rmse")]
+
+
+# Rows of FIT_HEADERS for the result of fit_runs, labelling runs with label(path)
+def fit_table(runs, per_core, pooled, label=str):
+    rows = []
+    for stats_path, cpu_ids, moments in runs:
+        rows += [_fit_row(label(stats_path), cpu_id, moments[:, column]) for column, cpu_id in enumerate(cpu_ids)]
+        rows.append(_fit_row(label(stats_path), "all", pool_moments(moments)))
+    if len(runs) > 1:
+        rows += [_fit_row("all runs", cpu_id, moments) for cpu_id, moments in per_core.items()]
+        rows.append(_fit_row("all runs", "all", pooled))
+    return rows
+
+
+# 2D histogram of (IPC, dynamic power) over every core of every run, on a
+# bins x bins grid spanning bounds (from fit_runs). Each run is binned with one
+# bincount, so this is linear in the samples and the figure drawn from it costs
+# the same for a thousand samples as for a billion.
+# Returns (counts (ipc bins x power bins), ipc edges, power edges).
+@profiled("aggregate")
+def density_grid(stats_paths, bounds, bins=DENSITY_BINS):
+    ipc_edges, power_edges = (np.linspace(low, high if high > low else low + 1, bins + 1)
+                              for low, high in np.where(np.isfinite(bounds), bounds, [0.0, 1.0]))
+    counts = np.zeros(bins * bins, dtype=np.int64)
+    for stats_path in stats_paths:
+        _, ipc, power = load_ipc_power(stats_path)
+        valid = ~(np.isnan(ipc) | np.isnan(power))
+        cells = [np.clip(((values[valid] - edges[0]) / (edges[1] - edges[0])).astype(np.int64), 0, bins - 1)
+                 for values, edges in ((ipc, ipc_edges), (power, power_edges))]
+        counts += np.bincount(cells[0] * bins + cells[1], minlength=bins * bins)
+    return counts.reshape(bins, bins), ipc_edges, power_edges
+
+
+# Density of dynamic power against IPC (log colour scale) with the pooled
+# least-squares line and the per-core lines drawn over it
+def plot_density(counts, ipc_edges, power_edges, per_core, pooled, title='Dynamic Power vs IPC'):
+    from figure_render import plt
+    from matplotlib.colors import LogNorm
+    fig, ax = plt.subplots(figsize=(10, 6))
+    mesh = ax.pcolormesh(ipc_edges, power_edges, np.ma.masked_equal(counts.T, 0), norm=LogNorm(), cmap='viridis')
+    fig.colorbar(mesh, ax=ax, label='Samples')
+    ipc_range = ipc_edges[[0, -1]]
+    for cpu_id, moments in per_core.items():
+        fit = fit_lines(moments)
+        ax.plot(ipc_range, fit["slope"] * ipc_range + fit["intercept"], '--', linewidth=1, label=f'CPU {cpu_id} fit')
+    fit = fit_lines(pooled)
+    ax.plot(ipc_range, fit["slope"] * ipc_range + fit["intercept"], color='tab:red', linewidth=2,
+            label=f'All cores: P = {fit["slope"]:.4f} * IPC + {fit["intercept"]:.4f} (R^2 = {fit["r2"]:.3f})')
+    ax.set_xlim(ipc_range)
+    ax.set_ylim(power_edges[[0, -1]])
+    ax.set_xlabel('IPC (Instructions Per Cycle)', fontsize=16)
+    ax.set_ylabel('Dynamic Power (W)', fontsize=16)
+    ax.set_title(title, fontsize=18)
+    ax.legend(fontsize=10)
+    return fig
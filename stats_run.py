@@ -0,0 +1,54 @@
+import numpy as np
+
+from stats_align import stack_cpu_series
+from stats_cache import load_stats_cached
+from stats_parser import load_stats
+
+
+# One parsed stats.txt held compactly. Every stat is a single contiguous float64
+# buffer: an array('d') straight from the parser or a NumPy view of the stats
+# cache, 8 bytes per sample. The header is __slots__ only, so keeping many runs
+# around (batch comparisons, sweeps) costs little beyond their samples.
+class StatsRun:
+    __slots__ = ("file_path", "num_dumps", "series", "cpu_series")
+
+    def __init__(self, file_path, series, cpu_series):
+        self.file_path = file_path
+        self.series = series
+        self.cpu_series = cpu_series
+        self.num_dumps = len(series.get("simSeconds", ()))
+
+    # Parse (or, with cached=True, map from the stats cache) the requested stats;
+    # arguments as for stats_parser.load_stats
+    @classmethod
+    def load(cls, file_path, names=("simSeconds",), cpu_stats=(), patterns=(), workers=None, cached=True):
+        loader = load_stats_cached if cached else load_stats
+        series, cpu_series = loader(file_path, names, cpu_stats, workers, patterns)
+        return cls(file_path, series, cpu_series)
+
+    # A stat as a float64 NumPy array sharing the run's buffer (no copy)
+    def array(self, name):
+        return np.asarray(self.series[name], dtype=np.float64)
+
+    @property
+    def time(self):
+        return self.array("simSeconds")
+
+    def cpu_ids(self, stat):
+        return list(self.cpu_series[stat])
+
+    # A per-core stat as (times, values (dumps x cores), cpu_ids), cut to the
+    # shortest series like stats_align.stack_cpu_series
+    def cpu_array(self, stat, cpu_ids=None):
+        return stack_cpu_series(self.series["simSeconds"], self.cpu_series[stat], cpu_ids)
+
+    # Bytes held by the samples of every stat
+    @property
+    def nbytes(self):
+        buffers = list(self.series.values())
+        buffers += [values for per_cpu in self.cpu_series.values() for values in per_cpu.values()]
+        return sum(memoryview(values).nbytes for values in buffers)
+
+    def __repr__(self):
+        num_cpus = max((len(per_cpu) for per_cpu in self.cpu_series.values()), default=0)
+        return f"StatsRun({self.file_path!r}, {self.num_dumps} dumps, {num_cpus} cpus, {self.nbytes} bytes)"
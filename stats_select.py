@@ -0,0 +1,96 @@
+import fnmatch
+import re
+
+# Stat patterns are dotted gem5 names where each dot-separated component may use
+# shell wildcards ('*', '?', '[...]') that stay within the component, and a
+# component of just '**' matches any number of components, e.g.
+#   system.cpu_cluster.cpus*.power_model.*Power
+#   system.cpu_cluster.cpus*.commitStats*.ipc
+#   system.**.ipc
+DEEP_WILDCARD = "**"
+_WILDCARD_CHARS = frozenset("*?[")
+
+
+class _Node:
+    __slots__ = ("children", "wildcards", "deep", "terminal")
+
+    def __init__(self):
+        self.children = {}   # exact component -> _Node
+        self.wildcards = []  # (compiled component regex, _Node)
+        self.deep = None     # _Node after a '**' component
+        self.terminal = False
+
+
+# A set of stat patterns compiled into one trie over name components.
+# Exact components are a dict lookup per level, so a name sharing no prefix with
+# any pattern is rejected at its first component. Results are memoized per name,
+# and since every dump repeats the same names, each line after the first dump
+# costs one dict lookup however many patterns there are.
+class StatSelector:
+    def __init__(self, patterns=()):
+        self.root = _Node()
+        self.patterns = []
+        self.cache = {}
+        for pattern in patterns:
+            self.add(pattern)
+
+    def add(self, pattern):
+        components = []
+        for component in pattern.split('.'):
+            if component == DEEP_WILDCARD or not _WILDCARD_CHARS & set(component):
+                components.append(component)
+            else:
+                components.append(re.compile(fnmatch.translate(component)))
+        self.add_components(components)
+        self.patterns.append(pattern)
+
+    # Add a pattern given as its components: exact strings, DEEP_WILDCARD or
+    # compiled regexes matched against a whole component.
+    def add_components(self, components):
+        node = self.root
+        for component in components:
+            if component == DEEP_WILDCARD:
+                if node.deep is None:
+                    node.deep = _Node()
+                node = node.deep
+            elif isinstance(component, str):
+                node = node.children.setdefault(component, _Node())
+            else:
+                for regex, child in node.wildcards:
+                    if regex.pattern == component.pattern:
+                        node = child
+                        break
+                else:
+                    child = _Node()
+                    node.wildcards.append((component, child))
+                    node = child
+        node.terminal = True
+        self.cache.clear()
+
+    def match(self, name):
+        matched = self.cache.get(name)
+        if matched is None:
+            matched = self.cache[name] = self._walk(name.split('.'))
+        return matched
+
+    __call__ = match
+
+    def _walk(self, components):
+        stack = [(self.root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            if node.deep is not None:
+                # '**' swallows zero or more of the remaining components
+                stack.extend((node.deep, skip) for skip in range(depth, len(components) + 1))
+            if depth == len(components):
+                if node.terminal:
+                    return True
+                continue
+            component = components[depth]
+            child = node.children.get(component)
+            if child is not None:
+                stack.append((child, depth + 1))
+            for regex, child in node.wildcards:
+                if regex.fullmatch(component):
+                    stack.append((child, depth + 1))
+        return False
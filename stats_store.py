@@ -0,0 +1,298 @@
+import argparse
+import itertools
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+import numpy as np
+
+from dvfs_batch_compare import DISABLE_SUFFIX, ENABLE_SUFFIX
+from stats_energy import CYCLES_STAT, DYNAMIC_POWER_STAT, IPC_STAT, STATIC_POWER_STAT, run_metrics
+from stats_io import find_stats_file
+from stats_profile import add_profile_argument, enable, profiled
+from stats_run import StatsRun
+
+# Per-core stats ingested for every run; cycles (with IPC) give the committed
+# instructions behind instructions_per_joule
+STORE_CPU_STATS = (DYNAMIC_POWER_STAT, STATIC_POWER_STAT, IPC_STAT, CYCLES_STAT)
+
+# Per-run summary columns; the only metrics query_summaries accepts
+SUMMARY_METRICS = ("num_dumps", "num_cpus", "runtime", "avg_dynamic_power", "avg_static_power", "avg_total_power",
+                   "avg_ipc", "dynamic_energy", "static_energy", "energy", "edp", "instructions_per_joule")
+# Run columns results can be grouped by, and the aggregates queries may use
+GROUP_COLUMNS = ("benchmark", "dvfs", "run_name", "path")
+AGGREGATES = ("avg", "min", "max", "sum", "count")
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    run_name TEXT NOT NULL,
+    benchmark TEXT NOT NULL,
+    dvfs INTEGER,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    ingested_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_benchmark_dvfs ON runs (benchmark, dvfs);
+
+CREATE TABLE IF NOT EXISTS summaries (
+    run_id INTEGER PRIMARY KEY REFERENCES runs (run_id) ON DELETE CASCADE,
+    {", ".join(f"{metric} REAL" for metric in SUMMARY_METRICS)}
+);
+
+CREATE TABLE IF NOT EXISTS stats (
+    stat_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+-- One row per run, stat, core and dump
+CREATE TABLE IF NOT EXISTS samples (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    stat_id INTEGER NOT NULL REFERENCES stats (stat_id),
+    cpu_id INTEGER NOT NULL,
+    dump INTEGER NOT NULL,
+    time REAL NOT NULL,
+    value REAL,
+    PRIMARY KEY (run_id, stat_id, cpu_id, dump)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS samples_stat_run ON samples (stat_id, run_id);
+"""
+
+
+# Open (and create if needed) a results store
+def open_store(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+# (run_name, benchmark, dvfs) of a stats.txt from its run directory name:
+# <benchmark>_dvfsenable -> dvfs 1, <benchmark>_dvfsdisable -> 0, anything else None.
+# Benchmarks keep their directory relative to output_root, as in dvfs_batch_compare.
+def describe_run(stats_path, output_root=None):
+    run_dir = os.path.dirname(os.path.abspath(stats_path))
+    run_name = os.path.basename(run_dir)
+    parent = os.path.dirname(run_dir)
+    prefix = os.path.relpath(parent, output_root) if output_root else ""
+    for suffix, dvfs in ((ENABLE_SUFFIX, 1), (DISABLE_SUFFIX, 0)):
+        if run_name.lower().endswith(suffix):
+            return run_name, os.path.normpath(os.path.join(prefix, run_name[:-len(suffix)])), dvfs
+    return run_name, os.path.normpath(os.path.join(prefix, run_name)), None
+
+
+def _stat_id(conn, name):
+    conn.execute("INSERT OR IGNORE INTO stats (name) VALUES (?)", (name,))
+    return conn.execute("SELECT stat_id FROM stats WHERE name = ?", (name,)).fetchone()[0]
+
+
+# Mean over dumps of the per-dump sum (or mean) across cores; None without data
+def _average_across_cores(run, stat, reduce):
+    if stat not in run.cpu_series:
+        return None
+    _, values, _ = run.cpu_array(stat)
+    return float(np.mean(reduce(values, axis=1))) if values.size else None
+
+
+def _summarize(run):
+    dynamic_power = _average_across_cores(run, DYNAMIC_POWER_STAT, np.sum)
+    static_power = _average_across_cores(run, STATIC_POWER_STAT, np.sum)
+    summary = {
+        "num_dumps": run.num_dumps,
+        "num_cpus": max((len(per_cpu) for per_cpu in run.cpu_series.values()), default=0),
+        "avg_dynamic_power": dynamic_power,
+        "avg_static_power": static_power,
+        "avg_total_power": None if dynamic_power is None or static_power is None else dynamic_power + static_power,
+        "avg_ipc": _average_across_cores(run, IPC_STAT, np.mean),
+    }
+    if run.cpu_series.get(DYNAMIC_POWER_STAT):
+        metrics = run_metrics([run])
+        summary["runtime"] = float(metrics["runtime"][0])
+        summary["energy"] = float(metrics["total_energy"][0])
+        summary["edp"] = float(metrics["edp"][0])
+        if "dynamic_energy" in metrics:
+            summary["dynamic_energy"] = float(metrics["dynamic_energy"][0].sum())
+            summary["static_energy"] = float(metrics["static_energy"][0].sum())
+        if "instructions_per_joule" in metrics:
+            summary["instructions_per_joule"] = float(metrics["instructions_per_joule"][0])
+    return summary
+
+
+# Whether the store holds a run of stats_path ingested from the file as it is now
+def is_current(conn, stats_path):
+    st = os.stat(stats_path)
+    known = conn.execute("SELECT size, mtime_ns FROM runs WHERE path = ?", (os.path.abspath(stats_path),)).fetchone()
+    return known == (st.st_size, st.st_mtime_ns)
+
+
+# Per-run summary of a stats.txt (the columns of SUMMARY_METRICS it has data for).
+# Picklable, so pools can summarize runs in worker processes and store them here.
+# The store keeps its own copy of what it needs, so no stats.txt.cache sidecar
+# is written next to the run.
+def summarize_file(stats_path, workers=1):
+    return _summarize(StatsRun.load(stats_path, cpu_stats=STORE_CPU_STATS, workers=workers, cached=False))
+
+
+# Store a run's summary, replacing any earlier version of the same file, plus the
+# per-dump values of cpu_stats on every core when the loaded StatsRun is given.
+# Returns the run_id.
+def store_run(conn, stats_path, summary, output_root=None, run=None, cpu_stats=STORE_CPU_STATS):
+    path = os.path.abspath(stats_path)
+    st = os.stat(path)
+    run_name, benchmark, dvfs = describe_run(path, output_root)
+    with conn:
+        conn.execute("DELETE FROM runs WHERE path = ?", (path,))
+        run_id = conn.execute(
+            "INSERT INTO runs (path, run_name, benchmark, dvfs, size, mtime_ns, ingested_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (path, run_name, benchmark, dvfs, st.st_size, st.st_mtime_ns,
+             datetime.now(timezone.utc).isoformat(timespec="seconds"))).lastrowid
+        conn.execute(f"INSERT INTO summaries (run_id, {', '.join(summary)}) VALUES (?{', ?' * len(summary)})",
+                     (run_id, *summary.values()))
+        if run is not None:
+            for stat in cpu_stats:
+                if stat not in run.cpu_series:
+                    continue
+                stat_id = _stat_id(conn, stat)
+                times, values, cpu_ids = run.cpu_array(stat)
+                times = times.tolist()
+                for column, cpu_id in enumerate(cpu_ids):
+                    conn.executemany(
+                        "INSERT INTO samples (run_id, stat_id, cpu_id, dump, time, value) VALUES (?, ?, ?, ?, ?, ?)",
+                        zip(itertools.repeat(run_id), itertools.repeat(stat_id), itertools.repeat(cpu_id),
+                            itertools.count(), times, values[:, column].tolist()))
+    return run_id
+
+
+# Load one stats.txt into the store: its per-run summary and, with series=True,
+# every per-dump value of cpu_stats on every core. A run whose file has not
+# changed since it was ingested is skipped; a changed one is replaced.
+# Returns the run_id, or None when the run was already up to date.
+@profiled("ingest")
+def ingest_run(conn, stats_path, output_root=None, cpu_stats=STORE_CPU_STATS, series=True, workers=None):
+    if is_current(conn, stats_path):
+        return None
+    run = StatsRun.load(stats_path, cpu_stats=tuple(cpu_stats), workers=workers, cached=False)
+    return store_run(conn, stats_path, _summarize(run), output_root, run if series else None, cpu_stats)
+
+
+# Stored summaries of the given stats.txt files as {absolute path: {metric: value}}
+def load_summaries(conn, stats_paths):
+    wanted = {os.path.abspath(path) for path in stats_paths}
+    rows = conn.execute(f"SELECT r.path, {', '.join(f's.{metric}' for metric in SUMMARY_METRICS)} "
+                        "FROM runs r JOIN summaries s USING (run_id)")
+    return {row[0]: dict(zip(SUMMARY_METRICS, row[1:])) for row in rows if row[0] in wanted}
+
+
+# Ingest every stats.txt under output_root, plain or compressed (see
+# stats_io.find_stats_file). Returns (ingested, up to date) counts.
+def ingest_tree(conn, output_root, cpu_stats=STORE_CPU_STATS, series=True, workers=None):
+    ingested = skipped = 0
+    for dir_path, _, file_names in sorted(os.walk(output_root)):
+        stats_path = find_stats_file(dir_path, file_names)
+        if stats_path is not None:
+            run_id = ingest_run(conn, stats_path, output_root, cpu_stats, series, workers)
+            if run_id is None:
+                skipped += 1
+            else:
+                ingested += 1
+    return ingested, skipped
+
+
+def _check(value, allowed, what):
+    if value not in allowed:
+        raise ValueError(f"Unknown {what} '{value}', expected one of {allowed}")
+
+
+# WHERE clause over run columns from {column: value}; a list or tuple value matches any of its items
+def _where(filters):
+    clauses, params = [], []
+    for column, value in (filters or {}).items():
+        _check(column, GROUP_COLUMNS, "run column")
+        values = list(value) if isinstance(value, (list, tuple)) else [value]
+        clauses.append(f"r.{column} IN ({', '.join('?' * len(values))})")
+        params += values
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+# Aggregate a per-run summary metric over groups of runs, e.g.
+# query_summaries(conn, "avg_dynamic_power", by=("benchmark", "dvfs")) for the
+# mean dynamic power by benchmark and DVFS setting. Returns (headers, rows).
+def query_summaries(conn, metric, by=("benchmark", "dvfs"), aggregate="avg", filters=None):
+    _check(metric, SUMMARY_METRICS, "metric")
+    _check(aggregate, AGGREGATES, "aggregate")
+    for column in by:
+        _check(column, GROUP_COLUMNS, "run column")
+    where, params = _where(filters)
+    group = ", ".join(f"r.{column}" for column in by)
+    sql = (f"SELECT {group + ', ' if by else ''}{aggregate.upper()}(s.{metric}), COUNT(*) "
+           f"FROM runs r JOIN summaries s USING (run_id){where}"
+           + (f" GROUP BY {group} ORDER BY {group}" if by else ""))
+    return [*by, f"{aggregate}({metric})", "runs"], conn.execute(sql, params).fetchall()
+
+
+# Aggregate the per-dump samples of one stat over groups of runs (optionally per
+# core with "cpu_id" in `by`). Returns (headers, rows).
+def query_samples(conn, stat, by=("benchmark", "dvfs"), aggregate="avg", filters=None):
+    _check(aggregate, AGGREGATES, "aggregate")
+    for column in by:
+        if column != "cpu_id":
+            _check(column, GROUP_COLUMNS, "run column")
+    where, params = _where(filters)
+    where = (where + " AND" if where else " WHERE") + " t.name = ?"
+    group = ", ".join("v.cpu_id" if column == "cpu_id" else f"r.{column}" for column in by)
+    sql = (f"SELECT {group + ', ' if by else ''}{aggregate.upper()}(v.value), COUNT(v.value) "
+           f"FROM samples v JOIN stats t USING (stat_id) JOIN runs r USING (run_id){where}"
+           + (f" GROUP BY {group} ORDER BY {group}" if by else ""))
+    return [*by, f"{aggregate}({stat})", "samples"], conn.execute(sql, params + [stat]).fetchall()
+
+
+# One stored per-core series of a run as (times, {cpu_id: values}) NumPy arrays
+def load_series(conn, stats_path, stat):
+    rows = conn.execute(
+        "SELECT v.cpu_id, v.time, v.value FROM samples v JOIN stats t USING (stat_id) JOIN runs r USING (run_id) "
+        "WHERE r.path = ? AND t.name = ? ORDER BY v.cpu_id, v.dump",
+        (os.path.abspath(stats_path), stat)).fetchall()
+    per_cpu, times = {}, {}
+    for cpu_id, time, value in rows:
+        per_cpu.setdefault(cpu_id, []).append(np.nan if value is None else value)
+        times.setdefault(cpu_id, []).append(time)
+    first = next(iter(times.values()), [])
+    return np.array(first, dtype=np.float64), {cpu_id: np.array(values, dtype=np.float64)
+                                                 for cpu_id, values in per_cpu.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite store of gem5 run series and summaries")
+    add_profile_argument(parser)
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="load every stats.txt under a gem5 output tree")
+    ingest.add_argument("db")
+    ingest.add_argument("output_root")
+    ingest.add_argument("--summaries-only", dest="series", action="store_false",
+                        help="store per-run summaries without the per-dump series")
+    ingest.add_argument("--workers", type=int, default=None, help="parser processes per file (default: by file size)")
+    query = commands.add_parser("query", help="aggregate a summary metric (or, with --stat, a stored series)")
+    query.add_argument("db")
+    query.add_argument("metric", nargs="?", default="avg_dynamic_power", choices=SUMMARY_METRICS)
+    query.add_argument("--stat", help="aggregate the per-dump samples of this per-core stat instead")
+    query.add_argument("--by", nargs="*", default=["benchmark", "dvfs"], help="run columns (and cpu_id for --stat)")
+    query.add_argument("--aggregate", default="avg", choices=AGGREGATES)
+    args = parser.parse_args()
+    if args.profile:
+        enable()
+
+    from tabulate import tabulate
+    conn = open_store(args.db)
+    if args.command == "ingest":
+        ingested, skipped = ingest_tree(conn, args.output_root, series=args.series, workers=args.workers)
+        print(f"Ingested {ingested} runs into {args.db} ({skipped} already up to date)")
+    elif args.stat:
+        headers, rows = query_samples(conn, args.stat, args.by, args.aggregate)
+        print(tabulate(rows, headers=headers, tablefmt="grid", floatfmt=".6f"))
+    else:
+        headers, rows = query_summaries(conn, args.metric, args.by, args.aggregate)
+        print(tabulate(rows, headers=headers, tablefmt="grid", floatfmt=".6f"))
+    conn.close()
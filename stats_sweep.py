@@ -0,0 +1,180 @@
+import argparse
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from stats_io import find_stats_file
+from stats_profile import add_profile_argument, enable, stage
+from stats_store import is_current, load_summaries, open_store, store_run, summarize_file
+
+# Run directories of an operating-point sweep: <freq>MHz<volt>, e.g. 1800MHz0.98100
+OPERATING_POINT = re.compile(r"^(\d+(?:\.\d+)?)MHz(\d+(?:\.\d+)?)$", re.IGNORECASE)
+
+# Summaries live in this SQLite store (see stats_store), by default in the current
+# directory so a report never writes into the results tree. Runs are keyed by
+# absolute path, so one store serves every sweep, and re-running a sweep only
+# parses runs whose stats.txt changed.
+SWEEP_DB_NAME = "stats_sweep.db"
+
+HEADERS = ["Sweep", "Frequency (MHz)", "Voltage (V)", "Avg Power (W)", "Runtime (s)", "Avg IPC", "Energy (J)",
+           "EDP (J*s)", "Pareto"]
+
+
+# (frequency in MHz, voltage in V) of a <freq>MHz<volt> directory name, or None
+def parse_operating_point(name):
+    match = OPERATING_POINT.match(name)
+    return None if match is None else (float(match.group(1)), float(match.group(2)))
+
+
+# Find every <freq>MHz<volt>/stats.txt under root, plain or compressed (see
+# stats_io.find_stats_file). Runs are grouped into sweeps by the directory
+# holding the operating points (relative to root).
+# Returns [(sweep, frequency MHz, voltage V, stats path)] sorted by sweep and frequency.
+def find_sweep_runs(root):
+    runs = []
+    for dir_path, _, file_names in os.walk(root):
+        point = parse_operating_point(os.path.basename(dir_path))
+        stats_path = None if point is None else find_stats_file(dir_path, file_names)
+        if stats_path is not None:
+            sweep = os.path.normpath(os.path.relpath(os.path.dirname(dir_path), root))
+            runs.append((sweep, *point, stats_path))
+    return sorted(runs)
+
+
+# Boolean mask of the runs on the energy/runtime Pareto frontier: no other run
+# is at least as fast and at least as frugal while strictly better in one.
+# Runs with identical (runtime, energy) do not dominate each other, so the
+# front is found on the distinct points and shared by their duplicates.
+def pareto_front(runtime, energy):
+    runtime = np.asarray(runtime, dtype=np.float64)
+    energy = np.asarray(energy, dtype=np.float64)
+    valid = ~(np.isnan(runtime) | np.isnan(energy))
+    front = np.zeros(len(runtime), dtype=bool)
+    if not valid.any():
+        return front
+    # Distinct points sorted by runtime, then energy
+    points, inverse = np.unique(np.column_stack([runtime[valid], energy[valid]]), axis=0, return_inverse=True)
+    best_before = np.minimum.accumulate(np.concatenate([[np.inf], points[:-1, 1]]))
+    front[valid] = (points[:, 1] < best_before)[inverse.ravel()]
+    return front
+
+
+# Summaries of every run of a sweep, parsing (in parallel) only those that are
+# new or changed since they were last stored in db_path.
+# Returns one dict per run with sweep, frequency, voltage, path and the
+# stats_store summary metrics, plus "pareto" per sweep.
+def sweep_summaries(root, db_path=None, workers=None):
+    runs = find_sweep_runs(root)
+    conn = open_store(db_path or SWEEP_DB_NAME)
+    stale = [path for *_, path in runs if not is_current(conn, path)]
+
+    with stage("parse") as profile:
+        profile.add(runs=len(runs), parsed=len(stale))
+        workers = min(workers or os.cpu_count() or 1, len(stale))
+        if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                summaries = executor.map(summarize_file, stale)
+                for path, summary in zip(stale, summaries):
+                    store_run(conn, path, summary, root)
+        else:
+            for path in stale:
+                store_run(conn, path, summarize_file(path), root)
+
+    stored = load_summaries(conn, [path for *_, path in runs])
+    conn.close()
+    rows = [{"sweep": sweep, "frequency": frequency, "voltage": voltage, "path": path,
+             **stored[os.path.abspath(path)]}
+            for sweep, frequency, voltage, path in runs]
+    for sweep in dict.fromkeys(row["sweep"] for row in rows):
+        members = [row for row in rows if row["sweep"] == sweep]
+        front = pareto_front([_number(row["runtime"]) for row in members],
+                             [_number(row["energy"]) for row in members])
+        for row, on_front in zip(members, front):
+            row["pareto"] = bool(on_front)
+    return rows
+
+
+def _number(value):
+    return np.nan if value is None else value
+
+
+def sweep_table(rows):
+    return [[row["sweep"], row["frequency"], row["voltage"], _number(row["avg_total_power"]), _number(row["runtime"]),
+             _number(row["avg_ipc"]), _number(row["energy"]), _number(row["edp"]), "*" if row["pareto"] else ""]
+            for row in rows]
+
+
+# Average power, IPC and runtime against frequency, and energy against runtime
+# with the Pareto frontier marked, one line/marker set per sweep
+def plot_sweep(rows):
+    from figure_render import plt
+    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+    panels = (("avg_total_power", "Average Power (W)"), ("avg_ipc", "Average IPC"), ("runtime", "Runtime (s)"))
+    for sweep in dict.fromkeys(row["sweep"] for row in rows):
+        members = [row for row in rows if row["sweep"] == sweep]
+        frequency = [row["frequency"] for row in members]
+        for ax, (metric, label) in zip(axes.flat, panels):
+            ax.plot(frequency, [_number(row[metric]) for row in members], 'o-', label=sweep)
+            ax.set_xlabel('Frequency (MHz)', fontsize=12)
+            ax.set_ylabel(label, fontsize=12)
+            ax.grid(True)
+
+        ax = axes[1, 1]
+        runtime = np.array([_number(row["runtime"]) for row in members])
+        energy = np.array([_number(row["energy"]) for row in members])
+        front = np.array([row["pareto"] for row in members])
+        points = ax.scatter(runtime, energy, alpha=0.5, label=f'{sweep} operating points')
+        order = np.argsort(runtime[front])
+        ax.plot(runtime[front][order], energy[front][order], 'o-', color=points.get_facecolor()[0][:3],
+                linewidth=2, label=f'{sweep} Pareto frontier')
+        for row in (row for row in members if row["pareto"]):
+            ax.annotate(f'{row["frequency"]:g} MHz', (row["runtime"], row["energy"]), fontsize=8,
+                        textcoords="offset points", xytext=(4, 4))
+    axes[1, 1].set_xlabel('Runtime (s)', fontsize=12)
+    axes[1, 1].set_ylabel('Energy (J)', fontsize=12)
+    axes[1, 1].set_title('Energy vs Runtime', fontsize=14)
+    axes[1, 1].grid(True)
+    for ax in axes.flat:
+        ax.legend(fontsize=9)
+    fig.tight_layout()
+    return fig
+
+
+def add_sweep_arguments(parser):
+    parser.add_argument("root", help="directory tree of <freq>MHz<volt>/stats.txt runs")
+    parser.add_argument("--db", help=f"summary store (default: ./{SWEEP_DB_NAME})")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--csv", help="also write the table to this CSV file")
+    parser.add_argument("--plot", action="store_true", help="draw the sweep (saved under STATS_FIGURE_DIR when set)")
+
+
+def run_sweep(args):
+    rows = sweep_summaries(args.root, args.db, args.workers)
+    if not rows:
+        print(f"Error: no <freq>MHz<volt>/stats.txt runs found under {args.root}")
+        return
+    from tabulate import tabulate
+    print(tabulate(sweep_table(rows), headers=HEADERS, tablefmt="grid", floatfmt=".6f"))
+    print(f"{sum(row['pareto'] for row in rows)} of {len(rows)} operating points are on the energy/runtime "
+          "Pareto frontier (*)")
+    if args.csv:
+        from table_export import write_csv
+        write_csv(args.csv, HEADERS, [list(column) for column in zip(*sweep_table(rows))])
+        print(f"Saved {args.csv}")
+    if args.plot:
+        from figure_render import show_figure
+        show_figure("stats_sweep", plot_sweep(rows))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Power, runtime, IPC and energy per operating point of a frequency/voltage sweep")
+    add_sweep_arguments(parser)
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    if args.profile:
+        enable()
+    run_sweep(args)
@@ -0,0 +1,100 @@
+import argparse
+import bz2
+import gzip
+import lzma
+import os
+
+import numpy as np
+
+from stats_parser import BEGIN_MARKER, CPU_PREFIX, END_MARKER
+from stats_topology import THREAD_GROUP
+
+# Writers picked by the suffix of the output path
+OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+# Operating points a DVFS run moves between: (frequency in Hz, voltage in V)
+OPERATING_POINTS = ((600e6, 0.80), (1.0e9, 0.88), (1.4e9, 0.95), (1.8e9, 1.05))
+
+# Effective switched capacitance per core (F) and leakage per volt (W/V)
+CAPACITANCE = 0.55e-9
+LEAKAGE = 0.06
+
+
+def _stat_line(name, value, description):
+    return f"{name:<50} {value:>20} # {description}\n"
+
+
+# Write a synthetic gem5 stats.txt with `dumps` periodic dumps of `period` seconds
+# for `cores` cores with `threads` SMT threads each. Every core carries the stats
+# the scripts read (ipc, numCycles, commitStats<M>.ipc/numInsts, dynamic and
+# static power, following an IPC- and DVFS-dependent power model) plus `noise`
+# unrelated stats, and every dump ends with a distribution and a nan stat like
+# real gem5 output. With dvfs=False all cores stay at the highest operating point.
+# Paths ending in .gz, .bz2 or .xz are written compressed.
+def generate_stats(path, dumps=1000, cores=4, threads=2, noise=50, period=1e-3, dvfs=True, seed=0):
+    rng = np.random.default_rng(seed)
+    opener = next((opener for suffix, opener in OPENERS.items() if path.endswith(suffix)), open)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    points = np.array(OPERATING_POINTS)
+    level = np.full(cores, len(points) - 1)
+    # Slowly varying per-core activity, so IPC and power show phases over time
+    phase = rng.uniform(0, 2 * np.pi, cores)
+
+    with opener(path, 'wt') as file:
+        for dump in range(dumps):
+            t = (dump + 1) * period
+            if dvfs:
+                level = np.clip(level + rng.integers(-1, 2, cores), 0, len(points) - 1)
+            frequency, voltage = points[level, 0], points[level, 1]
+            activity = 0.55 + 0.4 * np.sin(phase + t * 40) * rng.uniform(0.8, 1.0, cores)
+            thread_ipc = np.clip(rng.normal(activity[:, None] * 0.8, 0.08, (cores, threads)), 0.01, None)
+            ipc = thread_ipc.sum(axis=1)
+            cycles = np.rint(frequency * period).astype(np.int64)
+            thread_insts = np.rint(thread_ipc * cycles[:, None]).astype(np.int64)
+            dynamic_power = CAPACITANCE * voltage ** 2 * frequency * activity
+            static_power = LEAKAGE * voltage * rng.uniform(0.97, 1.03, cores)
+
+            lines = [f"\n{BEGIN_MARKER}\n",
+                     _stat_line("simSeconds", f"{t:.6f}", "Number of seconds simulated (Second)"),
+                     _stat_line("simTicks", int(round(t * 1e12)), "Number of ticks simulated (Tick)"),
+                     _stat_line("finalTick", int(round(t * 1e12)), "Number of ticks from beginning of simulation (Tick)"),
+                     _stat_line("hostSeconds", f"{rng.uniform(0.5, 2.0):.2f}", "Real time elapsed on the host (Second)")]
+            noise_values = rng.random((cores, noise))
+            for core in range(cores):
+                prefix = f"{CPU_PREFIX}{core}"
+                lines.append(_stat_line(f"{prefix}.numCycles", cycles[core], "Number of cpu cycles simulated (Cycle)"))
+                lines.append(_stat_line(f"{prefix}.ipc", f"{ipc[core]:.6f}", "IPC: instructions per cycle ((Count/Cycle))"))
+                lines.append(_stat_line(f"{prefix}.cpi", f"{1 / ipc[core]:.6f}", "CPI: cycles per instruction ((Cycle/Count))"))
+                for thread in range(threads):
+                    group = f"{prefix}.{THREAD_GROUP}{thread}"
+                    lines.append(_stat_line(f"{group}.numInsts", thread_insts[core, thread],
+                                            "Number of instructions committed (thread level) (Count)"))
+                    lines.append(_stat_line(f"{group}.ipc", f"{thread_ipc[core, thread]:.6f}",
+                                            "IPC: instructions per cycle (thread level) ((Count/Cycle))"))
+                for index in range(noise):
+                    lines.append(_stat_line(f"{prefix}.unrelated{index}", f"{noise_values[core, index]:.6f}",
+                                            "Unrelated stat (Count)"))
+                lines.append(_stat_line(f"{prefix}.power_model.dynamicPower", f"{dynamic_power[core]:.6f}",
+                                        "Dynamic power for this object (Watts)"))
+                lines.append(_stat_line(f"{prefix}.power_model.staticPower", f"{static_power[core]:.6f}",
+                                        "Static power for this object (Watts)"))
+            lines.append("system.mem_ctrl.readLatency::samples      1000                       # Read latency (Tick)\n")
+            lines.append("system.mem_ctrl.readLatency::0-255         600     60.00%     60.00% # Read latency (Tick)\n")
+            lines.append("system.mem_ctrl.readLatency::256-511       400     40.00%    100.00% # Read latency (Tick)\n")
+            lines.append(_stat_line("system.l2.overallMissRate::total", "nan", "miss rate for overall accesses (Ratio)"))
+            lines.append(f"\n{END_MARKER}\n")
+            file.write("".join(lines))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic gem5 stats.txt for local testing and benchmarks")
+    parser.add_argument("path", help="output file; .gz, .bz2 or .xz are written compressed")
+    parser.add_argument("--dumps", type=int, default=1000)
+    parser.add_argument("--cores", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=2, help="SMT threads per core")
+    parser.add_argument("--noise", type=int, default=50, help="unrelated stats per core")
+    parser.add_argument("--period", type=float, default=1e-3, help="simulated seconds between dumps")
+    parser.add_argument("--no-dvfs", dest="dvfs", action="store_false", help="keep every core at the top frequency")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate_stats(args.path, args.dumps, args.cores, args.threads, args.noise, args.period, args.dvfs, args.seed)
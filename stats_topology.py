@@ -0,0 +1,75 @@
+import itertools
+
+import numpy as np
+
+from stats_parser import CPU_PREFIX, iter_dumps, split_cpu_stat
+from stats_profile import count, profiled
+
+# Per-thread stats of an SMT core live under cpus<N>.<THREAD_GROUP><M>, e.g.
+# system.cpu_cluster.cpus0.commitStats1.ipc
+THREAD_GROUP = "commitStats"
+
+# Dumps preallocated before the arrays first have to grow (they double each time)
+INITIAL_DUMPS = 1024
+
+
+# Core ids (cpus<N>) and hardware thread ids (<thread_group><M>) present in one
+# dump record, each as a sorted list of ints.
+def discover_topology(record, thread_group=THREAD_GROUP):
+    cpu_ids, thread_ids = set(), set()
+    for name in record:
+        cpu_stat = split_cpu_stat(name)
+        if cpu_stat is None:
+            continue
+        cpu_ids.add(int(cpu_stat[0]))
+        group, dot, _ = cpu_stat[1].partition('.')
+        thread_id = group[len(thread_group):]
+        if dot and group.startswith(thread_group) and thread_id.isdigit():
+            thread_ids.add(int(thread_id))
+    return sorted(cpu_ids), sorted(thread_ids)
+
+
+# Load a core-level and a thread-level per-core stat into fixed-shape arrays.
+# The cores and threads are discovered from the first dump, so any core count
+# works; stats of cores that only show up in later dumps are ignored and dumps
+# missing a value hold NaN. thread_stat=None skips the thread level.
+# Returns (times, core_values, thread_values, cpu_ids, thread_ids) with
+# core_values shaped (dumps x cores) and thread_values (dumps x cores x threads).
+@profiled("parse")
+def load_topology_series(file_path, core_stat="ipc", thread_stat="ipc", thread_group=THREAD_GROUP):
+    patterns = [f"{CPU_PREFIX}*.{core_stat}"]
+    if thread_stat is not None:
+        patterns.append(f"{CPU_PREFIX}*.{thread_group}*.{thread_stat}")
+    records = iter_dumps(file_path, ("simSeconds",), patterns=patterns)
+    first = next(records, {})
+    cpu_ids, thread_ids = discover_topology(first, thread_group)
+    if thread_stat is None:
+        thread_ids = []
+    num_cores, num_threads = len(cpu_ids), len(thread_ids)
+
+    # One column per value of a dump: time, then every core, then every (core, thread)
+    slots = {"simSeconds": 0}
+    for core, cpu_id in enumerate(cpu_ids):
+        slots[f"{CPU_PREFIX}{cpu_id}.{core_stat}"] = 1 + core
+        for thread, thread_id in enumerate(thread_ids):
+            slots[f"{CPU_PREFIX}{cpu_id}.{thread_group}{thread_id}.{thread_stat}"] = \
+                1 + num_cores + core * num_threads + thread
+
+    table = np.full((INITIAL_DUMPS, 1 + num_cores + num_cores * num_threads), np.nan)
+    num_dumps = 0
+    for record in itertools.chain([first] if first else [], records):
+        if num_dumps == len(table):
+            table = np.concatenate([table, np.full_like(table, np.nan)])
+        row = table[num_dumps]
+        for name, value in record.items():
+            slot = slots.get(name)
+            if slot is not None:
+                row[slot] = value
+        num_dumps += 1
+
+    count(dumps=num_dumps)
+    table = table[:num_dumps]
+    times = table[:, 0]
+    core_values = table[:, 1:1 + num_cores]
+    thread_values = table[:, 1 + num_cores:].reshape(num_dumps, num_cores, num_threads)
+    return times, core_values, thread_values, cpu_ids, thread_ids
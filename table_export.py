@@ -0,0 +1,126 @@
+import csv
+import os
+
+import numpy as np
+
+from stats_profile import stage
+
+# Set STATS_TABLE_DIR to also write every full table there as <name>.<format>,
+# with STATS_TABLE_FORMAT one of csv (default), parquet or arrow. The console
+# only gets a head/tail preview either way.
+TABLE_DIR_ENV = "STATS_TABLE_DIR"
+TABLE_FORMAT_ENV = "STATS_TABLE_FORMAT"
+TABLE_FORMATS = ("csv", "parquet", "arrow")
+
+# Rows written per chunk, which bounds the memory used while exporting
+CHUNK_ROWS = 1 << 16
+
+
+def table_dir():
+    return os.environ.get(TABLE_DIR_ENV) or None
+
+
+def table_format():
+    fmt = os.environ.get(TABLE_FORMAT_ENV, "csv").lower()
+    if fmt not in TABLE_FORMATS:
+        raise ValueError(f"Unknown {TABLE_FORMAT_ENV}='{fmt}', expected one of {TABLE_FORMATS}")
+    return fmt
+
+
+def _num_rows(columns):
+    return min((len(column) for column in columns), default=0)
+
+
+# Yield lists of Python values for rows [start, end) of every column, chunk by chunk
+def iter_column_chunks(columns, chunk_rows=CHUNK_ROWS):
+    num_rows = _num_rows(columns)
+    for start in range(0, num_rows, chunk_rows):
+        end = min(start + chunk_rows, num_rows)
+        yield [np.asarray(column[start:end]).tolist() for column in columns]
+
+
+# Stream a table given as columns (lists or arrays of equal length) to CSV
+def write_csv(path, headers, columns, chunk_rows=CHUNK_ROWS):
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(headers)
+        for chunk in iter_column_chunks(columns, chunk_rows):
+            writer.writerows(zip(*chunk))
+
+
+# Stream a table to Parquet (one row group per chunk) or to an Arrow IPC file.
+# pyarrow is only needed for these two formats.
+def write_arrow(path, headers, columns, fmt="parquet", chunk_rows=CHUNK_ROWS):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError(f"Writing {fmt} tables needs pyarrow (pip install pyarrow)") from e
+
+    writer = None
+    try:
+        for chunk in iter_column_chunks(columns, chunk_rows):
+            batch = pa.RecordBatch.from_arrays([pa.array(values) for values in chunk], names=list(headers))
+            if writer is None:
+                writer = pq.ParquetWriter(path, batch.schema) if fmt == "parquet" \
+                    else pa.ipc.new_file(path, batch.schema)
+            if fmt == "parquet":
+                writer.write_batch(batch)
+            else:
+                writer.write(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+# Write a whole table in the requested format; returns the path written
+def export_table(path, headers, columns, fmt=None):
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt == "csv":
+        write_csv(path, headers, columns)
+    elif fmt in ("parquet", "arrow"):
+        write_arrow(path, headers, columns, fmt)
+    else:
+        raise ValueError(f"Unknown table format '{fmt}', expected one of {TABLE_FORMATS}")
+    return path
+
+
+# Grid-formatted first and last rows of a table, with a "..." row between them
+def preview_table(headers, columns, head=10, tail=10, floatfmt=".6f"):
+    from tabulate import tabulate  # Only when a table is actually shown
+
+    num_rows = _num_rows(columns)
+    if num_rows <= head + tail:
+        row_ranges = [(0, num_rows)]
+    else:
+        row_ranges = [(0, head), (num_rows - tail, num_rows)]
+
+    # Numbers are formatted and aligned here, as the "..." row would make
+    # tabulate treat every column as text
+    rows = []
+    numeric = [False] * len(columns)
+    for start, end in row_ranges:
+        if rows:
+            rows.append(["..."] * len(columns))
+        for row in zip(*[np.asarray(column[start:end]).tolist() for column in columns]):
+            numeric = [isinstance(value, (int, float)) for value in row]
+            rows.append([format(value, floatfmt) if isinstance(value, float) else value for value in row])
+    colalign = ["right" if is_number else "left" for is_number in numeric]
+    return tabulate(rows, headers=headers, tablefmt="grid", colalign=colalign)
+
+
+# Print a preview of a table and, when STATS_TABLE_DIR is set, export all of it
+def show_table(name, headers, columns, head=10, tail=10):
+    num_rows = _num_rows(columns)
+    with stage("table") as profile:
+        profile.add(rows=num_rows)
+        print(preview_table(headers, columns, head, tail))
+        if num_rows > head + tail:
+            print(f"({num_rows} rows, showing the first {head} and last {tail})")
+
+        output_dir = table_dir()
+        if output_dir is not None:
+            os.makedirs(output_dir, exist_ok=True)
+            fmt = table_format()
+            path = export_table(os.path.join(output_dir, f"{name}.{fmt}"), headers, columns, fmt)
+            print(f"Saved {path}")
@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root, next to the scripts
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stats_synth import generate_stats  # noqa: E402
+
+DUMPS = 40
+CORES = 3
+
+
+# Write a small synthetic stats.txt (or .gz/.bz2/.xz) under tmp_path
+@pytest.fixture
+def make_stats(tmp_path):
+    def make(name="stats.txt", dumps=DUMPS, cores=CORES, seed=0, **kwargs):
+        path = str(tmp_path / name)
+        generate_stats(path, dumps=dumps, cores=cores, threads=2, noise=5, period=1e-3, seed=seed, **kwargs)
+        return path
+    return make
+
+
+@pytest.fixture
+def stats_file(make_stats):
+    return make_stats()
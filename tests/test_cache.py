@@ -0,0 +1,68 @@
+import os
+
+import numpy as np
+import pytest
+
+import stats_cache
+from stats_cache import cache_path_for, load_stats_cached
+from stats_parser import load_stats
+
+CPU_STATS = ("ipc", "power_model.dynamicPower")
+
+
+def _no_parse(*args, **kwargs):
+    raise AssertionError("stats.txt was parsed again instead of read from the cache")
+
+
+def test_cached_load_matches_parse(stats_file):
+    expected_series, expected_cpu_series = load_stats(stats_file, cpu_stats=CPU_STATS, workers=1)
+    series, cpu_series = load_stats_cached(stats_file, cpu_stats=CPU_STATS)
+    assert os.path.exists(cache_path_for(stats_file))
+    np.testing.assert_array_equal(series["simSeconds"], np.asarray(expected_series["simSeconds"]))
+    for stat in CPU_STATS:
+        assert sorted(cpu_series[stat]) == sorted(expected_cpu_series[stat])
+        for cpu_id, values in expected_cpu_series[stat].items():
+            np.testing.assert_array_equal(cpu_series[stat][cpu_id], np.asarray(values))
+
+
+def test_unchanged_file_is_served_from_cache(stats_file, monkeypatch):
+    first = load_stats_cached(stats_file, cpu_stats=CPU_STATS)
+    monkeypatch.setattr(stats_cache, "load_stats", _no_parse)
+    series, cpu_series = load_stats_cached(stats_file, cpu_stats=CPU_STATS)
+    np.testing.assert_array_equal(series["simSeconds"], first[0]["simSeconds"])
+    # A subset of what the cache holds is a hit too
+    _, subset = load_stats_cached(stats_file, cpu_stats=("ipc",))
+    np.testing.assert_array_equal(subset["ipc"]["1"], cpu_series["ipc"]["1"])
+
+
+def test_new_stats_reparse_once_then_hit(stats_file, monkeypatch):
+    load_stats_cached(stats_file, cpu_stats=("ipc",))
+    load_stats_cached(stats_file, cpu_stats=("power_model.dynamicPower",))
+    monkeypatch.setattr(stats_cache, "load_stats", _no_parse)
+    # The re-parse kept the stats asked for earlier as well
+    _, cpu_series = load_stats_cached(stats_file, cpu_stats=CPU_STATS)
+    assert set(cpu_series) == set(CPU_STATS)
+
+
+@pytest.mark.parametrize("dumps", [55, 40])
+def test_changed_file_invalidates_cache(make_stats, dumps):
+    stats_file = make_stats(dumps=40, seed=1)
+    series, cpu_series = load_stats_cached(stats_file, cpu_stats=("ipc",))
+    old_ipc = np.array(cpu_series["ipc"]["0"])
+    assert len(series["simSeconds"]) == 40
+
+    # Rewritten with more dumps, or with the same size but other values
+    make_stats(dumps=dumps, seed=2)
+    series, cpu_series = load_stats_cached(stats_file, cpu_stats=("ipc",))
+    expected = load_stats(stats_file, cpu_stats=("ipc",), workers=1)[1]["ipc"]["0"]
+    assert len(series["simSeconds"]) == dumps
+    np.testing.assert_array_equal(cpu_series["ipc"]["0"], np.asarray(expected))
+    assert not np.array_equal(cpu_series["ipc"]["0"][:40], old_ipc)
+
+
+def test_corrupt_cache_is_rebuilt(stats_file):
+    load_stats_cached(stats_file, cpu_stats=("ipc",))
+    with open(cache_path_for(stats_file), 'wb') as file:
+        file.write(b"not a cache")
+    series, _ = load_stats_cached(stats_file, cpu_stats=("ipc",))
+    assert len(series["simSeconds"]) == 40
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+import stats_diff
+from stats_diff import diff_final, diff_per_dump, rank_stats
+from stats_parser import iter_dumps
+
+IPC = "system.cpu_cluster.cpus1.ipc"
+
+
+@pytest.fixture
+def two_runs(make_stats):
+    return make_stats("a/stats.txt", dumps=50, seed=1), make_stats("b/stats.txt", dumps=45, seed=2)
+
+
+def assert_same_diff(diff, expected):
+    assert diff.dumps == expected.dumps
+    assert diff.names == expected.names
+    np.testing.assert_array_equal(diff.count, expected.count)
+    np.testing.assert_array_equal(diff.total, expected.total)
+    np.testing.assert_array_equal(diff.last, expected.last)
+    np.testing.assert_array_equal(diff.max_delta, expected.max_delta)
+    np.testing.assert_array_equal(diff.max_dump, expected.max_dump)
+
+
+def test_per_dump_diff_matches_direct_computation(two_runs):
+    diff = diff_per_dump(*two_runs, workers=1)
+    assert diff.dumps == 45
+    runs = [[record[IPC] for record in iter_dumps(path, [IPC])][:45] for path in two_runs]
+    column = diff.names.index(IPC.encode())
+    np.testing.assert_allclose(diff.means()[:, column], [np.mean(runs[0]), np.mean(runs[1])])
+    delta = np.abs(np.subtract(runs[1], runs[0]))
+    assert diff.max_delta[column] == pytest.approx(delta.max())
+    assert diff.max_dump[column] == int(np.argmax(delta))
+
+
+@pytest.mark.parametrize("workers", [2, 3, 4])
+def test_per_dump_sums_do_not_depend_on_workers(two_runs, workers, monkeypatch):
+    # Several partials even for these short runs
+    monkeypatch.setattr(stats_diff, "DUMPS_PER_PARTIAL", 4)
+    assert_same_diff(diff_per_dump(*two_runs, workers=workers), diff_per_dump(*two_runs, workers=1))
+
+
+def test_compressed_runs_match_plain(make_stats, monkeypatch):
+    monkeypatch.setattr(stats_diff, "DUMPS_PER_PARTIAL", 4)
+    plain = diff_per_dump(make_stats("a/stats.txt", seed=1), make_stats("b/stats.txt", seed=2), workers=1)
+    compressed = diff_per_dump(make_stats("a/stats.txt.gz", seed=1), make_stats("b/stats.txt.bz2", seed=2))
+    assert_same_diff(compressed, plain)
+
+
+def test_final_diff_and_ranking(two_runs):
+    diff = diff_final(*two_runs)
+    last = [list(iter_dumps(path, None))[-1] for path in two_runs]
+    column = diff.names.index(b"simSeconds")
+    np.testing.assert_allclose(diff.last[:, column], [last[0]["simSeconds"], last[1]["simSeconds"]])
+
+    names, means, delta, relative, order = rank_stats(diff, sort="abs", patterns=("system.cpu_cluster.cpus*.ipc",))
+    assert {names[column] for column in order} == {f"system.cpu_cluster.cpus{cpu}.ipc" for cpu in range(3)}
+    ranked = np.abs(delta[order])
+    assert np.all(ranked[:-1] >= ranked[1:])
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from stats_energy import (DYNAMIC_POWER_STAT, energy_metrics, instructions_from_ipc, integrate_power,
+                          run_metrics)
+from stats_run import StatsRun
+
+
+def test_constant_power():
+    times = np.array([1.0, 2.0, 3.0])
+    power = np.full((3, 2), 2.0)
+    metrics = energy_metrics(times, power)
+    np.testing.assert_allclose(metrics["runtime"], 3.0)
+    np.testing.assert_allclose(metrics["energy"], [6.0, 6.0])
+    np.testing.assert_allclose(metrics["total_energy"], 12.0)
+    np.testing.assert_allclose(metrics["average_power"], 4.0)
+    np.testing.assert_allclose(metrics["edp"], 36.0)
+
+
+def test_integration_methods():
+    times = np.array([1.0, 2.0])
+    power = np.array([[1.0], [3.0]])
+    # The first sample is held back to t_start = 0
+    np.testing.assert_allclose(integrate_power(times, power, method="trapezoid"), [1.0 + 2.0])
+    np.testing.assert_allclose(integrate_power(times, power, method="hold"), [1.0 + 3.0])
+    np.testing.assert_allclose(integrate_power(times, power, t_start=None), [2.0])
+    with pytest.raises(ValueError):
+        integrate_power(times, power, method="simpson")
+
+
+def test_static_power_and_instructions():
+    times = np.array([0.5, 1.0])
+    dynamic = np.array([[1.0, 2.0], [1.0, 2.0]])
+    static = np.full((2, 2), 0.5)
+    instructions = instructions_from_ipc([[1.0, 2.0], [1.0, 2.0]], [[100.0, 100.0], [100.0, 100.0]])
+    metrics = energy_metrics(times, dynamic, static, instructions)
+    np.testing.assert_allclose(metrics["dynamic_energy"], [1.0, 2.0])
+    np.testing.assert_allclose(metrics["static_energy"], [0.5, 0.5])
+    np.testing.assert_allclose(metrics["total_energy"], 4.0)
+    np.testing.assert_allclose(metrics["edp"], 4.0)
+    np.testing.assert_allclose(metrics["total_instructions"], 600.0)
+    np.testing.assert_allclose(metrics["instructions_per_joule"], 150.0)
+
+
+def test_runs_of_different_length_are_evaluated_together():
+    times = np.array([[1.0, 2.0, np.nan], [1.0, 2.0, 3.0]])
+    power = np.array([[[2.0], [2.0], [np.nan]], [[1.0], [1.0], [1.0]]])
+    metrics = energy_metrics(times, power)
+    np.testing.assert_allclose(metrics["runtime"], [2.0, 3.0])
+    np.testing.assert_allclose(metrics["total_energy"], [4.0, 3.0])
+    np.testing.assert_allclose(metrics["edp"], [8.0, 9.0])
+
+
+def test_run_metrics_of_a_stats_file(stats_file):
+    run = StatsRun.load(stats_file, cpu_stats=(DYNAMIC_POWER_STAT, "power_model.staticPower", "ipc", "numCycles"),
+                        workers=1, cached=False)
+    metrics = run_metrics([run])
+    times, dynamic, _ = run.cpu_array(DYNAMIC_POWER_STAT)
+    _, static, _ = run.cpu_array("power_model.staticPower")
+    total = dynamic + static
+    # Trapezoids from t = 0, the first sample held back to it
+    expected = total[0].sum() * times[0] + np.sum((total[1:] + total[:-1]).sum(axis=1) / 2 * np.diff(times))
+    np.testing.assert_allclose(metrics["total_energy"], [expected])
+    np.testing.assert_allclose(metrics["edp"], [expected * times[-1]])
+    _, ipc, _ = run.cpu_array("ipc")
+    _, cycles, _ = run.cpu_array("numCycles")
+    np.testing.assert_allclose(metrics["instructions_per_joule"], [(ipc * cycles).sum() / expected])
+
+
+def test_run_metrics_names_a_run_without_dynamic_power(stats_file):
+    run = StatsRun.load(stats_file, cpu_stats=("ipc",), workers=1, cached=False)
+    with pytest.raises(ValueError, match="stats.txt has no per-core power_model.dynamicPower"):
+        run_metrics([run])
@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+import pytest
+
+from stats_index import (dumps_in_time_range, index_path_for, iter_dumps_at, load_index,
+                         load_stats_in_time_range)
+from stats_parser import iter_dumps, load_stats
+
+
+def test_index_finds_every_dump(stats_file):
+    index = load_index(stats_file)
+    assert os.path.exists(index_path_for(stats_file))
+    assert len(index["offset"]) == 40
+    np.testing.assert_allclose(index["simSeconds"], np.arange(1, 41) * 1e-3)
+    with open(stats_file, 'rb') as file:
+        data = file.read()
+    for offset in index["offset"]:
+        assert data[offset:].startswith(b"---------- Begin Simulation Statistics")
+
+
+def test_dumps_at_offsets_match_full_parse(stats_file):
+    index = load_index(stats_file)
+    records = list(iter_dumps(stats_file, None))
+    for dump_id in (0, 17, 39):
+        (record,) = iter_dumps_at(stats_file, index, [dump_id], None)
+        assert list(record) == list(records[dump_id])
+        # Every dump ends with a nan stat, so compare values with NaN == NaN
+        np.testing.assert_array_equal(list(record.values()), list(records[dump_id].values()))
+
+
+@pytest.mark.parametrize("t_min, t_max", [(0.0105, 0.02), (None, 0.005), (0.035, None), (1.0, 2.0)])
+def test_time_window_matches_slice_of_full_load(stats_file, t_min, t_max):
+    series, cpu_series = load_stats(stats_file, cpu_stats=("ipc",), workers=1)
+    times = np.asarray(series["simSeconds"])
+    keep = np.ones(len(times), dtype=bool)
+    if t_min is not None:
+        keep &= times >= t_min
+    if t_max is not None:
+        keep &= times <= t_max
+
+    window, window_cpu = load_stats_in_time_range(stats_file, t_min, t_max, cpu_stats=("ipc",))
+    np.testing.assert_array_equal(np.asarray(window["simSeconds"]), times[keep])
+    for cpu_id, values in window_cpu["ipc"].items():
+        np.testing.assert_array_equal(np.asarray(values), np.asarray(cpu_series["ipc"][cpu_id])[keep])
+    assert dumps_in_time_range(load_index(stats_file), t_min, t_max).tolist() == np.flatnonzero(keep).tolist()
+
+
+def test_stale_index_is_rebuilt(make_stats):
+    stats_file = make_stats(dumps=10)
+    assert len(load_index(stats_file)["offset"]) == 10
+    make_stats(dumps=25)
+    assert len(load_index(stats_file)["offset"]) == 25
+
+
+def test_compressed_files_are_filtered_without_an_index(make_stats):
+    plain = load_stats_in_time_range(make_stats(), 0.01, 0.02, cpu_stats=("ipc",))
+    compressed = make_stats("stats.txt.gz")
+    with pytest.raises(ValueError):
+        load_index(compressed)
+    window, window_cpu = load_stats_in_time_range(compressed, 0.01, 0.02, cpu_stats=("ipc",))
+    np.testing.assert_array_equal(np.asarray(window["simSeconds"]), np.asarray(plain[0]["simSeconds"]))
+    np.testing.assert_array_equal(np.asarray(window_cpu["ipc"]["2"]), np.asarray(plain[1]["ipc"]["2"]))
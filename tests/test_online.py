@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+import stats_online
+from stats_online import QuantileSketch, RunningStats, summarize_stats
+from stats_parser import load_stats
+
+QUANTILES = (0.0, 0.01, 0.25, 0.5, 0.9, 0.99, 1.0)
+
+
+def samples(seed=0, size=20000):
+    rng = np.random.default_rng(seed)
+    return np.concatenate([rng.lognormal(0.0, 1.5, size), -rng.lognormal(1.0, 0.5, size // 4), np.zeros(50)])
+
+
+# The sample the sketch's rank convention points at: index floor(q * (n - 1))
+def true_quantile(values, q):
+    ordered = np.sort(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def test_running_stats_match_numpy():
+    values = samples()
+    running = RunningStats()
+    for value in values[:5000]:
+        running.add(value)
+    running.add_array(values[5000:])
+    summary = running.summary()
+    assert summary["count"] == len(values)
+    assert summary["mean"] == pytest.approx(np.mean(values), rel=1e-12)
+    assert running.variance == pytest.approx(np.var(values, ddof=1), rel=1e-10)
+    assert summary["min"] == np.min(values)
+    assert summary["max"] == np.max(values)
+
+
+def test_merged_chunks_match_one_pass():
+    values = samples(1)
+    merged = RunningStats()
+    for chunk in np.array_split(values, 7):
+        part = RunningStats()
+        part.add_array(chunk)
+        merged.merge(part)
+    assert merged.count == len(values)
+    assert merged.mean == pytest.approx(np.mean(values), rel=1e-12)
+    assert merged.variance == pytest.approx(np.var(values, ddof=1), rel=1e-10)
+
+
+def test_nan_is_skipped():
+    running = RunningStats()
+    running.add_array([1.0, np.nan, 3.0])
+    assert running.summary()["count"] == 2
+    assert running.mean == 2.0
+    assert np.isnan(RunningStats().summary()["mean"])
+
+
+@pytest.mark.parametrize("q", QUANTILES)
+def test_sketch_quantiles_within_relative_accuracy(q):
+    values = samples(2)
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    sketch.add_array(values)
+    expected = true_quantile(values, q)
+    assert abs(sketch.quantile(q) - expected) <= 0.01 * abs(expected) + 1e-12
+
+
+@pytest.mark.parametrize("q", QUANTILES)
+def test_merged_sketches_equal_one_sketch(q):
+    values = samples(3)
+    whole = QuantileSketch()
+    whole.add_array(values)
+    merged = QuantileSketch()
+    for chunk in np.array_split(values, 5):
+        part = QuantileSketch()
+        part.add_array(chunk)
+        merged.merge(part)
+    assert merged.quantile(q) == whole.quantile(q)
+
+
+def test_summarize_stats_matches_full_parse(stats_file, monkeypatch):
+    _, cpu_series = load_stats(stats_file, cpu_stats=("ipc",), workers=1)
+    per_dump_total = np.sum([np.asarray(values) for values in cpu_series["ipc"].values()], axis=0)
+    # Small chunks so the forked workers each get a few dumps
+    monkeypatch.setattr(stats_online, "PARALLEL_CHUNK_BYTES", 16 << 10)
+    for workers in (1, 3):
+        _, per_core, totals = summarize_stats(stats_file, cpu_stats=("ipc",), workers=workers)
+        for cpu_id, values in cpu_series["ipc"].items():
+            assert per_core["ipc"][cpu_id].count == len(values)
+            assert per_core["ipc"][cpu_id].mean == pytest.approx(np.mean(values), rel=1e-12)
+            assert per_core["ipc"][cpu_id].variance == pytest.approx(np.var(values, ddof=1), rel=1e-10)
+        assert totals["ipc"].mean == pytest.approx(np.mean(per_dump_total), rel=1e-12)
+        assert totals["ipc"].max == pytest.approx(np.max(per_dump_total), rel=1e-12)
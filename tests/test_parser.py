@@ -0,0 +1,83 @@
+import re
+
+import numpy as np
+import pytest
+
+from stats_parser import iter_dumps, load_stats, split_cpu_stat
+
+CPU_STATS = ("ipc", "power_model.dynamicPower", "power_model.staticPower")
+
+
+# The per-script regex loop the parser replaced, for one per-core stat
+def baseline_series(file_path, stat):
+    time_seconds, per_cpu = [], {}
+    pattern = re.compile(r'system\.cpu_cluster\.cpus(\d+)\.' + re.escape(stat) + r'\s')
+    with open(file_path) as file:
+        for line in file:
+            if line.startswith("simSeconds"):
+                time_seconds.append(float(re.search(r'\d+\.\d+', line).group()))
+            else:
+                match = pattern.match(line)
+                if match:
+                    per_cpu.setdefault(match.group(1), []).append(float(re.search(r'(\d+\.\d+)', line).group()))
+    return time_seconds, per_cpu
+
+
+def assert_same_series(result, expected):
+    series, cpu_series = result
+    expected_series, expected_cpu_series = expected
+    assert series.keys() == expected_series.keys()
+    for name, values in expected_series.items():
+        np.testing.assert_array_equal(np.asarray(series[name]), np.asarray(values))
+    assert cpu_series.keys() == expected_cpu_series.keys()
+    for stat, per_cpu in expected_cpu_series.items():
+        assert list(cpu_series[stat]) == list(per_cpu)
+        for cpu_id, values in per_cpu.items():
+            np.testing.assert_array_equal(np.asarray(cpu_series[stat][cpu_id]), np.asarray(values))
+
+
+@pytest.mark.parametrize("stat", ["ipc", "power_model.dynamicPower"])
+def test_serial_parse_matches_baseline_regex(stats_file, stat):
+    series, cpu_series = load_stats(stats_file, cpu_stats=(stat,), workers=1)
+    time_seconds, per_cpu = baseline_series(stats_file, stat)
+    assert len(time_seconds) == 40
+    np.testing.assert_array_equal(np.asarray(series["simSeconds"]), time_seconds)
+    assert sorted(cpu_series[stat]) == sorted(per_cpu) == ["0", "1", "2"]
+    for cpu_id, values in per_cpu.items():
+        np.testing.assert_array_equal(np.asarray(cpu_series[stat][cpu_id]), values)
+
+
+@pytest.mark.parametrize("workers", [2, 3, 5])
+def test_parallel_parse_matches_serial(stats_file, workers):
+    serial = load_stats(stats_file, cpu_stats=CPU_STATS, workers=1)
+    assert_same_series(load_stats(stats_file, cpu_stats=CPU_STATS, workers=workers), serial)
+
+
+@pytest.mark.parametrize("suffix", [".gz", ".bz2", ".xz"])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_compressed_parse_matches_plain(make_stats, suffix, workers):
+    plain = load_stats(make_stats(), cpu_stats=CPU_STATS, workers=1)
+    compressed = make_stats("stats.txt" + suffix)
+    assert_same_series(load_stats(compressed, cpu_stats=CPU_STATS, workers=workers), plain)
+
+
+def test_patterns_collect_matching_stats(stats_file):
+    series, cpu_series = load_stats(stats_file, names=("simSeconds",), workers=1,
+                                    patterns=("system.cpu_cluster.cpus*.power_model.*Power",))
+    assert set(cpu_series) == {"power_model.dynamicPower", "power_model.staticPower"}
+    assert all(len(values) == 40 for per_cpu in cpu_series.values() for values in per_cpu.values())
+
+
+def test_incomplete_last_dump_is_dropped(stats_file):
+    with open(stats_file) as file:
+        text = file.read()
+    with open(stats_file, 'w') as file:
+        file.write(text[:text.rfind("End Simulation Statistics")])
+    assert sum(1 for _ in iter_dumps(stats_file, ["simSeconds"])) == 39
+
+
+def test_split_cpu_stat():
+    assert split_cpu_stat("system.cpu_cluster.cpus2.power_model.dynamicPower") == ("2", "power_model.dynamicPower")
+    assert split_cpu_stat("system.cpu_cluster.cpus0foo.ipc") is None
+    assert split_cpu_stat("system.cpu_cluster.cpus.ipc") is None
+    assert split_cpu_stat("simSeconds") is None
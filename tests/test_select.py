@@ -0,0 +1,43 @@
+import re
+
+from stats_parser import load_stats
+from stats_select import StatSelector
+
+
+def test_wildcards_stay_within_one_component():
+    selector = StatSelector(["system.cpu_cluster.cpus*.power_model.*Power"])
+    assert selector("system.cpu_cluster.cpus0.power_model.dynamicPower")
+    assert selector("system.cpu_cluster.cpus12.power_model.staticPower")
+    assert not selector("system.cpu_cluster.cpus0.power_model.dynamicPowerTotal")
+    assert not selector("system.cpu_cluster.cpus0.extra.power_model.dynamicPower")
+    assert not selector("system.cpu_cluster.cpus0.power_model")
+
+
+def test_regex_components_match_the_whole_component():
+    selector = StatSelector()
+    selector.add_components(["system", "cpu_cluster", re.compile(r"cpus\d+"), "ipc"])
+    assert selector("system.cpu_cluster.cpus3.ipc")
+    assert not selector("system.cpu_cluster.cpus3foo.ipc")
+    assert not selector("system.cpu_cluster.xcpus3.ipc")
+
+
+def test_character_classes_match_the_whole_component():
+    selector = StatSelector(["system.cpu_cluster.cpus[0-1].ipc"])
+    assert selector("system.cpu_cluster.cpus1.ipc")
+    assert not selector("system.cpu_cluster.cpus10.ipc")
+
+
+def test_deep_wildcard_spans_any_number_of_components():
+    selector = StatSelector(["system.**.ipc"])
+    assert selector("system.ipc")
+    assert selector("system.cpu_cluster.cpus0.ipc")
+    assert selector("system.cpu_cluster.cpus0.commitStats1.ipc")
+    assert not selector("system.cpu_cluster.cpus0.ipcx")
+    assert not selector("simSeconds")
+
+
+def test_patterns_select_stats_from_a_file(stats_file):
+    _, cpu_series = load_stats(stats_file, names=("simSeconds",), workers=1,
+                               patterns=("system.cpu_cluster.cpus[02].ipc",))
+    assert set(cpu_series) == {"ipc"}
+    assert sorted(cpu_series["ipc"]) == ["0", "2"]
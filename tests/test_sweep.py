@@ -0,0 +1,52 @@
+import os
+
+import numpy as np
+
+from stats_sweep import find_sweep_runs, pareto_front, parse_operating_point, sweep_summaries
+from stats_synth import generate_stats
+
+
+def test_pareto_front():
+    runtime = [1.0, 2.0, 3.0, 2.5, 4.0]
+    energy = [5.0, 3.0, 1.0, 4.0, 1.0]
+    assert pareto_front(runtime, energy).tolist() == [True, True, True, False, False]
+
+
+def test_pareto_front_marks_every_run_of_a_tied_point():
+    runtime = [2.0, 1.0, 2.0, 1.0, 3.0]
+    energy = [1.0, 3.0, 1.0, 3.0, 0.5]
+    assert pareto_front(runtime, energy).tolist() == [True, True, True, True, True]
+
+
+def test_pareto_front_ties_on_one_axis_are_dominated():
+    # Same runtime with more energy, or same energy taking longer
+    runtime = [1.0, 1.0, 2.0]
+    energy = [2.0, 3.0, 2.0]
+    assert pareto_front(runtime, energy).tolist() == [True, False, False]
+
+
+def test_pareto_front_skips_nan():
+    assert pareto_front([1.0, np.nan, 2.0], [2.0, 0.1, 1.0]).tolist() == [True, False, True]
+    assert pareto_front([np.nan], [np.nan]).tolist() == [False]
+
+
+def test_parse_operating_point():
+    assert parse_operating_point("1800MHz0.98100") == (1800.0, 0.981)
+    assert parse_operating_point("1800mhz1") == (1800.0, 1.0)
+    assert parse_operating_point("core_b2l3p8") is None
+
+
+def test_sweep_summaries(tmp_path):
+    root = tmp_path / "sweep"
+    for point, suffix in (("600MHz0.80000", ""), ("1200MHz0.90000", ".gz"), ("1800MHz0.98100", "")):
+        generate_stats(str(root / "bench" / point / ("stats.txt" + suffix)), dumps=20, cores=2, threads=1,
+                       noise=2, dvfs=False)
+    assert len(find_sweep_runs(str(root))) == 3
+
+    db_path = str(tmp_path / "summaries.db")
+    rows = sweep_summaries(str(root), db_path, workers=1)
+    assert [row["frequency"] for row in sorted(rows, key=lambda row: row["frequency"])] == [600.0, 1200.0, 1800.0]
+    assert all(row["energy"] > 0 and row["runtime"] > 0 for row in rows)
+    assert any(row["pareto"] for row in rows)
+    # Nothing is written into the results tree
+    assert sorted(os.listdir(root / "bench" / "600MHz0.80000")) == ["stats.txt"]